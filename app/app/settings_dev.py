@@ -56,6 +56,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressedJSONMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -100,6 +101,20 @@ DATABASES = {
 }
 
 
+# Caches
+# https://docs.djangoproject.com/en/2.2/ref/settings/#caches
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'throttle': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'throttle',
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
 
@@ -141,4 +156,53 @@ STATIC_URL = '/static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = '/vol/web/media'
 
+# Parsed result tables kept as memory-mapped .npy files
+DATASTORE_ROOT = '/vol/web/datastore'
+
+# Internal nginx location used to hand file downloads over with X-Accel-Redirect
+MEDIA_ACCEL_REDIRECT_URL = None
+
+# File storage of resultfiles and artifacts, `core.storage.S3Storage` keeps
+# them on an S3 compatible server
+DEFAULT_FILE_STORAGE = os.environ.get('FILE_STORAGE', 'core.storage.SignedFileSystemStorage')
+FILE_STORAGE_URL_EXPIRY = 3600
+S3_BUCKET_NAME = os.environ.get('S3_BUCKET_NAME')
+S3_ENDPOINT_URL = os.environ.get('S3_ENDPOINT_URL')
+S3_ACCESS_KEY = os.environ.get('S3_ACCESS_KEY')
+S3_SECRET_KEY = os.environ.get('S3_SECRET_KEY')
+S3_REGION_NAME = os.environ.get('S3_REGION_NAME', 'us-east-1')
+
+# Uploaded result tables are validated while they arrive
+FILE_UPLOAD_HANDLERS = [
+    'core.uploadhandlers.ResultTableUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
+# Seconds before a change feed entry is served, transactions recording
+# changes must commit within it, see `core.models.ChangeEvent.visible`
+CHANGE_FEED_DELAY = 5
+
+# Server-sent events of the change feed: seconds before a stream ends and
+# its client reconnects, between keep-alive comments and between polls of
+# the feed on databases without notifications
+EVENTS_STREAM_TIMEOUT = 300
+EVENTS_HEARTBEAT = 15
+EVENTS_POLL_INTERVAL = 1
+# Seconds the ticket authenticating a stream by its url stays valid
+EVENTS_TICKET_EXPIRY = 60
+
 AUTH_USER_MODEL = 'core.User'
+
+# Request budgets per user, or per address for anonymous clients
+THROTTLE_CACHE = 'throttle'
+REST_FRAMEWORK = {
+    'DEFAULT_THROTTLE_CLASSES': [
+        'core.throttling.TokenBucketThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'read': '600/min',
+        'upload': '60/min',
+        'download': '120/min',
+    },
+}
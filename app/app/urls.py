@@ -18,9 +18,12 @@ from django.urls import path, include
 from django.conf.urls.static import static
 from django.conf import settings
 
+from core.views import SignedStorageView
+
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('storage/<str:token>/', SignedStorageView.as_view(), name='signed-storage'),
     path('api/user/', include('user.urls')),
     path('api/manager/', include('manager.urls')),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
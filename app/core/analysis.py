@@ -0,0 +1,237 @@
+import warnings
+
+import numpy as np
+
+
+def make_grid(xs, points, x_min=None, x_max=None):
+    """Return `points` evenly spaced values spanning all the arrays of `xs`"""
+    if x_min is None:
+        x_min = min(x.min() for x in xs)
+    if x_max is None:
+        x_max = max(x.max() for x in xs)
+    return np.linspace(x_min, x_max, points)
+
+
+def interpolate(xs, ys, queries):
+    """
+    Linearly interpolate many curves at their own query points in one pass.
+
+    `xs` and `ys` hold the points of every curve, in any order, `queries`
+    the x values to evaluate every curve at. Returns the values at all
+    queries concatenated, NaN outside the x range of a curve.
+
+    The curves are concatenated with their x values shifted apart by more
+    than their total span, so a single sort and a single binary search
+    locate the neighbours of every query on every curve.
+    """
+    rows = np.repeat(np.arange(len(xs)), [len(x) for x in xs])
+    x = np.concatenate(xs).astype(float)
+    y = np.concatenate(ys).astype(float)
+    order = np.lexsort((x, rows))
+    rows, x, y = rows[order], x[order], y[order]
+
+    query_rows = np.repeat(np.arange(len(queries)), [len(q) for q in queries])
+    points = np.concatenate(queries).astype(float)
+    base = min(x.min(), points.min())
+    span = max(x.max(), points.max()) - base + 1
+    keys = x - base + rows * span
+
+    right = np.searchsorted(keys, points - base + query_rows * span, side='right')
+    left = np.clip(right - 1, 0, len(x) - 1)
+    right = np.clip(right, 0, len(x) - 1)
+
+    inside = (rows[left] == query_rows) & (rows[right] == query_rows) & (x[left] <= points) & (x[right] > points)
+    exact = (rows[left] == query_rows) & (x[left] == points)
+    # Points outside a curve are masked before dividing, their neighbours
+    # may be the same point or belong to another curve
+    width = np.where(inside, x[right] - x[left], 1.0)
+    t = np.where(inside, (points - x[left]) / width, 0.0)
+    values = np.where(inside, y[left] + t * (y[right] - y[left]), np.nan)
+    return np.where(exact, y[left], values)
+
+
+def resample(xs, ys, grid):
+    """
+    Resample many curves onto a common grid, see `interpolate`. Returns an
+    array with a row per curve and a column per grid point.
+    """
+    return interpolate(xs, ys, [grid] * len(xs)).reshape(len(xs), len(grid))
+
+
+def compare(bases, others):
+    """
+    Compare pairs of 1D tables bin by bin, in one batch.
+
+    Every table of `others` is interpolated at the bins of its table in
+    `bases`. Returns the per bin ratios and differences of every pair, and
+    arrays with the largest relative deviation |ratio - 1| and the largest
+    absolute difference of every pair, NaN where no bins overlap.
+    """
+    base_x = [table[:, 0] for table in bases]
+    base_y = np.concatenate([table[:, 1] for table in bases])
+    other_y = interpolate([table[:, 0] for table in others], [table[:, 1] for table in others], base_x)
+
+    difference = other_y - base_y
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ratio = np.where(base_y != 0, other_y / base_y, np.nan)
+
+    starts = np.concatenate(([0], np.cumsum([len(x) for x in base_x])[:-1]))
+    max_deviation = np.fmax.reduceat(np.abs(ratio - 1), starts)
+    max_difference = np.fmax.reduceat(np.abs(difference), starts)
+    return (
+        np.split(ratio, starts[1:]),
+        np.split(difference, starts[1:]),
+        max_deviation,
+        max_difference,
+    )
+
+
+def envelope(values):
+    """
+    Reduce stacked curves, a row per curve, to their band: the minimum,
+    maximum, mean and standard deviation of every column, and the number
+    of curves defined there. Columns without values are NaN.
+    """
+    with warnings.catch_warnings():
+        # Columns outside every curve are expected to reduce to NaN
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return {
+            'min': np.nanmin(values, axis=0),
+            'max': np.nanmax(values, axis=0),
+            'mean': np.nanmean(values, axis=0),
+            'std': np.nanstd(values, axis=0),
+            'count': np.sum(~np.isnan(values), axis=0),
+        }
+
+
+SIGNATURE_SIZE = 64
+
+
+def signature(table, is_3d=False):
+    """
+    Return the shape of a table as a unit length float32 vector of
+    `SIGNATURE_SIZE` values, resampled over its own x range, so the dot
+    product of two signatures is their cosine similarity. 3D tables are
+    projected onto x first.
+    """
+    if is_3d:
+        grid = Grid(table)
+        x, (y, _) = grid.x, project(grid, 'x')
+    else:
+        x, y = table[:, 0], table[:, 1]
+    if len(x) < 2:
+        x, y = np.array([x[0], x[0] + 1]), np.array([y[0], y[0]])
+
+    vector = resample([x], [y], make_grid([x], SIGNATURE_SIZE))[0]
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector = vector / norm
+    return vector.astype(np.float32)
+
+
+def to_json(array):
+    """Return the array as nested lists with NaN replaced by None"""
+    return np.where(np.isnan(array), None, array).tolist()
+
+
+class Grid:
+    """
+    A 3D result table arranged on its bin centres: `values` and `errors`
+    hold a row per `x` and a column per `y`, NaN for missing bins.
+    """
+
+    def __init__(self, table):
+        self.x, ix = np.unique(table[:, 0], return_inverse=True)
+        self.y, iy = np.unique(table[:, 1], return_inverse=True)
+        self.values = np.full((len(self.x), len(self.y)), np.nan)
+        self.values[ix, iy] = table[:, 2]
+        self.errors = None
+        if table.shape[1] > 3:
+            self.errors = np.full_like(self.values, np.nan)
+            self.errors[ix, iy] = table[:, 3]
+
+    def axis(self, name):
+        return self.x if name == 'x' else self.y
+
+    def mask(self, name, low=None, high=None):
+        """Return which bins of an axis lie within [low, high]"""
+        centres = self.axis(name)
+        inside = np.ones(len(centres), dtype=bool)
+        if low is not None:
+            inside &= centres >= low
+        if high is not None:
+            inside &= centres <= high
+        return inside
+
+
+def bin_widths(centres):
+    """Return the widths of bins around `centres`, split halfway between neighbours"""
+    if len(centres) < 2:
+        return np.ones(len(centres))
+    edges = np.concatenate((
+        [centres[0] - (centres[1] - centres[0]) / 2],
+        (centres[1:] + centres[:-1]) / 2,
+        [centres[-1] + (centres[-1] - centres[-2]) / 2],
+    ))
+    return np.diff(edges)
+
+
+def integrate(values, errors, weights, axis):
+    """Sum `values` times `weights` along `axis`, missing bins count as zero"""
+    total = np.nansum(values * weights, axis=axis)
+    if errors is None:
+        return total, None
+    return total, np.sqrt(np.nansum((errors * weights) ** 2, axis=axis))
+
+
+def project(grid, axis, low=None, high=None):
+    """
+    Project a grid onto `axis` by integrating over the other axis, within
+    [low, high] of the other axis.
+    """
+    other = 'y' if axis == 'x' else 'x'
+    inside = grid.mask(other, low, high)
+    weights = bin_widths(grid.axis(other)) * inside
+    dimension = 1 if axis == 'x' else 0
+    shape = (1, -1) if axis == 'x' else (-1, 1)
+    return integrate(grid.values, grid.errors, weights.reshape(shape), dimension)
+
+
+def slice_grid(grid, axis, index):
+    """Return the values and errors along the other axis at bin `index` of `axis`"""
+    if axis == 'x':
+        return grid.values[index], None if grid.errors is None else grid.errors[index]
+    return grid.values[:, index], None if grid.errors is None else grid.errors[:, index]
+
+
+def integrate_range(grid, x_min=None, x_max=None, y_min=None, y_max=None):
+    """Return the integral and its error over the bins within the ranges"""
+    weights = np.outer(
+        bin_widths(grid.x) * grid.mask('x', x_min, x_max),
+        bin_widths(grid.y) * grid.mask('y', y_min, y_max)
+    )
+    total, error = integrate(grid.values.ravel(), None if grid.errors is None else grid.errors.ravel(),
+                             weights.ravel(), 0)
+    return float(total), None if error is None else float(error)
+
+
+STATISTICS = ('bins', 'x_min', 'x_max', 'integral', 'maximum', 'mean')
+
+
+def summarize(table, is_3d=False):
+    """Return the summary statistics of a parsed result table"""
+    x = table[:, 0]
+    values = table[:, 2 if is_3d else 1]
+    if is_3d:
+        integral, _ = integrate_range(Grid(table))
+    else:
+        order = np.argsort(x)
+        integral = float(np.sum(values[order] * bin_widths(x[order])))
+    return {
+        'bins': len(table),
+        'x_min': float(x.min()),
+        'x_max': float(x.max()),
+        'integral': integral,
+        'maximum': float(values.max()),
+        'mean': float(values.mean()),
+    }
@@ -0,0 +1,111 @@
+import json
+import os
+import statistics
+import time
+import tracemalloc
+
+from collections import OrderedDict
+
+from django.utils.module_loading import autodiscover_modules
+
+
+_registry = OrderedDict()
+
+
+def register(name):
+    """
+    Register a micro-benchmark under `name`.
+
+    The decorated function is the setup step: it builds all the input data
+    and returns the zero-argument callable whose execution is measured.
+    """
+    def decorator(setup):
+        _registry[name] = setup
+        return setup
+    return decorator
+
+
+def autodiscover():
+    """Import the `benchmarks` module of every installed app"""
+    autodiscover_modules('benchmarks')
+
+
+def get_benchmarks(pattern=None):
+    """Return the registered benchmarks whose name contains `pattern`"""
+    return OrderedDict(
+        (name, setup) for name, setup in _registry.items()
+        if not pattern or pattern in name
+    )
+
+
+def run_benchmark(name, setup, warmup=2, repeat=5, number=1):
+    """Run a single benchmark and return its timing and memory statistics"""
+    func = setup()
+
+    for _ in range(warmup):
+        func()
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+
+    # tracemalloc slows everything down, so memory is measured on a
+    # separate call to keep the timings clean
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return OrderedDict([
+        ('name', name),
+        ('min', min(timings)),
+        ('median', statistics.median(timings)),
+        ('mean', statistics.mean(timings)),
+        ('stdev', statistics.stdev(timings) if len(timings) > 1 else 0.0),
+        ('peak_memory', peak),
+    ])
+
+
+def load_baseline(path):
+    """Load baseline results stored by `save_baseline`, keyed by name"""
+    if not os.path.isfile(path):
+        return {}
+    with open(path) as baseline_file:
+        return json.load(baseline_file)
+
+
+def save_baseline(path, results):
+    """Merge `results` into the baseline file at `path`"""
+    baseline = load_baseline(path)
+    baseline.update((result['name'], result) for result in results)
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as baseline_file:
+        json.dump(baseline, baseline_file, indent=2, sort_keys=True)
+
+
+def find_regressions(results, baseline, threshold):
+    """
+    Compare `results` against `baseline` and return the slowdowns.
+
+    The fastest repetition is compared because noise from other processes
+    only ever makes a run slower. A benchmark regresses when it grew by
+    more than `threshold` (a fraction, e.g. 0.2 for 20%).
+    """
+    regressions = []
+    for result in results:
+        previous = baseline.get(result['name'])
+        if not previous or not previous['min']:
+            continue
+        change = result['min'] / previous['min'] - 1
+        if change > threshold:
+            regressions.append((result['name'], previous['min'], result['min'], change))
+
+    return regressions
@@ -0,0 +1,66 @@
+import numpy as np
+
+from core import benchmark
+from core.analysis import make_grid, resample
+from core.models import (
+    Experiment,
+    Measurement,
+    Nuwroversion,
+    Artifact,
+    Resultfile,
+    artifact_file_path,
+    resultfile_file_path
+)
+from core.parsers import parse_table
+
+
+def sample_resultfile():
+    """Return an unsaved Resultfile with its related objects in memory"""
+    return Resultfile(
+        id=1,
+        experiment=Experiment(id=1, name='MINERvA'),
+        measurement=Measurement(id=1, name='CC0pi'),
+        nuwroversion=Nuwroversion(id=1, name='v1.0'),
+        filename='result.txt'
+    )
+
+
+@benchmark.register('core.resultfile_file_path')
+def bench_resultfile_file_path():
+    resultfile = sample_resultfile()
+
+    def run():
+        for _ in range(1000):
+            resultfile_file_path(resultfile, 'result.txt')
+    return run
+
+
+@benchmark.register('core.artifact_file_path')
+def bench_artifact_file_path():
+    artifact = Artifact(id=1, resultfile=sample_resultfile(), filename='plot.png')
+
+    def run():
+        for _ in range(1000):
+            artifact_file_path(artifact, 'plot.png')
+    return run
+
+
+@benchmark.register('core.parse_table')
+def bench_parse_table():
+    text = '# x value error\n' + ''.join(f'{i * 0.01:.4f} {i * 1.5e-39:.6e} {i * 1e-40:.6e}\n' for i in range(5000))
+
+    def run():
+        parse_table(text)
+    return run
+
+
+@benchmark.register('core.resample')
+def bench_resample():
+    rng = np.random.RandomState(0)
+    xs = [np.sort(rng.uniform(0, 10, rng.randint(20, 200))) for _ in range(50)]
+    ys = [rng.normal(size=len(x)) for x in xs]
+    grid = make_grid(xs, 500)
+
+    def run():
+        resample(xs, ys, grid)
+    return run
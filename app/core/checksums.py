@@ -0,0 +1,42 @@
+import hashlib
+import threading
+import time
+
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class Throttle:
+    """Limits the rate of bytes read across threads to `rate` bytes/second"""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.lock = threading.Lock()
+        self.next_time = time.monotonic()
+
+    def consume(self, amount):
+        """Block until `amount` bytes may be read"""
+        if not self.rate:
+            return
+        with self.lock:
+            now = time.monotonic()
+            start = max(self.next_time, now)
+            self.next_time = start + amount / self.rate
+        if start > now:
+            time.sleep(start - now)
+
+
+def file_checksum(file, throttle=None):
+    """
+    Return the SHA-256 hex digest and size of a Django `File`, reading it
+    in chunks so files of any size are hashed in constant memory
+    """
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in file.chunks(CHUNK_SIZE):
+        if throttle is not None:
+            throttle.consume(len(chunk))
+        digest.update(chunk)
+        size += len(chunk)
+
+    return digest.hexdigest(), size
@@ -0,0 +1,68 @@
+import os
+
+from tempfile import NamedTemporaryFile
+
+import numpy as np
+
+from django.conf import settings
+
+from core.parsers import ParseError, expected_columns, parse_table
+
+
+def table_path(name):
+    """Return the path of the parsed table of the stored file `name`"""
+    return os.path.join(settings.DATASTORE_ROOT, name + '.npy')
+
+
+def load_table(field_file, is_3d=False):
+    """
+    Return the parsed table of a stored result file, memory-mapped.
+
+    The table is parsed on first use and kept as a little-endian float64
+    `.npy` file in `DATASTORE_ROOT`. Storage names are never reused for
+    other content, so the kept tables never go stale. The returned array
+    is read-only and shared by every process through the page cache.
+    """
+    path = table_path(field_file.name)
+    try:
+        table = np.load(path, mmap_mode='r')
+    except FileNotFoundError:
+        pass
+    else:
+        # The table may have been parsed before the file was marked 1D or 3D
+        if table.shape[1] not in expected_columns(is_3d):
+            raise ParseError(f'Expected {" or ".join(map(str, expected_columns(is_3d)))} columns')
+        return table
+
+    with field_file.storage.open(field_file.name, 'rb') as stored_file:
+        table = parse_table(stored_file.read().decode(), is_3d)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with NamedTemporaryFile(dir=os.path.dirname(path), suffix='.tmp', delete=False) as tmp_file:
+        np.save(tmp_file, table.astype('<f8'))
+    os.replace(tmp_file.name, path)
+    return np.load(path, mmap_mode='r')
+
+
+def table_file(field_file, is_3d=False):
+    """
+    Return the path of the stored `.npy` table of a result file, the offset
+    of its raw little-endian float64 buffer and its shape
+    """
+    load_table(field_file, is_3d)
+    path = table_path(field_file.name)
+    with open(path, 'rb') as npy_file:
+        version = np.lib.format.read_magic(npy_file)
+        if version == (1, 0):
+            shape, _, _ = np.lib.format.read_array_header_1_0(npy_file)
+        else:
+            shape, _, _ = np.lib.format.read_array_header_2_0(npy_file)
+        return path, npy_file.tell(), shape
+
+
+def discard(name):
+    """Remove the parsed table of a deleted stored file"""
+    try:
+        os.remove(table_path(name))
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,63 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import benchmark
+
+
+class Command(BaseCommand):
+    """Django command to run the micro-benchmarks of the installed apps"""
+    help = 'Run micro-benchmarks and compare them against stored baselines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('pattern', nargs='?', help='Only run benchmarks whose name contains this string')
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--number', type=int, default=1, help='Calls per timed repetition')
+        parser.add_argument(
+            '--baseline',
+            default=os.path.join(settings.BASE_DIR, '.benchmarks', 'baseline.json')
+        )
+        parser.add_argument('--save', action='store_true', help='Store the results as the new baseline')
+        parser.add_argument('--threshold', type=float, default=0.2, help='Allowed slowdown as a fraction of the baseline')
+
+    def handle(self, *args, **options):
+        benchmark.autodiscover()
+        benchmarks = benchmark.get_benchmarks(options['pattern'])
+        if not benchmarks:
+            raise CommandError('No benchmarks found')
+
+        results = []
+        for name, setup in benchmarks.items():
+            result = benchmark.run_benchmark(
+                name, setup,
+                warmup=options['warmup'],
+                repeat=options['repeat'],
+                number=options['number']
+            )
+            results.append(result)
+            self.stdout.write(
+                f'{name}: median {result["median"] * 1000:.3f} ms, '
+                f'min {result["min"] * 1000:.3f} ms, '
+                f'peak {result["peak_memory"] / 1024:.1f} KiB'
+            )
+
+        if options['save']:
+            benchmark.save_baseline(options['baseline'], results)
+            self.stdout.write(self.style.SUCCESS(f'Baseline saved to {options["baseline"]}'))
+            return
+
+        regressions = benchmark.find_regressions(
+            results,
+            benchmark.load_baseline(options['baseline']),
+            options['threshold']
+        )
+        for name, previous, current, change in regressions:
+            self.stderr.write(
+                f'{name}: {previous * 1000:.3f} ms -> {current * 1000:.3f} ms (+{change:.0%})'
+            )
+        if regressions:
+            raise CommandError(f'{len(regressions)} benchmark(s) regressed')
+
+        self.stdout.write(self.style.SUCCESS('No regressions'))
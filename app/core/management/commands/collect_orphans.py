@@ -0,0 +1,117 @@
+import os
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Artifact, Resultfile
+
+
+def scan_tree(root, referenced, cutoff, recursive=True):
+    """
+    Walk `root` with `os.scandir` and return the files it holds.
+
+    Returns the orphans older than `cutoff` as (path, size) pairs and the
+    hashes of the referenced paths that were found.
+    """
+    orphans, found = [], set()
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        stack.append(entry.path)
+                    continue
+                path_hash = hash(entry.path)
+                if path_hash in referenced:
+                    found.add(path_hash)
+                    continue
+                stat = entry.stat(follow_symlinks=False)
+                if stat.st_mtime < cutoff:
+                    orphans.append((entry.path, stat.st_size))
+
+    return orphans, found
+
+
+class Command(BaseCommand):
+    """
+    Django command to find files on the media volume no row references,
+    and rows whose file is missing.
+
+    The referenced paths are streamed from the database into a set of
+    hashes, the upload directories are walked in parallel.
+    """
+    help = 'Report or delete orphaned media files and report missing ones'
+
+    targets = (
+        (Resultfile, 'result_file', 'uploads/resultfiles'),
+        (Artifact, 'artifact', 'uploads/artifacts'),
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace', type=int, default=24 * 60 * 60,
+                            help='Ignore orphans modified within this many seconds')
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--delete', action='store_true', help='Delete the orphaned files')
+
+    def referenced_paths(self, model, field_name, storage):
+        """Yield the primary key and absolute path of every stored file"""
+        rows = model.objects.exclude(**{field_name: ''}).values_list('pk', field_name)
+        for pk, name in rows.iterator(chunk_size=2000):
+            yield pk, storage.path(name)
+
+    def handle(self, *args, **options):
+        storage = Resultfile._meta.get_field('result_file').storage
+        try:
+            media_root = storage.path('')
+        except NotImplementedError:
+            raise CommandError('The file storage is not on the local file system')
+
+        referenced = set()
+        for model, field_name, _ in self.targets:
+            referenced.update(
+                hash(path) for _, path in self.referenced_paths(model, field_name, storage)
+            )
+
+        cutoff = time.time() - options['grace']
+        orphans, found = [], set()
+
+        # Every directory below an upload directory is walked by a worker,
+        # files stored directly in it are checked right away
+        roots = []
+        for _, _, directory in self.targets:
+            directory = os.path.join(media_root, directory)
+            if not os.path.isdir(directory):
+                continue
+            with os.scandir(directory) as entries:
+                roots += [entry.path for entry in entries if entry.is_dir(follow_symlinks=False)]
+            top_orphans, top_found = scan_tree(directory, referenced, cutoff, recursive=False)
+            orphans += top_orphans
+            found |= top_found
+
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            scans = executor.map(lambda root: scan_tree(root, referenced, cutoff), roots)
+            for tree_orphans, tree_found in scans:
+                orphans += tree_orphans
+                found |= tree_found
+
+        freed = 0
+        for path, size in sorted(orphans):
+            self.stdout.write(f'orphan {os.path.relpath(path, media_root)} ({size} bytes)')
+            if options['delete']:
+                os.remove(path)
+            freed += size
+
+        missing = 0
+        for model, field_name, _ in self.targets:
+            for pk, path in self.referenced_paths(model, field_name, storage):
+                if hash(path) not in found and not os.path.exists(path):
+                    self.stdout.write(f'missing {model.__name__} {pk} {os.path.relpath(path, media_root)}')
+                    missing += 1
+
+        action = 'deleted' if options['delete'] else 'found'
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(orphans)} orphan(s) {action} ({freed} bytes), {missing} missing file(s)'
+        ))
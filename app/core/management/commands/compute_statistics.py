@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+
+from core.models import ChangeEvent, Resultfile, table_statistics
+
+
+class Command(BaseCommand):
+    """
+    Django command to compute the summary statistics and similarity
+    signatures of stored result files, for rows stored before they were
+    computed at upload. Rows are marked as summarized, so files that are no
+    result table are not read again on the next run, except with `--all`.
+    """
+    help = 'Compute the summary statistics and similarity signatures of resultfiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Recompute the statistics of every resultfile')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        resultfiles = Resultfile.objects.exclude(result_file='').order_by('pk')
+        if not options['all']:
+            resultfiles = resultfiles.filter(summarized=False)
+
+        computed = invalid = 0
+        last_pk = 0
+        while True:
+            batch = list(resultfiles.filter(pk__gt=last_pk).only('pk', 'result_file', 'is_3d')[:options['batch_size']])
+            if not batch:
+                break
+            for resultfile in batch:
+                statistics = table_statistics(resultfile.result_file, resultfile.is_3d)
+                Resultfile.objects.filter(pk=resultfile.pk).update(summarized=True, **statistics)
+                if statistics['bins'] is None:
+                    invalid += 1
+                computed += 1
+            ChangeEvent.record_many(
+                ChangeEvent.RESULTFILE,
+                [resultfile.pk for resultfile in batch],
+                ChangeEvent.UPDATED
+            )
+            last_pk = batch[-1].pk
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{computed} resultfile(s) summarized, {invalid} not holding a result table'
+        ))
@@ -0,0 +1,192 @@
+import hashlib
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.analysis import STATISTICS, signature, summarize
+from core.checksums import CHUNK_SIZE
+from core.models import (
+    ChangeEvent,
+    Experiment,
+    Measurement,
+    Nuwroversion,
+    Resultfile,
+    resultfile_file_path
+)
+from core.parsers import parse_table
+
+
+def copy_file(source_path, target_path):
+    """Copy a file and hash it in the same pass, return checksum and size"""
+    digest = hashlib.sha256()
+    size = 0
+    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+    with open(source_path, 'rb') as source, open(target_path, 'wb') as target:
+        while True:
+            chunk = source.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            target.write(chunk)
+            size += len(chunk)
+
+    return digest.hexdigest(), size
+
+
+def import_file(source_path, target_path, is_3d=False):
+    """
+    Copy a result file, return its checksum, size and the fields read from
+    its table: whether it is a 3D result, its summary statistics and its
+    similarity signature. Unless `is_3d` is given, a table is 3D only when
+    it has four columns, three columns are read as `x value error`.
+    """
+    checksum, size = copy_file(source_path, target_path)
+    try:
+        with open(target_path, 'rb') as target:
+            text = target.read().decode()
+        try:
+            table = parse_table(text, is_3d)
+        except ValueError:
+            if is_3d:
+                raise
+            table, is_3d = parse_table(text, is_3d=True), True
+    except ValueError:
+        return checksum, size, dict(dict.fromkeys(STATISTICS + ('signature',)), is_3d=is_3d)
+    return checksum, size, dict(
+        summarize(table, is_3d),
+        signature=signature(table, is_3d).tobytes(),
+        is_3d=is_3d
+    )
+
+
+def sorted_entries(path, is_dir):
+    """Return the directories or the files in `path` sorted by name"""
+    with os.scandir(path) as entries:
+        return sorted(
+            (entry for entry in entries if entry.is_dir() == is_dir),
+            key=lambda entry: entry.name
+        )
+
+
+def scan_results(root):
+    """Yield (experiment, measurement, nuwroversion, path) of every file below `root`"""
+    for experiment in sorted_entries(root, is_dir=True):
+        for measurement in sorted_entries(experiment.path, is_dir=True):
+            for nuwroversion in sorted_entries(measurement.path, is_dir=True):
+                for result in sorted_entries(nuwroversion.path, is_dir=False):
+                    yield experiment.name, measurement.name, nuwroversion.name, result.path
+
+
+class Command(BaseCommand):
+    """
+    Django command to import a tree of NuWro results laid out as
+    `<experiment>/<measurement>/<nuwroversion>/<file>`.
+
+    Missing experiments, measurements and nuwroversions are created. Files
+    are copied, hashed and summarized by a process pool and the
+    resultfiles inserted in batches. Files already imported under the same
+    names are skipped, so an import can be run again after an interruption.
+
+    Tables of four columns are imported as 3D results. A table of three
+    columns may be either, it is imported as a 1D result unless `--is-3d`
+    is given, which marks every file of the tree as 3D.
+    """
+    help = 'Import a directory tree of NuWro result files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('root', help='Directory laid out as experiment/measurement/nuwroversion/file')
+        parser.add_argument('--workers', type=int, default=os.cpu_count())
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--description', default='')
+        parser.add_argument('--is-3d', action='store_true', help='Import every file as a 3D result')
+
+    def get_lookups(self, model, names):
+        """Return the rows of `model` with the given names, creating missing ones"""
+        lookups = {}
+        for instance in model.objects.filter(name__in=names).order_by('-pk'):
+            lookups[instance.name] = instance
+        for name in sorted(set(names) - set(lookups)):
+            lookups[name] = model.objects.create(name=name)
+        return lookups
+
+    def handle(self, *args, **options):
+        root = options['root']
+        if not os.path.isdir(root):
+            raise CommandError(f'{root} is not a directory')
+
+        storage = Resultfile._meta.get_field('result_file').storage
+        try:
+            storage.path('')
+        except NotImplementedError:
+            raise CommandError('The file storage is not on the local file system')
+
+        results = list(scan_results(root))
+        experiments = self.get_lookups(Experiment, {r[0] for r in results})
+        measurements = self.get_lookups(Measurement, {r[1] for r in results})
+        nuwroversions = self.get_lookups(Nuwroversion, {r[2] for r in results})
+
+        existing = set(
+            Resultfile.objects.filter(
+                experiment__in=experiments.values(),
+                measurement__in=measurements.values(),
+                nuwroversion__in=nuwroversions.values()
+            ).values_list('experiment', 'measurement', 'nuwroversion', 'filename')
+        )
+
+        pending = []
+        for experiment, measurement, nuwroversion, path in results:
+            resultfile = Resultfile(
+                experiment=experiments[experiment],
+                measurement=measurements[measurement],
+                nuwroversion=nuwroversions[nuwroversion],
+                filename=os.path.basename(path),
+                description=options['description'],
+                is_3d=options['is_3d'],
+                summarized=True
+            )
+            key = (resultfile.experiment_id, resultfile.measurement_id,
+                   resultfile.nuwroversion_id, resultfile.filename)
+            if key in existing:
+                continue
+            existing.add(key)
+            resultfile.result_file.name = resultfile_file_path(resultfile, resultfile.filename)
+            resultfile.link = storage.url(resultfile.result_file.name)
+            pending.append((path, resultfile))
+
+        imported = 0
+        with ProcessPoolExecutor(max_workers=options['workers']) as executor:
+            for start in range(0, len(pending), options['batch_size']):
+                batch = pending[start:start + options['batch_size']]
+                imports = executor.map(
+                    import_file,
+                    [path for path, _ in batch],
+                    [storage.path(resultfile.result_file.name) for _, resultfile in batch],
+                    [resultfile.is_3d for _, resultfile in batch],
+                    chunksize=16
+                )
+                for (_, resultfile), (checksum, size, fields) in zip(batch, imports):
+                    resultfile.checksum, resultfile.size = checksum, size
+                    for name, value in fields.items():
+                        setattr(resultfile, name, value)
+
+                self.insert(batch)
+                imported += len(batch)
+                self.stdout.write(f'{imported}/{len(pending)} imported')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{imported} resultfile(s) imported, {len(results) - imported} already present'
+        ))
+
+    def insert(self, batch):
+        """Insert a batch of resultfiles and record them in the change feed"""
+        names = [resultfile.result_file.name for _, resultfile in batch]
+        with transaction.atomic():
+            Resultfile.objects.bulk_create([resultfile for _, resultfile in batch])
+            ChangeEvent.record_many(
+                ChangeEvent.RESULTFILE,
+                Resultfile.objects.filter(result_file__in=names).values_list('pk', flat=True),
+                ChangeEvent.CREATED
+            )
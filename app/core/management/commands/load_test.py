@@ -0,0 +1,104 @@
+import http.client
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+GUNICORN = [sys.executable, '-c', 'from gunicorn.app.wsgiapp import run; run()', 'app.wsgi:application']
+# The deployment before `gunicorn.conf.py`, a single synchronous worker
+BASELINE = ('--worker-class', 'sync', '--workers', '1', '--threads', '1')
+START_TIMEOUT = 30
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class Command(BaseCommand):
+    """
+    Django command to compare the concurrency of gunicorn configurations.
+
+    Serves the app with the previous single synchronous worker and with
+    each given configuration file in turn, sends the same concurrent load
+    to every one and reports throughput and latency. Each request looks
+    its token up in the database and is rejected, so no fixtures are
+    needed while the database is still queried. Run it against the
+    database of the deployment, worker settings only differ in how they
+    overlap waiting on it.
+    """
+    help = 'Compare the throughput of gunicorn configurations under concurrent load'
+
+    def add_arguments(self, parser):
+        parser.add_argument('configs', nargs='*', default=['gunicorn.conf.py'],
+                            help='Gunicorn configuration files to compare with the previous setup')
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--clients', type=int, default=32, help='Requests sent at once')
+        parser.add_argument('--path', default='/api/manager/resultfiles/')
+
+    def handle(self, *args, **options):
+        setups = [('sync worker (previous)', BASELINE)]
+        setups += [(config, ('-c', config)) for config in options['configs']]
+        for name, gunicorn_options in setups:
+            with tempfile.TemporaryFile() as log:
+                port = free_port()
+                server = subprocess.Popen(
+                    GUNICORN + [*gunicorn_options, '--bind', f'127.0.0.1:{port}'],
+                    cwd=settings.BASE_DIR,
+                    stdout=log,
+                    stderr=subprocess.STDOUT
+                )
+                try:
+                    self.wait_for_server(server, port, log)
+                    self.load(port, options)  # warm up
+                    elapsed, latencies = self.load(port, options)
+                finally:
+                    server.terminate()
+                    server.wait()
+
+            self.stdout.write(
+                f'{name}: {options["requests"] / elapsed:.0f} requests/s, '
+                f'latency median {statistics.median(latencies) * 1000:.1f} ms, '
+                f'95th percentile {sorted(latencies)[int(len(latencies) * 0.95)] * 1000:.1f} ms'
+            )
+
+    def wait_for_server(self, server, port, log):
+        deadline = time.monotonic() + START_TIMEOUT
+        while time.monotonic() < deadline and server.poll() is None:
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                return
+            except OSError:
+                time.sleep(0.1)
+        log.seek(0)
+        output = log.read().decode(errors='replace').strip().splitlines()
+        raise CommandError('gunicorn did not start' + (f': {output[0]}' if output else ''))
+
+    def load(self, port, options):
+        """Send the requests, return the elapsed seconds and the latency of each request"""
+        def request(_):
+            start = time.perf_counter()
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+            try:
+                connection.request('GET', options['path'], headers={'Authorization': 'Token load-test'})
+                response = connection.getresponse()
+                response.read()
+            finally:
+                connection.close()
+            if response.status >= 500:
+                raise CommandError(f'{options["path"]} answered {response.status}')
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(options['clients']) as executor:
+            latencies = list(executor.map(request, range(options['requests'])))
+        return time.perf_counter() - start, latencies
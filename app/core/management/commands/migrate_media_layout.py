@@ -0,0 +1,101 @@
+import os
+import re
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import Artifact, ChangeEvent, Resultfile
+
+
+UUID_NAME = re.compile(r'^([0-9a-f]{32})\.')
+
+
+class Command(BaseCommand):
+    """
+    Django command to move stored files into the sharded layout.
+
+    Files keep their random basename, so the target of every file is known
+    in advance and an interrupted run can simply be started again: rows
+    already in the new layout are skipped and files moved before a crash
+    are picked up at their new location.
+    """
+    help = 'Move resultfile and artifact files into the sharded media layout'
+
+    targets = (
+        (Resultfile, 'result_file', 'uploads/resultfiles', ChangeEvent.RESULTFILE),
+        (Artifact, 'artifact', 'uploads/artifacts', ChangeEvent.ARTIFACT),
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true', help='Only report the files to move')
+
+    def handle(self, *args, **options):
+        for model, field_name, directory, kind in self.targets:
+            moved = self.migrate_model(model, field_name, directory, kind, options)
+            self.stdout.write(f'{model.__name__}: {moved} file(s) moved')
+
+        self.stdout.write(self.style.SUCCESS('Media layout migrated'))
+
+    def target_name(self, name, directory):
+        """Return the sharded name of a stored file, None if already there"""
+        basename = name.split('/')[-1]
+        match = UUID_NAME.match(basename)
+        if not match:
+            return None
+        uuid = match.group(1)
+        target = '/'.join([directory, uuid[:2], uuid[2:4], basename])
+        return None if target == name else target
+
+    def move(self, storage, name, target):
+        """Move a stored file, renaming it in place on local storages"""
+        try:
+            source_path, target_path = storage.path(name), storage.path(target)
+        except NotImplementedError:
+            if not storage.exists(target):
+                with storage.open(name, 'rb') as source:
+                    storage.save(target, source)
+            storage.delete(name)
+            return
+
+        if os.path.exists(source_path):
+            os.makedirs(os.path.dirname(target_path), exist_ok=True)
+            os.replace(source_path, target_path)
+
+    def migrate_model(self, model, field_name, directory, kind, options):
+        storage = model._meta.get_field(field_name).storage
+        moved = 0
+        last_pk = 0
+
+        while True:
+            rows = list(
+                model.objects.filter(pk__gt=last_pk)
+                .order_by('pk')
+                .values_list('pk', field_name)[:options['batch_size']]
+            )
+            if not rows:
+                return moved
+            last_pk = rows[-1][0]
+
+            updates = []
+            for pk, name in rows:
+                target = self.target_name(name, directory) if name else None
+                if target is None:
+                    continue
+                if options['dry_run']:
+                    self.stdout.write(f'{name} -> {target}')
+                else:
+                    self.move(storage, name, target)
+                updates.append((pk, target))
+
+            if options['dry_run'] or not updates:
+                moved += len(updates)
+                continue
+
+            with transaction.atomic():
+                for pk, target in updates:
+                    model.objects.filter(pk=pk).update(
+                        **{field_name: target, 'link': storage.url(target)}
+                    )
+                ChangeEvent.record_many(kind, [pk for pk, _ in updates], ChangeEvent.UPDATED)
+            moved += len(updates)
@@ -0,0 +1,116 @@
+import json
+import os
+
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from core.checksums import Throttle, file_checksum
+from core.models import Artifact, ChangeEvent, Resultfile
+
+
+class Command(BaseCommand):
+    """
+    Django command to re-verify the checksums of stored files.
+
+    Files are hashed in chunks by a thread pool, optionally limited to a
+    maximum read rate. The last verified id of every model is written to
+    the state file after each batch, so an interrupted audit resumes where
+    it stopped. Rows stored without a checksum get one recorded. Files
+    that cannot be read are reported as errors without stopping the audit.
+    """
+    help = 'Verify stored files against their recorded checksum and size'
+
+    targets = (
+        (Resultfile, 'result_file'),
+        (Artifact, 'artifact'),
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--max-rate', type=float, default=0,
+                            help='Maximum read rate in MB/s, 0 for unlimited')
+        parser.add_argument('--state-file', help='File keeping the progress of the audit')
+        parser.add_argument('--restart', action='store_true', help='Ignore the progress in the state file')
+
+    def load_state(self, options):
+        if options['state_file'] and not options['restart'] and os.path.isfile(options['state_file']):
+            with open(options['state_file']) as state_file:
+                return json.load(state_file)
+        return {}
+
+    def save_state(self, options, state):
+        if not options['state_file']:
+            return
+        tmp_path = options['state_file'] + '.tmp'
+        with open(tmp_path, 'w') as state_file:
+            json.dump(state, state_file)
+        os.replace(tmp_path, options['state_file'])
+
+    def verify(self, storage, row, throttle):
+        """Hash a stored file and return the row with the outcome"""
+        pk, name, checksum, size = row
+        try:
+            with storage.open(name, 'rb') as stored_file:
+                actual = file_checksum(stored_file, throttle)
+        except Exception as error:
+            try:
+                exists = storage.exists(name)
+            except Exception:
+                exists = True
+            if exists:
+                return row, 'error', error
+            return row, 'missing', None
+
+        if not checksum:
+            return row, 'recorded', actual
+        if actual != (checksum, size):
+            return row, 'mismatch', actual
+        return row, 'ok', actual
+
+    def handle(self, *args, **options):
+        state = self.load_state(options)
+        throttle = Throttle(options['max_rate'] * 1024 * 1024)
+        counts = {'ok': 0, 'recorded': 0, 'mismatch': 0, 'missing': 0, 'error': 0}
+
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            for model, field_name in self.targets:
+                storage = model._meta.get_field(field_name).storage
+                last_pk = state.get(model.__name__, 0)
+
+                while True:
+                    rows = list(
+                        model.objects.filter(pk__gt=last_pk)
+                        .exclude(**{field_name: ''})
+                        .order_by('pk')
+                        .values_list('pk', field_name, 'checksum', 'size')[:options['batch_size']]
+                    )
+                    if not rows:
+                        break
+
+                    results = executor.map(lambda row: self.verify(storage, row, throttle), rows)
+                    for (pk, name, checksum, size), outcome, actual in results:
+                        counts[outcome] += 1
+                        if outcome == 'recorded':
+                            model.objects.filter(pk=pk).update(checksum=actual[0], size=actual[1])
+                            ChangeEvent.record(model.__name__.lower(), pk, ChangeEvent.UPDATED)
+                        elif outcome == 'missing':
+                            self.stdout.write(f'missing {model.__name__} {pk} {name}')
+                        elif outcome == 'error':
+                            self.stdout.write(f'error {model.__name__} {pk} {name}: {actual}')
+                        elif outcome == 'mismatch':
+                            self.stdout.write(
+                                f'mismatch {model.__name__} {pk} {name}: '
+                                f'expected {checksum} ({size} bytes), found {actual[0]} ({actual[1]} bytes)'
+                            )
+
+                    last_pk = rows[-1][0]
+                    state[model.__name__] = last_pk
+                    self.save_state(options, state)
+
+        style = self.style.ERROR if counts['mismatch'] or counts['missing'] or counts['error'] else self.style.SUCCESS
+        self.stdout.write(style(
+            f'{counts["ok"]} ok, {counts["recorded"]} recorded, '
+            f'{counts["mismatch"]} mismatched, {counts["missing"]} missing, {counts["error"]} unreadable'
+        ))
@@ -0,0 +1,144 @@
+import hashlib
+
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+MIN_LENGTH = 200
+# Compressed variants larger than this are not cached (memcached items are at most 1 MiB)
+MAX_CACHED_LENGTH = 1000 * 1000
+TIMEOUT = 24 * 60 * 60
+
+# Available encodings in order of preference
+COMPRESSORS = {}
+if brotli is not None:
+    COMPRESSORS['br'] = lambda data: brotli.compress(data, quality=9)
+if zstandard is not None:
+    COMPRESSORS['zstd'] = lambda data: zstandard.ZstdCompressor(level=10).compress(data)
+COMPRESSORS['gzip'] = compress_string
+
+
+def encoding_qualities(accept_encoding):
+    """Return the quality of every coding named in an `Accept-Encoding` header"""
+    qualities = {}
+    for item in accept_encoding.split(','):
+        coding, _, params = item.strip().partition(';')
+        if not coding.strip():
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[coding.strip().lower()] = quality
+    return qualities
+
+
+def negotiate_encoding(accept_encoding):
+    """Return the available encoding the client accepts most, None for identity"""
+    qualities = encoding_qualities(accept_encoding)
+    best, best_quality = None, 0.0
+    for encoding in COMPRESSORS:
+        quality = qualities.get(encoding, qualities.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def identity_acceptable(accept_encoding):
+    """Return whether the client accepts an unencoded body, refused by `identity;q=0` or `*;q=0`"""
+    qualities = encoding_qualities(accept_encoding)
+    return qualities.get('identity', qualities.get('*', 1.0)) > 0
+
+
+class CompressedJSONMiddleware:
+    """
+    Compress JSON responses with gzip, brotli or zstd, as negotiated
+    through `Accept-Encoding`.
+
+    Every JSON response gets an ETag hashed from its body, and conditional
+    requests for an unchanged body are answered with 304. The compressed
+    variants are cached by ETag and encoding, so identical payloads, such
+    as a list polled by many clients, are compressed only once. A variant
+    that is not smaller than the body is not served, unless the client
+    refuses `identity`, and a client refusing every available encoding is
+    answered with 406. Brotli and zstd are used when their packages are
+    installed.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (response.streaming or response.status_code != 200 or response.has_header('Content-Encoding')
+                or not response.get('Content-Type', '').startswith('application/json')):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        digest = hashlib.md5(response.content).hexdigest()
+        accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        encoding = negotiate_encoding(accept_encoding)
+        identity = identity_acceptable(accept_encoding)
+        if encoding is None and not identity:
+            not_acceptable = HttpResponse(status=406)
+            not_acceptable['Vary'] = response['Vary']
+            return not_acceptable
+
+        compressed = None
+        if encoding is not None and (len(response.content) >= MIN_LENGTH or not identity):
+            compressed = self.compress(response.content, digest, encoding, force=not identity)
+        if compressed is None:
+            encoding = None
+
+        # Every encoding is a different representation with its own tag
+        etag = f'"{digest}-{encoding}"' if encoding else f'"{digest}"'
+        if request.method in ('GET', 'HEAD'):
+            if_none_match = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+            if etag in if_none_match or '*' in if_none_match:
+                not_modified = HttpResponseNotModified()
+                not_modified['ETag'] = etag
+                not_modified['Vary'] = response['Vary']
+                return not_modified
+
+        response['ETag'] = etag
+        if encoding is None:
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        return response
+
+    def compress(self, content, digest, encoding, force=False):
+        """
+        Return `content` compressed with `encoding`, or None when that would
+        not make it smaller unless `force`. Variants that do not shrink are
+        not cached, only a marker that they are not worth compressing.
+        """
+        key = f'compressed:{digest}:{encoding}'
+        compressed = cache.get(key)
+        if compressed is None:
+            compressed = COMPRESSORS[encoding](content)
+            smaller = len(compressed) < len(content)
+            if len(compressed) <= MAX_CACHED_LENGTH:
+                cache.set(key, compressed if smaller else b'', TIMEOUT)
+            return compressed if smaller or force else None
+        if compressed:
+            return compressed
+        return COMPRESSORS[encoding](content) if force else None
@@ -0,0 +1,17 @@
+# Generated by Django 2.2.6 on 2026-10-19 16:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_auto_20261019_1600'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='artifact',
+            index=models.Index(fields=['resultfile', 'filename'], name='core_artifa_resultf_183f0d_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 2.2.6 on 2026-10-19 16:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_auto_20261019_1603'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='artifact',
+            name='checksum',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='artifact',
+            name='size',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='resultfile',
+            name='checksum',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='resultfile',
+            name='size',
+            field=models.BigIntegerField(null=True),
+        ),
+    ]
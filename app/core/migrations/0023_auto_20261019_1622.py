@@ -0,0 +1,43 @@
+# Generated by Django 2.2.6 on 2026-10-19 16:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_auto_20261019_1608'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resultfile',
+            name='bins',
+            field=models.PositiveIntegerField(db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='resultfile',
+            name='integral',
+            field=models.FloatField(db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='resultfile',
+            name='maximum',
+            field=models.FloatField(db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='resultfile',
+            name='mean',
+            field=models.FloatField(db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='resultfile',
+            name='x_max',
+            field=models.FloatField(db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='resultfile',
+            name='x_min',
+            field=models.FloatField(db_index=True, null=True),
+        ),
+    ]
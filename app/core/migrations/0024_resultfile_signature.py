@@ -0,0 +1,18 @@
+# Generated by Django 2.2.6 on 2026-10-19 16:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_auto_20261019_1622'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resultfile',
+            name='signature',
+            field=models.BinaryField(null=True),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 2.2.6 on 2026-10-19 16:33
+
+import core.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_resultfile_signature'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='artifact',
+            name='artifact',
+            field=models.FileField(db_index=True, upload_to=core.models.artifact_file_path),
+        ),
+        migrations.AlterField(
+            model_name='artifact',
+            name='checksum',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='resultfile',
+            name='checksum',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='resultfile',
+            name='result_file',
+            field=models.FileField(db_index=True, upload_to=core.models.resultfile_file_path),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 2.2.6 on 2026-10-19 16:36
+
+from django.db import migrations
+
+
+# Notifies the `core_changeevent` channel once per statement inserting into
+# the change feed, listened to by `manager.events.EventBroker`
+CREATE_TRIGGER = '''
+CREATE OR REPLACE FUNCTION core_changeevent_notify() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('core_changeevent', '');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER core_changeevent_notify
+    AFTER INSERT ON core_changeevent
+    FOR EACH STATEMENT EXECUTE PROCEDURE core_changeevent_notify();
+'''
+
+DROP_TRIGGER = '''
+DROP TRIGGER IF EXISTS core_changeevent_notify ON core_changeevent;
+DROP FUNCTION IF EXISTS core_changeevent_notify();
+'''
+
+
+def on_postgresql(sql):
+    """Return a migration function running `sql` on PostgreSQL only"""
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_stored_file_references'),
+    ]
+
+    operations = [
+        migrations.RunPython(on_postgresql(CREATE_TRIGGER), on_postgresql(DROP_TRIGGER)),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 2.2.6 on 2026-10-19 16:54
+
+from django.db import migrations, models
+
+
+def mark_summarized(apps, schema_editor):
+    """Mark the rows holding statistics and a signature, the others are left to `compute_statistics`"""
+    Resultfile = apps.get_model('core', 'Resultfile')
+    Resultfile.objects.filter(bins__isnull=False, signature__isnull=False).update(summarized=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0026_changeevent_notify'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resultfile',
+            name='summarized',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(mark_summarized, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,20 @@
 import os
 
+from datetime import timedelta
+
+from django.conf import settings
 from django.db import models
-from django.dispatch import receiver
+from django.db.models import Max
+from django.urls import reverse
+from django.dispatch import Signal, receiver
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
+from django.utils import timezone
 from uuid import uuid4
 
+from core import datastore
+from core.analysis import STATISTICS, signature, summarize
+from core.checksums import file_checksum
+
 
 def datafile_file_path(instance, filename):
     """Generate filepath for new Datafile file"""
@@ -19,33 +29,68 @@ def datafile_file_path(instance, filename):
     )
 
 
-def artifact_file_path(instance, filename):
-    """Generate filepath for new Artifact file"""
+def sharded_file_path(directory, filename):
+    """
+    Generate a unique filepath below `directory` for an uploaded file.
+
+    Files are spread over two levels of directories taken from their
+    random name, which keeps every directory small and the path
+    independent of any renameable attribute.
+    """
     ext = filename.split('.')[-1]
-    uuid = str(uuid4()).replace('-', '')
+    uuid = uuid4().hex
+
+    return os.path.join(directory, uuid[:2], uuid[2:4], '.'.join([uuid, ext]))
 
-    return os.path.join(
-        (f'uploads/artifacts'
-         f'/{instance.resultfile.experiment.name}'
-         f'/{instance.resultfile.measurement.name}'
-         f'/{instance.resultfile.nuwroversion.name}'
-         f'/{instance.resultfile.filename.split(".")[0]}'),
-        '.'.join([uuid, ext])
-        )
+
+def artifact_file_path(instance, filename):
+    """Generate filepath for new Artifact file"""
+    return sharded_file_path('uploads/artifacts', filename)
 
 
 def resultfile_file_path(instance, filename):
     """Generate filepath for a new Resultfile file"""
-    ext = filename.split('.')[-1]
-    uuid = str(uuid4()).replace('-', '')
+    return sharded_file_path('uploads/resultfiles', filename)
 
-    return os.path.join(
-        (f'uploads/resultfiles/'
-         f'{instance.experiment.name}'
-         f'/{instance.measurement.name}'
-         f'/{instance.nuwroversion.name}'),
-        '.'.join([uuid, ext])
-    )
+
+def commit_file(field_file):
+    """
+    Store a newly assigned file right away, the same way `FileField` does
+    it when the row is saved, so its final name and url are known before
+    the first write of the row.
+
+    Returns the checksum and size of the stored file, None when the file
+    was stored before.
+    """
+    if field_file and not field_file._committed:
+        checksum = file_checksum(field_file.file)
+        field_file.save(field_file.name, field_file.file, save=False)
+        return checksum
+    return None
+
+
+def stored_link(field_file, url_name, pk):
+    """
+    Return the link stored with the row of `field_file`: the url of the
+    file, or for storages redirecting downloads to presigned urls, which
+    expire, the download action `url_name` of the API. None until the row
+    has a primary key to name it.
+    """
+    if getattr(field_file.storage, 'redirect_downloads', False):
+        return reverse(url_name, args=[pk]) if pk else None
+    return field_file.url
+
+
+def table_statistics(field_file, is_3d=False):
+    """
+    Return the summary statistics and the similarity signature of a stored
+    result file, all None when it is missing or not a result table
+    """
+    try:
+        table = datastore.load_table(field_file, is_3d)
+    except (ValueError, OSError):
+        return dict.fromkeys(STATISTICS + ('signature',))
+    return dict(summarize(table, is_3d), signature=signature(table, is_3d).tobytes())
 
 
 class UserManager(BaseUserManager):
@@ -113,50 +158,241 @@ class Resultfile(models.Model):
     is_3d = models.BooleanField(default=False)
     description = models.TextField(blank=True)
     filename = models.CharField(max_length=255)
+    # Rows uploaded with the same content share the stored file
     result_file = models.FileField(
-        unique=True,
         null=False,
+        db_index=True,
         upload_to=resultfile_file_path
     )
     link = models.CharField(max_length=255, null=True)
     creation_date = models.DateTimeField(auto_now_add=True)
+    checksum = models.CharField(max_length=64, blank=True, db_index=True)
+    size = models.BigIntegerField(null=True)
+    # Summary statistics of the table, None when the file is no result table
+    bins = models.PositiveIntegerField(null=True, db_index=True)
+    x_min = models.FloatField(null=True, db_index=True)
+    x_max = models.FloatField(null=True, db_index=True)
+    integral = models.FloatField(null=True, db_index=True)
+    maximum = models.FloatField(null=True, db_index=True)
+    mean = models.FloatField(null=True, db_index=True)
+    # Shape of the table, see `core.analysis.signature`
+    signature = models.BinaryField(null=True, editable=False)
+    # Whether the statistics were computed, also for files that are no result table
+    summarized = models.BooleanField(default=False, editable=False)
 
     def __str__(self):
         if self.filename:
             return self.filename
         return self.result_file.name.split('/')[-1]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._summarized = (instance.__dict__.get('result_file'), instance.__dict__.get('is_3d'))
+        return instance
+
+    def save(self, *args, **kwargs):
+        """
+        Store the file first so `link` and the summary statistics are
+        written with the row itself, except for a link naming the row. The statistics are only computed again
+        when the file or its dimension changed since the row was loaded.
+        """
+        checksum = commit_file(self.result_file)
+        if checksum:
+            self.checksum, self.size = checksum
+        if self.result_file:
+            self.link = stored_link(self.result_file, 'manager:resultfile-download', self.pk)
+        summarized = (self.result_file.name, self.is_3d)
+        if checksum or summarized != getattr(self, '_summarized', None):
+            self.update_statistics()
+        super().save(*args, **kwargs)
+        self._summarized = summarized
+        if self.result_file and self.link is None:
+            self.link = stored_link(self.result_file, 'manager:resultfile-download', self.pk)
+            Resultfile.objects.filter(pk=self.pk).update(link=self.link)
+
+    def update_statistics(self):
+        """Set the summary statistics and the similarity signature of the stored file"""
+        statistics = dict.fromkeys(STATISTICS + ('signature',))
+        if self.result_file:
+            statistics = table_statistics(self.result_file, self.is_3d)
+        for name, value in statistics.items():
+            setattr(self, name, value)
+        self.summarized = True
+
 
 @receiver(models.signals.post_delete, sender=Resultfile)
 def auto_delete_resultfile(sender, instance, **kwargs):
     """
-    Deletes file from filesystem
+    Deletes file from storage
     when corresponding `Resultfile` object is deleted.
     """
-    if instance.result_file:
-        if os.path.isfile(instance.result_file.path):
-            os.remove(instance.result_file.path)
+    ChangeEvent.record(ChangeEvent.RESULTFILE, instance.pk, ChangeEvent.DELETED)
+    if instance.result_file and not file_in_use(instance.result_file.name):
+        instance.result_file.storage.delete(instance.result_file.name)
+        datastore.discard(instance.result_file.name)
 
 
 class Artifact(models.Model):
     resultfile = models.ForeignKey(Resultfile, on_delete=models.CASCADE, related_name='artifacts', blank=False)
     filename = models.CharField(max_length=255, blank=False)
-    artifact = models.FileField(null=False, upload_to=artifact_file_path, blank=False)
+    artifact = models.FileField(null=False, upload_to=artifact_file_path, blank=False, db_index=True)
     link = models.CharField(max_length=255, null=True)
     addition_date = models.DateTimeField(auto_now_add=True)
+    checksum = models.CharField(max_length=64, blank=True, db_index=True)
+    size = models.BigIntegerField(null=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['resultfile', 'filename'])]
 
     def __str__(self):
         if self.filename:
             return self.filename
         return self.file.name.split('/')[-1]
 
+    def save(self, *args, **kwargs):
+        """Store the file first so `link` is written with the row itself, unless it names the row"""
+        checksum = commit_file(self.artifact)
+        if checksum:
+            self.checksum, self.size = checksum
+        if self.artifact:
+            self.link = stored_link(self.artifact, 'manager:artifact-download', self.pk)
+        super().save(*args, **kwargs)
+        if self.artifact and self.link is None:
+            self.link = stored_link(self.artifact, 'manager:artifact-download', self.pk)
+            Artifact.objects.filter(pk=self.pk).update(link=self.link)
+
 
 @receiver(models.signals.post_delete, sender=Artifact)
 def auto_delete_artifact(sender, instance, **kwargs):
     """
-    Deletes file from filesystem
+    Deletes file from storage
     when corresponding `Artifact` object is deleted.
     """
-    if instance.artifact:
-        if os.path.isfile(instance.artifact.path):
-            os.remove(instance.artifact.path)
+    ChangeEvent.record(ChangeEvent.ARTIFACT, instance.pk, ChangeEvent.DELETED)
+    if instance.artifact and not file_in_use(instance.artifact.name):
+        instance.artifact.storage.delete(instance.artifact.name)
+
+
+def file_in_use(name):
+    """Return whether a resultfile or an artifact references the stored file `name`"""
+    return (
+        Resultfile.objects.filter(result_file=name).exists()
+        or Artifact.objects.filter(artifact=name).exists()
+    )
+
+
+class ChangeEvent(models.Model):
+    """
+    Entry of the change feed of resultfiles and artifacts.
+
+    The auto-incremented id is the cursor clients sync from, deletions are
+    kept as tombstones.
+    """
+    RESULTFILE = 'resultfile'
+    ARTIFACT = 'artifact'
+    KIND_CHOICES = (
+        (RESULTFILE, 'Resultfile'),
+        (ARTIFACT, 'Artifact'),
+    )
+    CREATED = 'created'
+    UPDATED = 'updated'
+    DELETED = 'deleted'
+    ACTION_CHOICES = (
+        (CREATED, 'Created'),
+        (UPDATED, 'Updated'),
+        (DELETED, 'Deleted'),
+    )
+
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    object_id = models.IntegerField()
+    action = models.CharField(max_length=16, choices=ACTION_CHOICES)
+    timestamp = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['kind', 'object_id'])]
+
+    def __str__(self):
+        return f'{self.kind} {self.object_id} {self.action}'
+
+    @classmethod
+    def visible(cls):
+        """
+        Return the entries recorded at least `CHANGE_FEED_DELAY` seconds ago.
+
+        Ids are taken at insert but rows only show up at commit, so an entry
+        with a lower id can appear after one with a higher id was read.
+        Readers following the feed by id only read below this horizon, and
+        skip no entry as long as transactions recording changes commit
+        within the delay.
+        """
+        horizon = timezone.now() - timedelta(seconds=settings.CHANGE_FEED_DELAY)
+        return cls.objects.filter(timestamp__lte=horizon)
+
+    @classmethod
+    def visible_cursor(cls):
+        """Return the id of the last visible entry, 0 for an empty feed"""
+        return cls.visible().aggregate(cursor=Max('id'))['cursor'] or 0
+
+    @classmethod
+    def record(cls, kind, object_id, action):
+        """Append a single change to the feed"""
+        event = cls.objects.create(kind=kind, object_id=object_id, action=action)
+        changes_recorded.send(sender=cls, kind=kind, object_ids=[object_id], action=action)
+        return event
+
+    @classmethod
+    def record_many(cls, kind, object_ids, action):
+        """Append the same change for many objects to the feed"""
+        object_ids = list(object_ids)
+        events = cls.objects.bulk_create(
+            cls(kind=kind, object_id=object_id, action=action)
+            for object_id in object_ids
+        )
+        changes_recorded.send(sender=cls, kind=kind, object_ids=object_ids, action=action)
+        return events
+
+
+# Sent whenever changes are appended to the feed, including bulk updates
+# that bypass the model signals
+changes_recorded = Signal(providing_args=['kind', 'object_ids', 'action'])
+
+
+@receiver(models.signals.post_save, sender=Resultfile)
+def record_resultfile_change(sender, instance, created, raw=False, **kwargs):
+    """Records the creation or update of a `Resultfile` in the change feed"""
+    if not raw:
+        ChangeEvent.record(
+            ChangeEvent.RESULTFILE,
+            instance.pk,
+            ChangeEvent.CREATED if created else ChangeEvent.UPDATED
+        )
+
+
+@receiver(models.signals.post_save, sender=Artifact)
+def record_artifact_change(sender, instance, created, raw=False, **kwargs):
+    """Records the creation or update of an `Artifact` in the change feed"""
+    if not raw:
+        ChangeEvent.record(
+            ChangeEvent.ARTIFACT,
+            instance.pk,
+            ChangeEvent.CREATED if created else ChangeEvent.UPDATED
+        )
+
+
+@receiver(models.signals.post_save, sender=Experiment)
+@receiver(models.signals.post_save, sender=Measurement)
+@receiver(models.signals.post_save, sender=Nuwroversion)
+def record_lookup_change(sender, instance, created, raw=False, **kwargs):
+    """
+    Records an update of every `Resultfile` showing a renamed
+    `Experiment`, `Measurement` or `Nuwroversion`.
+    """
+    if created or raw:
+        return
+    lookup = sender.__name__.lower()
+    ChangeEvent.record_many(
+        ChangeEvent.RESULTFILE,
+        Resultfile.objects.filter(**{lookup: instance}).values_list('pk', flat=True),
+        ChangeEvent.UPDATED
+    )
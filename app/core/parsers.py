@@ -0,0 +1,134 @@
+import codecs
+import math
+
+import numpy as np
+
+
+COMMENT = '#'
+MAX_LINE_LENGTH = 4096
+
+
+class ParseError(ValueError):
+    """Raised for files that are not NuWro result tables"""
+
+
+def expected_columns(is_3d):
+    """Return the column counts allowed in a 1D or 3D result table"""
+    return (3, 4) if is_3d else (2, 3)
+
+
+def columns_error(number, is_3d, found):
+    expected = (2, 3, 4) if is_3d is None else expected_columns(is_3d)
+    kind = '' if is_3d is None else f' for a {"3D" if is_3d else "1D"} result'
+    return ParseError(
+        f'Line {number}: expected {", ".join(map(str, expected[:-1]))} or {expected[-1]} '
+        f'columns{kind}, found {found}'
+    )
+
+
+def column_names(is_3d, width):
+    """Return the names of the columns of a parsed table"""
+    names = ('x', 'y', 'value', 'error') if is_3d else ('x', 'value', 'error')
+    return list(names[:width])
+
+
+def parse_table(text, is_3d=False):
+    """
+    Parse a NuWro result table into a float array with a row per bin.
+
+    Values are separated by whitespace or commas, `#` starts a comment.
+    1D results have the columns `x value [error]`, 3D results the columns
+    `x y value [error]`. Raises `ParseError` for anything else.
+    """
+    lines = []
+    for number, line in enumerate(text.splitlines(), 1):
+        line = line.split(COMMENT, 1)[0].replace(',', ' ').strip()
+        if line:
+            lines.append((number, line))
+    if not lines:
+        raise ParseError('The file holds no data')
+
+    width = len(lines[0][1].split())
+    if width not in expected_columns(is_3d):
+        raise columns_error(lines[0][0], is_3d, width)
+
+    tokens = ' '.join(line for _, line in lines).split()
+    if len(tokens) != width * len(lines):
+        number = next(number for number, line in lines if len(line.split()) != width)
+        raise ParseError(f'Line {number}: expected {width} columns')
+
+    try:
+        data = np.array(tokens, dtype=float).reshape(len(lines), width)
+    except ValueError:
+        number, line = next((n, l) for n, l in lines if not all(map(is_number, l.split())))
+        raise ParseError(f'Line {number}: {line!r} is not numeric')
+    if not np.isfinite(data).all():
+        raise ParseError('The file holds infinite or undefined values')
+    return data
+
+
+def is_number(token):
+    try:
+        float(token)
+    except ValueError:
+        return False
+    return True
+
+
+class TableValidator:
+    """
+    Validate a NuWro result table incrementally, from chunks of bytes.
+
+    Checks the same format as `parse_table` line by line without keeping
+    the table: `feed` raises `ParseError` at the first invalid line, so a
+    bad file is rejected before the rest of it is read. With `is_3d` left
+    to None both 1D and 3D tables are accepted, `width` tells them apart.
+    """
+
+    def __init__(self, is_3d=None):
+        self.is_3d = is_3d
+        self.widths = (2, 3, 4) if is_3d is None else expected_columns(is_3d)
+        self.width = None
+        self.rows = 0
+        self.line_number = 0
+        self.pending = ''
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+
+    def feed(self, data, final=False):
+        try:
+            text = self.pending + self.decoder.decode(data, final)
+        except UnicodeDecodeError:
+            raise ParseError(f'Line {self.line_number + 1}: the file is not UTF-8 text')
+        lines = text.split('\n')
+        self.pending = '' if final else lines.pop()
+        for line in lines:
+            self.check_line(line)
+        if len(self.pending) > MAX_LINE_LENGTH:
+            raise ParseError(f'Line {self.line_number + 1}: longer than {MAX_LINE_LENGTH} characters')
+
+    def close(self):
+        """Validate the end of the table, return its width"""
+        self.feed(b'', final=True)
+        if not self.rows:
+            raise ParseError('The file holds no data')
+        return self.width
+
+    def check_line(self, line):
+        self.line_number += 1
+        tokens = line.split(COMMENT, 1)[0].replace(',', ' ').split()
+        if not tokens:
+            return
+        if self.width is None:
+            if len(tokens) not in self.widths:
+                raise columns_error(self.line_number, self.is_3d, len(tokens))
+            self.width = len(tokens)
+        elif len(tokens) != self.width:
+            raise ParseError(f'Line {self.line_number}: expected {self.width} columns')
+
+        try:
+            values = [float(token) for token in tokens]
+        except ValueError:
+            raise ParseError(f'Line {self.line_number}: {line.strip()!r} is not numeric')
+        if not all(map(math.isfinite, values)):
+            raise ParseError(f'Line {self.line_number}: infinite or undefined value')
+        self.rows += 1
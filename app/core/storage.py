@@ -0,0 +1,160 @@
+
+from django.conf import settings
+from django.core import signing
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, Storage
+from django.urls import reverse
+from django.utils.deconstruct import deconstructible
+from django.utils.functional import cached_property
+
+
+TRANSFER_SALT = 'core.storage.transfer'
+UPLOAD_SALT = 'core.storage.upload'
+
+
+class DirectUploadsNotSupported(Exception):
+    """Raised when the configured storage cannot presign uploads"""
+
+
+@deconstructible
+class SignedFileSystemStorage(FileSystemStorage):
+    """
+    File system storage handing out presigned transfer urls.
+
+    The urls point at `core.views.SignedStorageView`, which stands in for
+    an S3 compatible server: clients transfer the file bytes with a plain
+    PUT or GET, while the API only records metadata.
+    """
+    redirect_downloads = False
+
+    def presigned_url(self, name, method, filename=None):
+        token = signing.dumps(
+            {'name': name, 'method': method, 'filename': filename},
+            salt=TRANSFER_SALT
+        )
+        return reverse('signed-storage', args=[token])
+
+    def presigned_upload_url(self, name):
+        return self.presigned_url(name, 'PUT')
+
+    def presigned_download_url(self, name, filename=None):
+        return self.presigned_url(name, 'GET', filename)
+
+
+@deconstructible
+class S3Storage(Storage):
+    """
+    Storage keeping files in a bucket of an S3 compatible server.
+
+    Downloads are redirected to presigned urls so the bytes never pass
+    through the application. Requires `boto3`.
+    """
+    redirect_downloads = True
+
+    def __init__(self, bucket_name=None, endpoint_url=None,
+                 access_key=None, secret_key=None, region_name=None):
+        self.bucket_name = bucket_name or settings.S3_BUCKET_NAME
+        self.endpoint_url = endpoint_url or settings.S3_ENDPOINT_URL
+        self.access_key = access_key or settings.S3_ACCESS_KEY
+        self.secret_key = secret_key or settings.S3_SECRET_KEY
+        self.region_name = region_name or settings.S3_REGION_NAME
+
+    @cached_property
+    def client(self):
+        import boto3
+        from botocore.client import Config
+
+        return boto3.client(
+            's3',
+            endpoint_url=self.endpoint_url,
+            aws_access_key_id=self.access_key,
+            aws_secret_access_key=self.secret_key,
+            region_name=self.region_name,
+            config=Config(signature_version='s3v4', s3={'addressing_style': 'path'})
+        )
+
+    def _head(self, name):
+        from botocore.exceptions import ClientError
+
+        try:
+            return self.client.head_object(Bucket=self.bucket_name, Key=name)
+        except ClientError as error:
+            if error.response['Error']['Code'] in ('404', 'NoSuchKey'):
+                return None
+            raise
+
+    def _open(self, name, mode='rb'):
+        response = self.client.get_object(Bucket=self.bucket_name, Key=name)
+        return File(response['Body'], name=name)
+
+    def _save(self, name, content):
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        self.client.upload_fileobj(content, self.bucket_name, name)
+        return name
+
+    def get_available_name(self, name, max_length=None):
+        # Upload paths embed a random uuid, checking for an existing object
+        # would only cost a request per upload
+        return name
+
+    def delete(self, name):
+        self.client.delete_object(Bucket=self.bucket_name, Key=name)
+
+    def exists(self, name):
+        return self._head(name) is not None
+
+    def size(self, name):
+        return self._head(name)['ContentLength']
+
+    def url(self, name):
+        # The bucket is private, an unsigned url would be refused
+        return self.presigned_download_url(name)
+
+    def presigned_upload_url(self, name):
+        return self.client.generate_presigned_url(
+            'put_object',
+            Params={'Bucket': self.bucket_name, 'Key': name},
+            ExpiresIn=settings.FILE_STORAGE_URL_EXPIRY
+        )
+
+    def presigned_download_url(self, name, filename=None):
+        params = {'Bucket': self.bucket_name, 'Key': name}
+        if filename:
+            params['ResponseContentDisposition'] = f'attachment; filename="{filename}"'
+        return self.client.generate_presigned_url(
+            'get_object',
+            Params=params,
+            ExpiresIn=settings.FILE_STORAGE_URL_EXPIRY
+        )
+
+
+def presign_upload(instance, field_name, filename):
+    """
+    Reserve a storage name for a direct upload of `filename` into the file
+    field `field_name` of `instance`.
+
+    Returns the presigned url the client uploads to and a signed token it
+    hands back to the API to register the uploaded file.
+    """
+    field = instance._meta.get_field(field_name)
+    if not hasattr(field.storage, 'presigned_upload_url'):
+        raise DirectUploadsNotSupported()
+
+    name = field.generate_filename(instance, filename)
+    return {
+        'url': field.storage.presigned_upload_url(name),
+        'method': 'PUT',
+        'upload_token': signing.dumps({'name': name, 'filename': filename}, salt=UPLOAD_SALT),
+        'expires_in': settings.FILE_STORAGE_URL_EXPIRY,
+    }
+
+
+def resolve_upload_token(token):
+    """
+    Return the storage name and original filename of a token issued by
+    `presign_upload`. Raises `signing.BadSignature` for invalid or expired
+    tokens.
+    """
+    data = signing.loads(token, salt=UPLOAD_SALT, max_age=settings.FILE_STORAGE_URL_EXPIRY)
+    return data['name'], data['filename']
@@ -0,0 +1,65 @@
+import os
+import tempfile
+
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from core import benchmark
+
+
+def sample_result(name='sample', best=0.01):
+    """Return a benchmark result with the given fastest timing"""
+    return {'name': name, 'min': best, 'median': best, 'mean': best, 'stdev': 0.0, 'peak_memory': 0}
+
+
+class BenchmarkTests(TestCase):
+
+    def test_run_benchmark_collects_statistics(self):
+        """Test running a benchmark returns timings and peak memory"""
+        calls = []
+
+        def setup():
+            return lambda: calls.append([0] * 1000)
+
+        result = benchmark.run_benchmark('sample', setup, warmup=2, repeat=3)
+
+        self.assertEqual(len(calls), 2 + 3 + 1)
+        self.assertLessEqual(result['min'], result['median'])
+        self.assertGreater(result['peak_memory'], 0)
+
+    def test_find_regressions_above_threshold(self):
+        """Test only slowdowns beyond the threshold are reported"""
+        baseline = {
+            'fast': sample_result('fast', 0.010),
+            'slow': sample_result('slow', 0.010),
+        }
+        results = [sample_result('fast', 0.011), sample_result('slow', 0.015)]
+
+        regressions = benchmark.find_regressions(results, baseline, 0.2)
+
+        self.assertEqual([r[0] for r in regressions], ['slow'])
+
+    def test_find_regressions_ignores_new_benchmarks(self):
+        """Test benchmarks missing from the baseline are not regressions"""
+        regressions = benchmark.find_regressions([sample_result()], {}, 0.2)
+        self.assertEqual(regressions, [])
+
+    def test_benchmark_command_saves_and_checks_baseline(self):
+        """Test the command stores a baseline and fails on regressions"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'baseline.json')
+            options = {'baseline': path, 'warmup': 0, 'repeat': 1, 'stdout': StringIO()}
+
+            call_command('benchmark', 'file_path', save=True, **options)
+            baseline = benchmark.load_baseline(path)
+            self.assertIn('core.resultfile_file_path', baseline)
+
+            for result in baseline.values():
+                result['min'] = 1e-9
+            benchmark.save_baseline(path, baseline.values())
+
+            with self.assertRaises(CommandError):
+                call_command('benchmark', 'file_path', stderr=StringIO(), **options)
@@ -1,9 +1,36 @@
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+from io import StringIO
 from unittest.mock import patch
 
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.db.utils import OperationalError
 from django.test import TestCase
 
+from core.models import Artifact, ChangeEvent, Experiment, Nuwroversion, Resultfile
+from core.tests.test_models import sample_resultfile
+
+
+def move_to_legacy_layout(resultfile):
+    """Store the file of `resultfile` under the name based layout"""
+    storage = resultfile.result_file.storage
+    basename = resultfile.result_file.name.split('/')[-1]
+    legacy_name = f'uploads/resultfiles/MINERvA/CC0pi/v1.0/{basename}'
+
+    storage.save(legacy_name, ContentFile(b'1 2\n'))
+    storage.delete(resultfile.result_file.name)
+    Resultfile.objects.filter(pk=resultfile.pk).update(result_file=legacy_name)
+
+    return legacy_name
+
 
 class CommandTests(TestCase):
 
@@ -21,3 +48,323 @@ class CommandTests(TestCase):
             gi.side_effect = [OperationalError] * 5 + [True]
             call_command('wait_for_db')
             self.assertEqual(gi.call_count, 6)
+
+
+class MigrateMediaLayoutCommandTests(TestCase):
+
+    def test_files_moved_to_sharded_layout(self):
+        """Test files of the name based layout are moved and relinked"""
+        resultfile = sample_resultfile()
+        storage = resultfile.result_file.storage
+        legacy_name = move_to_legacy_layout(resultfile)
+
+        call_command('migrate_media_layout', stdout=StringIO())
+
+        resultfile.refresh_from_db()
+        name = resultfile.result_file.name
+        self.addCleanup(storage.delete, name)
+        basename = name.split('/')[-1]
+        self.assertEqual(name, f'uploads/resultfiles/{basename[:2]}/{basename[2:4]}/{basename}')
+        self.assertEqual(resultfile.link, storage.url(name))
+        self.assertEqual(storage.open(name).read(), b'1 2\n')
+        self.assertFalse(storage.exists(legacy_name))
+
+    def test_migration_resumes_after_interruption(self):
+        """Test a file moved before an interruption is relinked on rerun"""
+        resultfile = sample_resultfile()
+        storage = resultfile.result_file.storage
+        name = resultfile.result_file.name
+        self.addCleanup(storage.delete, name)
+        Resultfile.objects.filter(pk=resultfile.pk).update(
+            result_file=f'uploads/resultfiles/MINERvA/CC0pi/v1.0/{name.split("/")[-1]}'
+        )
+
+        call_command('migrate_media_layout', stdout=StringIO())
+
+        resultfile.refresh_from_db()
+        self.assertEqual(resultfile.result_file.name, name)
+        self.assertTrue(storage.exists(name))
+
+    def test_dry_run_keeps_files(self):
+        """Test a dry run only reports the files to move"""
+        resultfile = sample_resultfile()
+        storage = resultfile.result_file.storage
+        legacy_name = move_to_legacy_layout(resultfile)
+        self.addCleanup(storage.delete, legacy_name)
+        out = StringIO()
+
+        call_command('migrate_media_layout', dry_run=True, stdout=out)
+
+        resultfile.refresh_from_db()
+        self.assertEqual(resultfile.result_file.name, legacy_name)
+        self.assertIn(legacy_name, out.getvalue())
+
+
+class CollectOrphansCommandTests(TestCase):
+
+    def setUp(self):
+        self.resultfile = sample_resultfile()
+        self.storage = self.resultfile.result_file.storage
+        self.addCleanup(self.storage.delete, self.resultfile.result_file.name)
+
+    def create_orphan(self, name, age):
+        """Store a file no row references, modified `age` seconds ago"""
+        name = self.storage.save(name, ContentFile(b'orphan'))
+        self.addCleanup(self.storage.delete, name)
+        mtime = time.time() - age
+        os.utime(self.storage.path(name), (mtime, mtime))
+        return name
+
+    def test_orphans_older_than_grace_reported(self):
+        """Test only orphans older than the grace period are reported"""
+        old = self.create_orphan('uploads/resultfiles/aa/bb/old.txt', age=3600)
+        recent = self.create_orphan('uploads/artifacts/cc/dd/recent.txt', age=0)
+        out = StringIO()
+
+        call_command('collect_orphans', grace=60, stdout=out)
+
+        self.assertIn(f'orphan {old}', out.getvalue())
+        self.assertNotIn(recent, out.getvalue())
+        self.assertNotIn(self.resultfile.result_file.name, out.getvalue())
+        self.assertTrue(self.storage.exists(old))
+
+    def test_orphans_deleted(self):
+        """Test orphans are removed with the delete option"""
+        old = self.create_orphan('uploads/artifacts/aa/bb/old.txt', age=3600)
+
+        call_command('collect_orphans', grace=60, delete=True, stdout=StringIO())
+
+        self.assertFalse(self.storage.exists(old))
+        self.assertTrue(self.storage.exists(self.resultfile.result_file.name))
+
+    def test_missing_files_reported(self):
+        """Test rows pointing at missing files are reported"""
+        other = sample_resultfile(experiment='T2K')
+        self.storage.delete(other.result_file.name)
+        out = StringIO()
+
+        call_command('collect_orphans', stdout=out)
+
+        self.assertIn(f'missing Resultfile {other.pk} {other.result_file.name}', out.getvalue())
+        self.assertNotIn(f'missing Resultfile {self.resultfile.pk} ', out.getvalue())
+
+
+class VerifyChecksumsCommandTests(TestCase):
+
+    def sample_stored_resultfile(self, content=b'1 2\n'):
+        """Create a resultfile whose stored file holds `content`"""
+        resultfile = sample_resultfile()
+        storage = resultfile.result_file.storage
+        name = storage.save('uploads/resultfiles/aa/bb/verify.txt', ContentFile(content))
+        self.addCleanup(storage.delete, name)
+        Resultfile.objects.filter(pk=resultfile.pk).update(
+            result_file=name,
+            checksum=hashlib.sha256(content).hexdigest(),
+            size=len(content)
+        )
+        resultfile.refresh_from_db()
+        return resultfile
+
+    def test_intact_files_verified(self):
+        """Test files matching their checksum are reported as ok"""
+        self.sample_stored_resultfile()
+        out = StringIO()
+
+        call_command('verify_checksums', stdout=out)
+
+        self.assertIn('1 ok', out.getvalue())
+        self.assertIn('0 mismatched', out.getvalue())
+
+    def test_corrupted_file_reported(self):
+        """Test a file changed after upload is reported"""
+        resultfile = self.sample_stored_resultfile()
+        with open(resultfile.result_file.path, 'wb') as stored_file:
+            stored_file.write(b'1 3\n')
+        out = StringIO()
+
+        call_command('verify_checksums', stdout=out)
+
+        self.assertIn(f'mismatch Resultfile {resultfile.pk}', out.getvalue())
+
+    def test_unreadable_file_reported(self):
+        """Test a file that cannot be read is reported and the audit goes on"""
+        broken = self.sample_stored_resultfile()
+        other = sample_resultfile(experiment='T2K', content='1 2\n')
+        self.addCleanup(other.result_file.delete, save=False)
+        original_open = FileSystemStorage.open
+
+        def storage_open(storage, name, mode='rb'):
+            if name == broken.result_file.name:
+                raise PermissionError('Permission denied')
+            return original_open(storage, name, mode)
+        out = StringIO()
+
+        with patch.object(FileSystemStorage, 'open', autospec=True, side_effect=storage_open):
+            call_command('verify_checksums', stdout=out)
+
+        self.assertIn(f'error Resultfile {broken.pk}', out.getvalue())
+        self.assertIn('Permission denied', out.getvalue())
+        self.assertIn('1 ok', out.getvalue())
+        self.assertIn('1 unreadable', out.getvalue())
+
+    def test_missing_checksum_recorded(self):
+        """Test files stored without a checksum get one recorded"""
+        resultfile = self.sample_stored_resultfile()
+        Resultfile.objects.filter(pk=resultfile.pk).update(checksum='', size=None)
+
+        call_command('verify_checksums', stdout=StringIO())
+
+        resultfile.refresh_from_db()
+        self.assertEqual(resultfile.checksum, hashlib.sha256(b'1 2\n').hexdigest())
+        self.assertEqual(resultfile.size, 4)
+
+    def test_audit_resumes_from_state_file(self):
+        """Test rows verified by a previous run are skipped"""
+        resultfile = self.sample_stored_resultfile()
+        Artifact.objects.create(resultfile=resultfile, filename='a.txt', artifact=resultfile.result_file.name)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            state_path = os.path.join(tmp_dir, 'state.json')
+            with open(state_path, 'w') as state_file:
+                json.dump({'Resultfile': resultfile.pk}, state_file)
+            out = StringIO()
+
+            call_command('verify_checksums', state_file=state_path, stdout=out)
+
+            self.assertIn('0 ok, 1 recorded', out.getvalue())
+            with open(state_path) as state_file:
+                self.assertEqual(json.load(state_file)['Artifact'], Artifact.objects.get().pk)
+
+
+class ImportResultsCommandTests(TestCase):
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.root = tmp_dir.name
+        for version in ('v1.0', 'v2.0'):
+            directory = os.path.join(self.root, 'MINERvA', 'CC0pi', version)
+            os.makedirs(directory)
+            for filename in ('a.txt', 'b.txt'):
+                with open(os.path.join(directory, filename), 'w') as result:
+                    result.write(f'{version} {filename}\n')
+
+    def tearDown(self):
+        for resultfile in Resultfile.objects.all():
+            resultfile.result_file.storage.delete(resultfile.result_file.name)
+
+    def test_import_results_tree(self):
+        """Test a tree of results is imported with its lookups"""
+        Experiment.objects.create(name='MINERvA')
+
+        call_command('import_results', self.root, workers=2, batch_size=3, stdout=StringIO())
+
+        self.assertEqual(Experiment.objects.count(), 1)
+        self.assertEqual(
+            sorted(Nuwroversion.objects.values_list('name', flat=True)),
+            ['v1.0', 'v2.0']
+        )
+        resultfile = Resultfile.objects.get(nuwroversion__name='v2.0', filename='b.txt')
+        content = b'v2.0 b.txt\n'
+        self.assertEqual(resultfile.result_file.read(), content)
+        self.assertEqual(resultfile.checksum, hashlib.sha256(content).hexdigest())
+        self.assertEqual(resultfile.size, len(content))
+        self.assertEqual(resultfile.link, resultfile.result_file.url)
+        self.assertEqual(
+            ChangeEvent.objects.filter(kind=ChangeEvent.RESULTFILE, action=ChangeEvent.CREATED).count(),
+            4
+        )
+
+    def test_import_results_idempotent(self):
+        """Test importing the same tree again creates nothing"""
+        call_command('import_results', self.root, workers=1, stdout=StringIO())
+        out = StringIO()
+
+        call_command('import_results', self.root, workers=1, stdout=out)
+
+        self.assertEqual(Resultfile.objects.count(), 4)
+        self.assertIn('0 resultfile(s) imported, 4 already present', out.getvalue())
+
+    def test_import_results_statistics(self):
+        """Test imported tables get their summary statistics"""
+        directory = os.path.join(self.root, 'T2K', 'CC0pi', 'v1.0')
+        os.makedirs(directory)
+        with open(os.path.join(directory, 'table.txt'), 'w') as result:
+            result.write('0 1\n1 3\n')
+
+        call_command('import_results', self.root, workers=1, stdout=StringIO())
+
+        self.assertEqual(Resultfile.objects.get(filename='table.txt').maximum, 3)
+        self.assertIsNone(Resultfile.objects.get(nuwroversion__name='v2.0', filename='a.txt').bins)
+
+    def write_3d_tables(self):
+        directory = os.path.join(self.root, 'T2K', 'CC0pi', 'v1.0')
+        os.makedirs(directory)
+        with open(os.path.join(directory, 'errors.txt'), 'w') as result:
+            result.write('0 0 1 0.1\n0 1 2 0.1\n1 0 3 0.1\n1 1 4 0.1\n')
+        with open(os.path.join(directory, 'values.txt'), 'w') as result:
+            result.write('0 0 1\n0 1 2\n1 0 3\n1 1 4\n')
+
+    def test_import_results_detects_3d(self):
+        """Test tables of four columns are imported as 3D, three as 1D"""
+        self.write_3d_tables()
+
+        call_command('import_results', self.root, workers=1, stdout=StringIO())
+
+        resultfile = Resultfile.objects.get(filename='errors.txt')
+        self.assertTrue(resultfile.is_3d)
+        self.assertEqual(resultfile.maximum, 4)
+        self.assertFalse(Resultfile.objects.get(filename='values.txt').is_3d)
+
+    def test_import_results_is_3d(self):
+        """Test every file is imported as 3D with --is-3d"""
+        self.write_3d_tables()
+
+        call_command('import_results', self.root, workers=1, is_3d=True, stdout=StringIO())
+
+        resultfile = Resultfile.objects.get(filename='values.txt')
+        self.assertTrue(resultfile.is_3d)
+        self.assertEqual(resultfile.bins, 4)
+        self.assertTrue(Resultfile.objects.get(nuwroversion__name='v2.0', filename='a.txt').is_3d)
+
+
+class ComputeStatisticsCommandTests(TestCase):
+
+    def test_compute_missing_statistics(self):
+        """Test rows without statistics are summarized and recorded as changed"""
+        resultfile = sample_resultfile(content='0 1\n1 3\n')
+        Resultfile.objects.filter(pk=resultfile.pk).update(bins=None, maximum=None, summarized=False)
+        out = StringIO()
+
+        call_command('compute_statistics', stdout=out)
+
+        resultfile.refresh_from_db()
+        self.assertEqual(resultfile.bins, 2)
+        self.assertEqual(resultfile.maximum, 3)
+        self.assertTrue(ChangeEvent.objects.filter(object_id=resultfile.pk, action=ChangeEvent.UPDATED).exists())
+        self.assertIn('1 resultfile(s) summarized, 0 not holding a result table', out.getvalue())
+
+    def test_non_tables_read_once(self):
+        """Test files that are no result table are not read again on the next run"""
+        resultfile = sample_resultfile(content='not a table\n')
+        Resultfile.objects.filter(pk=resultfile.pk).update(summarized=False)
+        call_command('compute_statistics', stdout=StringIO())
+        out = StringIO()
+
+        with patch('core.management.commands.compute_statistics.table_statistics') as table_statistics:
+            call_command('compute_statistics', stdout=out)
+
+        table_statistics.assert_not_called()
+        self.assertTrue(Resultfile.objects.get(pk=resultfile.pk).summarized)
+        self.assertIn('0 resultfile(s) summarized', out.getvalue())
+
+
+class LoadTestCommandTests(TestCase):
+
+    def test_gunicorn_not_starting(self):
+        """Test a server that cannot start is reported with its error"""
+        gunicorn = [sys.executable, '-c', 'import sys; print("Error: no such worker"); sys.exit(1)']
+
+        with patch('core.management.commands.load_test.GUNICORN', gunicorn):
+            with self.assertRaisesRegex(CommandError, 'gunicorn did not start: Error: no such worker'):
+                call_command('load_test', stdout=StringIO())
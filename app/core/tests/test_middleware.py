@@ -0,0 +1,147 @@
+import gzip
+import json
+
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+
+from core import middleware
+from core.middleware import CompressedJSONMiddleware, identity_acceptable, negotiate_encoding
+
+
+PAYLOAD = json.dumps([{'id': i, 'filename': f'file{i}.txt'} for i in range(100)]).encode()
+
+
+def json_view(request):
+    return HttpResponse(PAYLOAD, content_type='application/json')
+
+
+class CompressedJSONMiddlewareTests(TestCase):
+    """Test the compression of JSON responses"""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.middleware = CompressedJSONMiddleware(json_view)
+
+    def get(self, **headers):
+        return self.middleware(self.factory.get('/', **headers))
+
+    def test_negotiate_encoding(self):
+        """Test the accepted encoding with the highest quality is chosen"""
+        self.assertEqual(negotiate_encoding('gzip, deflate'), 'gzip')
+        self.assertEqual(negotiate_encoding('gzip;q=1.0, identity; q=0.5, *;q=0'), 'gzip')
+        self.assertIsNone(negotiate_encoding('gzip;q=0'))
+        self.assertIsNone(negotiate_encoding('deflate'))
+        self.assertIsNone(negotiate_encoding(''))
+
+    def test_identity_acceptable(self):
+        """Test identity is refused only with a zero quality"""
+        self.assertTrue(identity_acceptable(''))
+        self.assertTrue(identity_acceptable('gzip, *;q=0, identity'))
+        self.assertFalse(identity_acceptable('gzip, identity;q=0'))
+        self.assertFalse(identity_acceptable('gzip, *;q=0'))
+
+    def test_gzip(self):
+        """Test JSON is compressed with gzip when accepted"""
+        res = self.get(HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertEqual(res['Vary'], 'Accept-Encoding')
+        self.assertEqual(int(res['Content-Length']), len(res.content))
+        self.assertEqual(gzip.decompress(res.content), PAYLOAD)
+
+    @skipUnless(middleware.brotli, 'brotli is not installed')
+    def test_brotli_preferred(self):
+        """Test brotli is preferred when the client accepts it"""
+        res = self.get(HTTP_ACCEPT_ENCODING='gzip, deflate, br')
+
+        self.assertEqual(res['Content-Encoding'], 'br')
+        self.assertEqual(middleware.brotli.decompress(res.content), PAYLOAD)
+
+    @skipUnless(middleware.zstandard, 'zstandard is not installed')
+    def test_zstd(self):
+        """Test zstd is used when the client only accepts it"""
+        res = self.get(HTTP_ACCEPT_ENCODING='zstd')
+
+        self.assertEqual(res['Content-Encoding'], 'zstd')
+        decompressor = middleware.zstandard.ZstdDecompressor()
+        self.assertEqual(decompressor.decompress(res.content), PAYLOAD)
+
+    def test_identity(self):
+        """Test the body is unchanged without an accepted encoding"""
+        res = self.get()
+
+        self.assertFalse(res.has_header('Content-Encoding'))
+        self.assertEqual(res.content, PAYLOAD)
+        self.assertTrue(res.has_header('ETag'))
+
+    def test_compressed_once(self):
+        """Test identical payloads reuse the cached compressed variant"""
+        first = self.get(HTTP_ACCEPT_ENCODING='gzip')
+        with patch.dict(middleware.COMPRESSORS, {'gzip': None}):
+            second = self.get(HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(second.content, first.content)
+
+    def test_not_modified(self):
+        """Test an unchanged body is answered with 304"""
+        etag = self.get(HTTP_ACCEPT_ENCODING='gzip')['ETag']
+
+        res = self.get(HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res['ETag'], etag)
+        self.assertEqual(res.content, b'')
+
+    def test_encodings_have_own_etag(self):
+        """Test the identity and the compressed variant differ in ETag"""
+        etag = self.get()['ETag']
+
+        res = self.get(HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_other_responses_untouched(self):
+        """Test small and non JSON responses are not compressed"""
+        small = CompressedJSONMiddleware(
+            lambda request: HttpResponse(b'{}', content_type='application/json')
+        )(self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip'))
+        text = CompressedJSONMiddleware(
+            lambda request: HttpResponse(b'x' * 1000, content_type='text/plain')
+        )(self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip'))
+
+        self.assertEqual(small.content, b'{}')
+        self.assertFalse(text.has_header('Content-Encoding'))
+        self.assertFalse(text.has_header('ETag'))
+
+    def test_not_smaller_served_plain(self):
+        """Test a variant that does not shrink the body is neither served nor cached"""
+        payload = bytes(range(256)) * 2
+        view = CompressedJSONMiddleware(lambda request: HttpResponse(payload, content_type='application/json'))
+        with patch.dict(middleware.COMPRESSORS, {'gzip': lambda data: data + b'!'}):
+            first = view(self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip'))
+            second = view(self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip'))
+
+        for res in (first, second):
+            self.assertFalse(res.has_header('Content-Encoding'))
+            self.assertEqual(res.content, payload)
+            self.assertNotIn('gzip', res['ETag'])
+
+    def test_identity_refused(self):
+        """Test a small body is compressed when the client refuses identity"""
+        view = CompressedJSONMiddleware(lambda request: HttpResponse(b'{}', content_type='application/json'))
+
+        res = view(self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip, identity;q=0'))
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(res.content), b'{}')
+
+    def test_not_acceptable(self):
+        """Test a client refusing identity and every available encoding gets 406"""
+        res = self.get(HTTP_ACCEPT_ENCODING='deflate, *;q=0')
+
+        self.assertEqual(res.status_code, 406)
+        self.assertEqual(res['Vary'], 'Accept-Encoding')
@@ -1,9 +1,12 @@
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from django.core.files import File
-from unittest.mock import MagicMock
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from unittest.mock import MagicMock, patch
 
 from core import models
+from core.storage import SignedFileSystemStorage
 
 
 def sample_artifact(resultfile, filename='art1.txt'):
@@ -22,19 +25,24 @@ def sample_artifact(resultfile, filename='art1.txt'):
 def sample_resultfile(experiment='MINERvA',
                       measurement='CC0pi',
                       nuwroversion='v1.0',
-                      filename='res.txt'):
-    """Create and return sample resultfile"""
-    file_mock = MagicMock(spec=File)
-    file_mock.name = filename
+                      filename='res.txt',
+                      content=None,
+                      is_3d=False):
+    """Create and return sample resultfile, holding `content` if given"""
+    if content is None:
+        result_file = MagicMock(spec=File)
+        result_file.name = filename
+    else:
+        result_file = SimpleUploadedFile(filename, content.encode())
 
     defaults = {
         'experiment': models.Experiment.objects.create(name=experiment),
         'measurement': models.Measurement.objects.create(name=measurement),
         'nuwroversion': models.Nuwroversion.objects.create(name=nuwroversion),
-        'is_3d': False,
+        'is_3d': is_3d,
         'description': 'Some random description',
-        'filename': file_mock.name,
-        'result_file': file_mock
+        'filename': filename,
+        'result_file': result_file
     }
     return models.Resultfile.objects.create(**defaults)
 
@@ -133,3 +141,79 @@ class ModelTests(TestCase):
             str(resultfile),
             resultfile.result_file.name.split('/')[-1]
         )
+
+    def test_artifact_file_path_without_queries(self):
+        """Test the artifact path needs no related objects"""
+        resultfile = models.Resultfile.objects.get(pk=sample_resultfile().pk)
+        artifact = models.Artifact(resultfile=resultfile, filename='art.txt')
+
+        with self.assertNumQueries(0):
+            path = models.artifact_file_path(artifact, 'art.txt')
+
+        self.assertRegex(path, r'^uploads/artifacts/([0-9a-f]{2})/([0-9a-f]{2})/\1\2[0-9a-f]{28}\.txt$')
+
+    def test_resultfile_path_independent_of_names(self):
+        """Test renaming an experiment keeps the resultfile path valid"""
+        resultfile = sample_resultfile()
+        name = resultfile.result_file.name
+
+        resultfile.experiment.name = 'Renamed'
+        resultfile.experiment.save()
+        resultfile.refresh_from_db()
+
+        self.assertEqual(resultfile.result_file.name, name)
+        self.assertNotIn('MINERvA', name)
+        self.assertTrue(resultfile.result_file.storage.exists(name))
+
+    def test_resultfile_link_set_on_first_save(self):
+        """Test the link of a new resultfile is set with a single insert"""
+        resultfile = sample_resultfile()
+        self.assertEqual(resultfile.link, resultfile.result_file.url)
+
+    def test_link_of_redirecting_storage(self):
+        """Test rows stored in a private bucket link to the download action"""
+        with patch.object(SignedFileSystemStorage, 'redirect_downloads', True):
+            resultfile = sample_resultfile(content='0 1\n')
+            artifact = models.Artifact.objects.create(
+                resultfile=resultfile,
+                filename='plot.png',
+                artifact=SimpleUploadedFile('plot.png', b'png')
+            )
+        self.addCleanup(artifact.artifact.delete, save=False)
+
+        resultfile.refresh_from_db()
+        artifact.refresh_from_db()
+        self.assertEqual(resultfile.link, reverse('manager:resultfile-download', args=[resultfile.pk]))
+        self.assertEqual(artifact.link, reverse('manager:artifact-download', args=[artifact.pk]))
+
+    def test_resultfile_statistics_computed_on_save(self):
+        """Test the summary statistics of the table are stored with the row"""
+        resultfile = sample_resultfile(content='# x value\n0 1\n1 3\n2 2\n')
+        resultfile.refresh_from_db()
+
+        self.assertEqual(resultfile.bins, 3)
+        self.assertEqual((resultfile.x_min, resultfile.x_max), (0, 2))
+        self.assertEqual(resultfile.integral, 6)
+        self.assertEqual(resultfile.maximum, 3)
+        self.assertEqual(resultfile.mean, 2)
+
+    def test_resultfile_statistics_kept_on_other_changes(self):
+        """Test the table is only summarized again when the file or its dimension changes"""
+        resultfile = models.Resultfile.objects.get(pk=sample_resultfile(content='0 1\n1 3\n').pk)
+
+        with patch('core.models.table_statistics') as table_statistics:
+            resultfile.description = 'Changed'
+            resultfile.save()
+        table_statistics.assert_not_called()
+        self.assertEqual(models.Resultfile.objects.get(pk=resultfile.pk).bins, 2)
+
+        resultfile.is_3d = True
+        resultfile.save()
+        self.assertIsNone(models.Resultfile.objects.get(pk=resultfile.pk).bins)
+
+    def test_resultfile_statistics_of_invalid_table(self):
+        """Test files that are no result table have no statistics"""
+        resultfile = sample_resultfile(content='not a table\n')
+
+        self.assertIsNone(resultfile.bins)
+        self.assertIsNone(resultfile.integral)
@@ -0,0 +1,265 @@
+import os
+import tempfile
+
+import numpy as np
+
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+
+from core import datastore
+from core.analysis import (
+    SIGNATURE_SIZE,
+    Grid,
+    integrate_range,
+    make_grid,
+    project,
+    resample,
+    signature,
+    slice_grid,
+    summarize,
+    to_json
+)
+from core.parsers import ParseError, TableValidator, parse_table
+from core.tests.test_models import sample_resultfile
+
+
+class ParseTableTests(TestCase):
+    """Test parsing NuWro result tables"""
+
+    def test_parse_1d(self):
+        """Test comments are skipped and values parsed row by row"""
+        data = parse_table('# x dsigma\n0.0 1.5\n\n0.5, 2.5 # last bin\n')
+
+        np.testing.assert_array_equal(data, [[0.0, 1.5], [0.5, 2.5]])
+
+    def test_parse_3d_with_errors(self):
+        """Test 3D tables hold two coordinates, a value and an error"""
+        data = parse_table('0 0 1 0.1\n0 1 2 0.2\n', is_3d=True)
+
+        self.assertEqual(data.shape, (2, 4))
+
+    def test_wrong_column_count(self):
+        """Test a 3D table is rejected as a 1D result"""
+        with self.assertRaisesRegex(ParseError, 'Line 1: expected 2 or 3 columns'):
+            parse_table('0 0 1 0.1\n')
+
+    def test_ragged_rows(self):
+        """Test rows with a different column count are reported"""
+        with self.assertRaisesRegex(ParseError, 'Line 3: expected 2 columns'):
+            parse_table('0 1\n1 2\n2 3 4\n')
+
+    def test_not_numeric(self):
+        """Test text values are reported with their line"""
+        with self.assertRaisesRegex(ParseError, 'Line 2'):
+            parse_table('0 1\n1 abc\n')
+
+    def test_not_finite(self):
+        """Test NaN and infinite values are rejected"""
+        with self.assertRaises(ParseError):
+            parse_table('0 nan\n1 inf\n')
+
+    def test_empty(self):
+        """Test a file of comments only is rejected"""
+        with self.assertRaisesRegex(ParseError, 'no data'):
+            parse_table('# nothing\n')
+
+
+class TableValidatorTests(TestCase):
+    """Test validating NuWro result tables chunk by chunk"""
+
+    def validate(self, chunks, is_3d=None):
+        validator = TableValidator(is_3d)
+        for chunk in chunks:
+            validator.feed(chunk)
+        return validator
+
+    def test_lines_split_across_chunks(self):
+        """Test lines and characters split between chunks are validated once whole"""
+        validator = self.validate([b'# x value \xc2', b'\xb5b\n0 1', b'.5\n1, 2.5\n2 3'])
+
+        self.assertEqual(validator.close(), 2)
+        self.assertEqual(validator.rows, 3)
+
+    def test_rejects_at_first_invalid_line(self):
+        """Test an invalid line raises before the rest of the file is fed"""
+        validator = TableValidator()
+        validator.feed(b'0 1\n1 2\n')
+
+        with self.assertRaisesRegex(ParseError, 'Line 3: expected 2 columns'):
+            validator.feed(b'2 3 4\n')
+
+    def test_is_3d(self):
+        """Test the column count is checked against `is_3d`"""
+        with self.assertRaisesRegex(ParseError, 'Line 1: expected 3 or 4 columns for a 3D result'):
+            self.validate([b'0 1\n'], is_3d=True)
+
+    def test_not_numeric(self):
+        with self.assertRaisesRegex(ParseError, 'Line 2:.*not numeric'):
+            self.validate([b'0 1\n1 x\n'])
+
+    def test_not_finite(self):
+        with self.assertRaisesRegex(ParseError, 'Line 1: infinite'):
+            self.validate([b'0 nan\n'])
+
+    def test_binary(self):
+        """Test binary files are rejected without waiting for a line end"""
+        with self.assertRaisesRegex(ParseError, 'not UTF-8'):
+            self.validate([b'\x89PNG\r\n\x1a\n\x00\xff'])
+        with self.assertRaisesRegex(ParseError, 'longer than'):
+            self.validate([b'0' * 10000])
+
+    def test_empty(self):
+        with self.assertRaisesRegex(ParseError, 'no data'):
+            self.validate([b'# only a header\n']).close()
+
+
+class ResampleTests(TestCase):
+    """Test resampling many curves onto a common grid"""
+
+    def test_matches_interp(self):
+        """Test the single pass matches interpolating every curve alone"""
+        rng = np.random.RandomState(0)
+        xs = [rng.uniform(-5, 5, size) for size in (3, 17, 40, 2)]
+        ys = [rng.normal(size=len(x)) for x in xs]
+        grid = make_grid(xs, 101)
+
+        values = resample(xs, ys, grid)
+
+        for x, y, row in zip(xs, ys, values):
+            order = np.argsort(x)
+            expected = np.interp(grid, x[order], y[order], left=np.nan, right=np.nan)
+            np.testing.assert_allclose(row, expected)
+
+    def test_nan_to_none(self):
+        """Test points outside a curve become None"""
+        values = resample([np.array([0.0, 1.0])], [np.array([0.0, 2.0])], np.array([0.5, 2.0]))
+
+        self.assertEqual(to_json(values), [[1.0, None]])
+
+    def test_no_warnings_outside(self):
+        """Test points outside flat and single point curves raise no floating point warnings"""
+        with np.errstate(all='raise'):
+            values = resample(
+                [np.array([0.0, 1.0]), np.array([3.0])],
+                [np.array([1.0, 1.0]), np.array([2.0])],
+                np.array([-1.0, 0.5, 3.0, 5.0])
+            )
+
+        np.testing.assert_array_equal(values, [[np.nan, 1.0, np.nan, np.nan], [np.nan, np.nan, 2.0, np.nan]])
+
+
+TABLE_3D = np.array([
+    [0, 0, 1, 0.1],
+    [0, 1, 2, 0.1],
+    [1, 0, 3, 0.1],
+    [1, 1, 4, 0.1],
+    [2, 1, 5, 0.1],
+])
+
+
+class GridTests(TestCase):
+    """Test projections, slices and integrals of 3D tables"""
+
+    def setUp(self):
+        self.grid = Grid(TABLE_3D)
+
+    def test_grid(self):
+        """Test the table is arranged by bin centres with gaps as NaN"""
+        np.testing.assert_array_equal(self.grid.x, [0, 1, 2])
+        np.testing.assert_array_equal(self.grid.y, [0, 1])
+        np.testing.assert_array_equal(self.grid.values, [[1, 2], [3, 4], [np.nan, 5]])
+
+    def test_project(self):
+        """Test projecting integrates the other axis over its bin widths"""
+        values, errors = project(self.grid, 'x')
+
+        np.testing.assert_allclose(values, [3, 7, 5])
+        np.testing.assert_allclose(errors, [0.1 * np.sqrt(2), 0.1 * np.sqrt(2), 0.1])
+
+    def test_project_range(self):
+        """Test the integrated axis can be limited"""
+        values, _ = project(self.grid, 'y', low=1)
+
+        np.testing.assert_allclose(values, [3, 9])
+
+    def test_slice(self):
+        """Test slicing returns the values along the other axis"""
+        values, _ = slice_grid(self.grid, 'y', 0)
+
+        np.testing.assert_array_equal(values, [1, 3, np.nan])
+
+    def test_integrate_range(self):
+        """Test integrating a sub-range of both axes"""
+        self.assertEqual(integrate_range(self.grid)[0], 15)
+        self.assertEqual(integrate_range(self.grid, x_max=1, y_min=1)[0], 6)
+
+
+class DatastoreTests(TestCase):
+    """Test keeping parsed tables as memory-mapped files"""
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        settings = override_settings(DATASTORE_ROOT=root.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_table_parsed_once(self):
+        """Test the table is parsed on first use and mapped afterwards"""
+        resultfile = sample_resultfile(content='0 1\n1 2\n')
+
+        first = datastore.load_table(resultfile.result_file)
+        with patch('core.datastore.parse_table') as parse:
+            second = datastore.load_table(resultfile.result_file)
+
+        parse.assert_not_called()
+        self.assertIsInstance(second, np.memmap)
+        self.assertFalse(second.flags.writeable)
+        np.testing.assert_array_equal(first, second)
+
+    def test_discarded_with_resultfile(self):
+        """Test deleting a resultfile removes its parsed table"""
+        resultfile = sample_resultfile(content='0 1\n1 2\n')
+        datastore.load_table(resultfile.result_file)
+        path = datastore.table_path(resultfile.result_file.name)
+
+        resultfile.delete()
+
+        self.assertFalse(os.path.exists(path))
+
+
+class SummarizeTests(TestCase):
+    """Test the summary statistics of tables"""
+
+    def test_summarize_1d(self):
+        """Test the integral uses the bin widths around unsorted centres"""
+        statistics = summarize(np.array([[2, 2], [0, 1], [1, 3]], dtype=float))
+
+        self.assertEqual(statistics, {
+            'bins': 3, 'x_min': 0, 'x_max': 2, 'integral': 6, 'maximum': 3, 'mean': 2,
+        })
+
+    def test_summarize_3d(self):
+        """Test 3D tables are integrated over both axes"""
+        statistics = summarize(TABLE_3D, is_3d=True)
+
+        self.assertEqual(statistics['integral'], 15)
+        self.assertEqual(statistics['maximum'], 5)
+
+
+class SignatureTests(TestCase):
+    """Test the similarity signatures of tables"""
+
+    def test_signature_unit_length(self):
+        """Test signatures are normalized float32 vectors of a fixed size"""
+        vector = signature(np.array([[0, 1], [1, 5], [3, 2]], dtype=float))
+
+        self.assertEqual(vector.dtype, np.float32)
+        self.assertEqual(vector.shape, (SIGNATURE_SIZE,))
+        self.assertAlmostEqual(float(np.linalg.norm(vector)), 1.0, places=5)
+
+    def test_signature_of_3d_and_single_bin(self):
+        """Test 3D tables and single bins have signatures too"""
+        self.assertEqual(signature(TABLE_3D, is_3d=True).shape, (SIGNATURE_SIZE,))
+        self.assertEqual(signature(np.array([[0.0, 0.0]])).shape, (SIGNATURE_SIZE,))
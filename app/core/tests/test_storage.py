@@ -0,0 +1,106 @@
+from unittest import skipUnless
+from unittest.mock import MagicMock, patch
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+
+from core.storage import S3Storage, SignedFileSystemStorage
+
+try:
+    import boto3
+except ImportError:
+    boto3 = None
+
+
+class SignedStorageTests(TestCase):
+
+    def setUp(self):
+        self.storage = SignedFileSystemStorage()
+
+    def test_presigned_upload_and_download(self):
+        """Test a file can be uploaded and downloaded with presigned urls"""
+        name = 'uploads/tests/presigned.txt'
+        self.addCleanup(default_storage.delete, name)
+
+        res = self.client.put(
+            self.storage.presigned_upload_url(name),
+            b'1 2 3\n',
+            content_type='application/octet-stream'
+        )
+        self.assertEqual(res.status_code, 200)
+
+        res = self.client.get(self.storage.presigned_download_url(name, 'result.txt'))
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(b''.join(res.streaming_content), b'1 2 3\n')
+        self.assertIn('result.txt', res['Content-Disposition'])
+
+    def test_presigned_upload_does_not_overwrite(self):
+        """Test an upload url cannot replace an existing file"""
+        name = default_storage.save('uploads/tests/existing.txt', ContentFile(b'old'))
+        self.addCleanup(default_storage.delete, name)
+
+        res = self.client.put(self.storage.presigned_upload_url(name), b'new', content_type='text/plain')
+
+        self.assertEqual(res.status_code, 409)
+
+    def test_presigned_upload_renamed_by_storage(self):
+        """Test an upload stored under another name than signed is discarded"""
+        storage = MagicMock()
+        storage.exists.return_value = False
+        storage.save.return_value = 'uploads/tests/renamed_abc.txt'
+
+        with patch('core.views.default_storage', storage):
+            res = self.client.put(
+                self.storage.presigned_upload_url('uploads/tests/renamed.txt'),
+                b'new',
+                content_type='text/plain'
+            )
+
+        self.assertEqual(res.status_code, 409)
+        storage.delete.assert_called_once_with('uploads/tests/renamed_abc.txt')
+
+    def test_presigned_url_bound_to_method(self):
+        """Test an upload url cannot be used for downloading"""
+        res = self.client.get(self.storage.presigned_upload_url('uploads/tests/any.txt'))
+        self.assertEqual(res.status_code, 403)
+
+    def test_tampered_signature_rejected(self):
+        """Test a modified presigned url is rejected"""
+        url = self.storage.presigned_download_url('uploads/tests/any.txt')
+        res = self.client.get(url[:-3] + 'xx/')
+        self.assertEqual(res.status_code, 403)
+
+    @override_settings(FILE_STORAGE_URL_EXPIRY=-1)
+    def test_expired_signature_rejected(self):
+        """Test a presigned url is rejected once it expired"""
+        res = self.client.get(self.storage.presigned_download_url('uploads/tests/any.txt'))
+        self.assertEqual(res.status_code, 403)
+
+
+@skipUnless(boto3, 'boto3 is not installed')
+class S3StorageTests(TestCase):
+
+    def setUp(self):
+        self.storage = S3Storage(
+            bucket_name='results',
+            endpoint_url='http://minio:9000',
+            access_key='access',
+            secret_key='secret'
+        )
+
+    def test_presigned_urls_signed_for_bucket_key(self):
+        """Test presigned urls address the object on the configured server"""
+        upload_url = self.storage.presigned_upload_url('uploads/a.txt')
+        download_url = self.storage.presigned_download_url('uploads/a.txt', 'a.txt')
+
+        self.assertTrue(upload_url.startswith('http://minio:9000/results/uploads/a.txt?'))
+        self.assertIn('X-Amz-Signature=', upload_url)
+        self.assertIn('response-content-disposition=', download_url)
+
+    def test_url(self):
+        """Test the url of an object of the private bucket is presigned"""
+        url = self.storage.url('uploads/a b.txt')
+
+        self.assertTrue(url.startswith('http://minio:9000/results/uploads/a%20b.txt?'))
+        self.assertIn('X-Amz-Signature=', url)
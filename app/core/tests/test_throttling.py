@@ -0,0 +1,160 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.throttling import TokenBucketThrottle, parse_rate
+
+
+RESULTFILES_URL = reverse('manager:resultfile-list')
+RATES = {
+    'read': '3/min',
+    'upload': '1/min',
+    'download': '1/min',
+}
+
+
+class SlowCache:
+    """A cache answering every call late, like one across the network"""
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def __getattr__(self, name):
+        method = getattr(self.cache, name)
+
+        def call(*args, **kwargs):
+            time.sleep(0.01)
+            return method(*args, **kwargs)
+        return call
+
+
+class ThrottlingTests(TestCase):
+    """Test the token bucket throttle"""
+
+    def setUp(self):
+        caches['throttle'].clear()
+        self.now = 1000.0
+        patcher = patch.object(TokenBucketThrottle, 'timer', lambda _: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        rates = patch.dict('rest_framework.settings.api_settings.DEFAULT_THROTTLE_RATES', RATES)
+        rates.start()
+        self.addCleanup(rates.stop)
+
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@example.com',
+            'testpass'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_parse_rate(self):
+        """Test rates are parsed into requests and seconds"""
+        self.assertEqual(parse_rate('100/min'), (100, 60))
+        self.assertEqual(parse_rate('5/s'), (5, 1))
+        self.assertEqual(parse_rate('1000/day'), (1000, 86400))
+
+    def test_burst_then_retry_after(self):
+        """Test a full bucket allows a burst and then tells when to retry"""
+        for _ in range(3):
+            res = self.client.get(RESULTFILES_URL)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.get(RESULTFILES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(res['Retry-After'], '20')
+
+    def test_bucket_refills(self):
+        """Test a token is added back every period divided by the rate"""
+        for _ in range(3):
+            self.client.get(RESULTFILES_URL)
+
+        self.now += 20
+        res = self.client.get(RESULTFILES_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = self.client.get(RESULTFILES_URL)
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_scopes_are_separate(self):
+        """Test uploads do not draw from the read budget"""
+        res = self.client.post(RESULTFILES_URL, {})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        res = self.client.post(RESULTFILES_URL, {})
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        res = self.client.get(RESULTFILES_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_users_are_separate(self):
+        """Test every user has its own bucket"""
+        for _ in range(4):
+            self.client.get(RESULTFILES_URL)
+        other = get_user_model().objects.create_user(
+            'other@example.com',
+            'testpass'
+        )
+        self.client.force_authenticate(other)
+
+        res = self.client.get(RESULTFILES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_drained_bucket_allows_one_burst(self):
+        """Test a bucket idle for long is full again, but not more than full"""
+        for _ in range(3):
+            self.client.get(RESULTFILES_URL)
+
+        self.now += 600
+        for _ in range(3):
+            res = self.client.get(RESULTFILES_URL)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = self.client.get(RESULTFILES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def draw_concurrently(self, count):
+        """Return whether each of `count` requests drawing at once was allowed"""
+        request = MagicMock(method='GET', user=self.user)
+        view = MagicMock(throttle_scope='read')
+        barrier = threading.Barrier(count)
+        allowed = []
+
+        def draw():
+            barrier.wait()
+            allowed.append(TokenBucketThrottle().allow_request(request, view))
+        threads = [threading.Thread(target=draw) for _ in range(count)]
+        with patch('core.throttling.caches', {'throttle': SlowCache(caches['throttle'])}):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        return allowed
+
+    def test_concurrent_requests(self):
+        """Test concurrent requests cannot draw more tokens than the bucket holds"""
+        allowed = self.draw_concurrently(20)
+
+        self.assertEqual(allowed.count(True), 3)
+
+    def test_concurrent_requests_on_drained_bucket(self):
+        """Test concurrent requests lifting a drained bucket are charged once each"""
+        for _ in range(3):
+            self.client.get(RESULTFILES_URL)
+        self.now += 600
+
+        allowed = self.draw_concurrently(3)
+
+        self.assertEqual(allowed, [True] * 3)
+        self.now += 60
+        for _ in range(3):
+            res = self.client.get(RESULTFILES_URL)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
@@ -0,0 +1,109 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+# Buckets are kept in whole microseconds, the cache only increments integers
+MICROSECONDS = 10 ** 6
+
+
+def parse_rate(rate):
+    """Return the number of requests and the period in seconds of `rate`, e.g. '100/min'"""
+    num, period = rate.split('/')
+    return int(num), PERIODS[period[0]]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Throttle requests with a token bucket per client and scope.
+
+    Implemented as a generic cell rate algorithm: the bucket is a single
+    integer in the `THROTTLE_CACHE` cache, the time in microseconds at
+    which it is full again. It is only changed by atomic `add` and `incr`
+    calls, so concurrent requests cannot all pass on the same token, and a
+    shared cache like memcached makes the buckets shared by all worker
+    processes. A rejected request gives its token back. A drained bucket
+    is lifted to start from the current time, and of concurrent requests
+    finding it drained only the first lift is kept, the others are
+    refunded once the bucket no longer lags behind.
+
+    Authenticated clients are keyed by user, others by address. Reads,
+    uploads and downloads draw from separate buckets, sized by the scope
+    rates of `DEFAULT_THROTTLE_RATES`. A full bucket allows a burst of the
+    whole rate.
+    """
+    timer = time.time
+
+    def get_scope(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        if scope:
+            return scope
+        if request.method not in SAFE_METHODS:
+            return 'upload'
+        if getattr(view, 'action', None) == 'download':
+            return 'download'
+        return 'read'
+
+    def get_rate(self, scope):
+        try:
+            return api_settings.DEFAULT_THROTTLE_RATES[scope]
+        except KeyError:
+            raise ImproperlyConfigured(f'No throttle rate set for the {scope!r} scope')
+
+    def get_ident(self, request):
+        if request.user and request.user.is_authenticated:
+            return f'user-{request.user.pk}'
+        return f'ip-{super().get_ident(request)}'
+
+    def allow_request(self, request, view):
+        scope = self.get_scope(request, view)
+        rate = self.get_rate(scope)
+        if rate is None:
+            return True
+
+        num, period = parse_rate(rate)
+        interval = period * MICROSECONDS // num
+        key = f'throttle:{scope}:{self.get_ident(request)}'
+        cache = caches[settings.THROTTLE_CACHE]
+
+        now = int(self.timer() * MICROSECONDS)
+        while True:
+            if cache.add(key, now + interval, self.timeout(now + interval, now)):
+                return True
+            try:
+                full_at = cache.incr(key, interval)
+                drained = now - (full_at - interval)
+                if drained > 0:
+                    # The bucket emptied since it was last drawn from, count from now
+                    full_at = cache.incr(key, drained)
+                    if full_at - drained >= now:
+                        # A concurrent request already lifted it, refund ours
+                        full_at = cache.decr(key, drained)
+                break
+            except ValueError:
+                # Expired since the add, start a new bucket
+                continue
+
+        # A drawn token of a drained bucket is always there, whatever the
+        # concurrent lifts not yet refunded add to `full_at`
+        self.wait_time = (full_at - period * MICROSECONDS - now) / MICROSECONDS
+        if self.wait_time > 0 and drained <= 0:
+            cache.decr(key, interval)
+            return False
+
+        cache.touch(key, self.timeout(full_at, now))
+        return True
+
+    def timeout(self, full_at, now):
+        """Return the seconds to keep a bucket full again at `full_at`"""
+        return (full_at - now) // MICROSECONDS + 1
+
+    def wait(self):
+        return self.wait_time
@@ -0,0 +1,44 @@
+from django.core.files.uploadhandler import FileUploadHandler
+from django.http.multipartparser import MultiPartParserError
+
+from core.parsers import ParseError, TableValidator
+
+
+class InvalidUpload(MultiPartParserError):
+    """Raised to abort a request uploading an invalid result table"""
+
+
+class ResultTableUploadHandler(FileUploadHandler):
+    """
+    Validate uploaded NuWro result tables while their chunks arrive.
+
+    Must come first in `FILE_UPLOAD_HANDLERS`: chunks are passed on
+    unchanged to the handlers storing the file. At the first invalid line
+    the request is aborted, the rest of the body is never read and the
+    client gets a 400 response.
+
+    The `is_3d` form field may follow the file in the body, so any of the
+    widths of a 1D or 3D table are accepted here. The width matching
+    `is_3d` is checked by the serializer once the request is parsed.
+    """
+    field_names = ('result_file',)
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self.validator = TableValidator() if field_name in self.field_names else None
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.validator is not None:
+            try:
+                self.validator.feed(raw_data)
+            except ParseError as error:
+                raise InvalidUpload(f'{self.field_name}: {error}')
+        return raw_data
+
+    def file_complete(self, file_size):
+        if self.validator is not None:
+            try:
+                self.validator.close()
+            except ParseError as error:
+                raise InvalidUpload(f'{self.field_name}: {error}')
+        return None
@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.core import signing
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.http import FileResponse, HttpResponse, HttpResponseForbidden
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+
+from core.storage import TRANSFER_SALT
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class SignedStorageView(View):
+    """
+    Transfer files of `SignedFileSystemStorage` through presigned urls.
+
+    Acts as a local stand-in for an S3 compatible server: the signed token
+    in the url authorizes a single method on a single storage name.
+    """
+    http_method_names = ['get', 'put']
+
+    def dispatch(self, request, token):
+        try:
+            self.transfer = signing.loads(
+                token,
+                salt=TRANSFER_SALT,
+                max_age=settings.FILE_STORAGE_URL_EXPIRY
+            )
+        except signing.BadSignature:
+            return HttpResponseForbidden('Invalid or expired signature')
+
+        if request.method != self.transfer['method']:
+            return HttpResponseForbidden('Signature does not match the method')
+
+        return super().dispatch(request, token)
+
+    def get(self, request, token):
+        name = self.transfer['name']
+        if not default_storage.exists(name):
+            return HttpResponse(status=404)
+
+        return FileResponse(
+            default_storage.open(name, 'rb'),
+            as_attachment=bool(self.transfer['filename']),
+            filename=self.transfer['filename'] or ''
+        )
+
+    def put(self, request, token):
+        name = self.transfer['name']
+        if default_storage.exists(name):
+            return HttpResponse(status=409)
+
+        # The request is read in chunks, the body is never held in memory
+        saved = default_storage.save(name, File(request, name=name))
+        if saved != name:
+            # Another upload with the same token stored its file first
+            default_storage.delete(saved)
+            return HttpResponse(status=409)
+        return HttpResponse(status=200)
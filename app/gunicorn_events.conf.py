@@ -0,0 +1,26 @@
+"""
+Gunicorn configuration of the `events` service serving the server-sent
+events of `manager.views.EventStreamView`.
+
+A stream stays open for minutes while mostly idle. Under the threaded
+workers of the app every open stream holds one of the few threads, so
+hundreds of subscribers would starve regular requests. Gevent workers
+keep every stream in a greenlet instead: idle streams only cost memory,
+and the event broker of each worker queries the change feed once per
+change for all of its streams.
+"""
+import multiprocessing
+import os
+
+bind = '0.0.0.0:8000'
+worker_class = 'gevent'
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count()))
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+keepalive = 5
+
+
+def post_fork(server, worker):
+    # Database queries yield to the other greenlets instead of blocking the worker
+    from psycogreen.gevent import patch_psycopg
+    patch_psycopg()
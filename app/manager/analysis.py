@@ -0,0 +1,118 @@
+import numpy as np
+
+from core.analysis import compare, envelope, make_grid, resample, to_json
+from core.datastore import load_table
+
+
+def parse_tables(resultfiles):
+    """
+    Return the parsed tables of the resultfiles by id, and the ids of the
+    resultfiles whose file is not a result table
+    """
+    tables, invalid = {}, []
+    for resultfile in resultfiles:
+        try:
+            tables[resultfile.id] = load_table(resultfile.result_file, resultfile.is_3d)
+        except (ValueError, OSError):
+            invalid.append(resultfile.id)
+    return tables, invalid
+
+
+def latest_by_measurement(resultfiles):
+    """Return the last of the ordered resultfiles for every experiment and measurement name"""
+    return {
+        (resultfile.experiment.name, resultfile.measurement.name): resultfile
+        for resultfile in resultfiles
+    }
+
+
+def compare_versions(resultfiles, nuwroversion, base, include_bins=False):
+    """
+    Pair the 1D resultfiles of two nuwroversions by experiment and
+    measurement and compare every pair bin by bin in one batch.
+
+    Pairs are ranked by their largest relative deviation. The per bin
+    ratios and differences are only included with `include_bins`.
+    """
+    tables, invalid = parse_tables(resultfiles)
+    current = latest_by_measurement(
+        r for r in resultfiles if r.nuwroversion_id == nuwroversion.pk and r.id in tables
+    )
+    previous = latest_by_measurement(
+        r for r in resultfiles if r.nuwroversion_id == base.pk and r.id in tables
+    )
+    keys = sorted(set(current) & set(previous))
+
+    pairs = []
+    if keys:
+        bases = [tables[previous[key].id] for key in keys]
+        ratios, differences, max_deviations, max_differences = compare(
+            bases, [tables[current[key].id] for key in keys]
+        )
+        max_deviations, max_differences = to_json(max_deviations), to_json(max_differences)
+        for i, key in enumerate(keys):
+            pair = {
+                'experiment': key[0],
+                'measurement': key[1],
+                'resultfile': current[key].id,
+                'base_resultfile': previous[key].id,
+                'max_deviation': max_deviations[i],
+                'max_difference': max_differences[i],
+            }
+            if include_bins:
+                pair['x'] = bases[i][:, 0].tolist()
+                pair['ratio'] = to_json(ratios[i])
+                pair['difference'] = to_json(differences[i])
+            pairs.append(pair)
+
+    pairs.sort(key=lambda pair: (pair['max_deviation'] is None, -(pair['max_deviation'] or 0)))
+    return {
+        'nuwroversion': {'id': nuwroversion.pk, 'name': nuwroversion.name},
+        'base': {'id': base.pk, 'name': base.name},
+        'pairs': pairs,
+        'unpaired': sorted(
+            resultfile.id for key, resultfile in list(current.items()) + list(previous.items())
+            if key not in current or key not in previous
+        ),
+        'invalid': invalid,
+    }
+
+
+def version_envelope(resultfiles, points):
+    """
+    Return the band of the latest 1D resultfile of every nuwroversion.
+
+    Files sharing the same bins are stacked as they are, otherwise all are
+    resampled onto `points` bins spanning them.
+    """
+    tables, invalid = parse_tables(resultfiles)
+    latest = {}
+    for resultfile in resultfiles:
+        if resultfile.id in tables:
+            latest[resultfile.nuwroversion_id] = resultfile
+    latest = sorted(latest.values(), key=lambda resultfile: resultfile.nuwroversion.name)
+    if not latest:
+        return {'x': [], 'resultfiles': [], 'invalid': invalid}
+
+    xs = [tables[resultfile.id][:, 0] for resultfile in latest]
+    ys = [tables[resultfile.id][:, 1] for resultfile in latest]
+    if all(np.array_equal(x, xs[0]) for x in xs):
+        grid, values = xs[0], np.stack(ys)
+    else:
+        grid = make_grid(xs, points)
+        values = resample(xs, ys, grid)
+
+    band = envelope(values)
+    return {
+        'x': grid.tolist(),
+        'min': to_json(band['min']),
+        'max': to_json(band['max']),
+        'mean': to_json(band['mean']),
+        'std': to_json(band['std']),
+        'count': band['count'].tolist(),
+        'resultfiles': [
+            {'id': resultfile.id, 'nuwroversion': resultfile.nuwroversion.name}
+            for resultfile in latest
+        ],
+        'invalid': invalid,
+    }
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class ManagerConfig(AppConfig):
     name = 'manager'
+
+    def ready(self):
+        # Connects the invalidation of the detail cache and the event broker
+        from manager import cache, events  # noqa: F401
@@ -0,0 +1,128 @@
+import atexit
+import os
+import shutil
+import tempfile
+
+from contextlib import contextmanager
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import transaction
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.settings import api_settings
+from rest_framework.test import APIClient
+
+from core import benchmark
+from core.models import Experiment, Measurement, Nuwroversion, Resultfile
+from manager.serializers import ResultfileListSerializer, ResultfileDetailSerializer
+
+
+def sample_resultfiles(count):
+    """Return `count` unsaved Resultfiles sharing a few related objects"""
+    experiments = [Experiment(id=i, name=f'exp_{i}') for i in range(10)]
+    measurements = [Measurement(id=i, name=f'meas_{i}') for i in range(10)]
+    nuwroversions = [Nuwroversion(id=i, name=f'v{i}') for i in range(5)]
+    now = timezone.now()
+
+    resultfiles = [
+        Resultfile(
+            id=i,
+            experiment=experiments[i % len(experiments)],
+            measurement=measurements[i % len(measurements)],
+            nuwroversion=nuwroversions[i % len(nuwroversions)],
+            is_3d=bool(i % 2),
+            description='Some random description',
+            filename=f'result_{i}.txt',
+            link=f'/media/uploads/resultfiles/result_{i}.txt',
+            creation_date=now
+        )
+        for i in range(count)
+    ]
+    # As annotated by the list and detail querysets
+    for resultfile in resultfiles:
+        resultfile.artifact_count = 0
+    return resultfiles
+
+
+@benchmark.register('manager.resultfile_list_serializer')
+def bench_resultfile_list_serializer():
+    resultfiles = sample_resultfiles(1000)
+    return lambda: ResultfileListSerializer(resultfiles, many=True).data
+
+
+@benchmark.register('manager.resultfile_detail_serializer')
+def bench_resultfile_detail_serializer():
+    resultfiles = sample_resultfiles(1000)
+    return lambda: ResultfileDetailSerializer(resultfiles, many=True).data
+
+
+# Files ingested per run by the import and upload benchmarks, whose
+# timings divided by it compare the throughput of both paths
+INGEST_FILES = 100
+
+
+def sample_tree(count):
+    """Write `count` result tables laid out for `import_results`, return the root"""
+    root = tempfile.mkdtemp()
+    atexit.register(shutil.rmtree, root, True)
+    directory = os.path.join(root, 'MINERvA', 'CC0pi', 'v1.0')
+    os.makedirs(directory)
+    table = ''.join(f'{i * 0.01:.4f} {i * 1.5e-39:.6e} {i * 1e-40:.6e}\n' for i in range(500))
+    for i in range(count):
+        with open(os.path.join(directory, f'result_{i}.txt'), 'w') as result:
+            result.write(table)
+    return root
+
+
+@contextmanager
+def rolled_back():
+    """Run against the database in a transaction rolled back afterwards, storing files aside"""
+    with tempfile.TemporaryDirectory() as media_root:
+        with override_settings(MEDIA_ROOT=media_root, DATASTORE_ROOT=os.path.join(media_root, 'tables')):
+            with transaction.atomic():
+                yield
+                transaction.set_rollback(True)
+
+
+@benchmark.register('manager.ingest_import_results')
+def bench_ingest_import_results():
+    root = sample_tree(INGEST_FILES)
+
+    def run():
+        with rolled_back():
+            # With the default process pool of one worker per CPU
+            call_command('import_results', root, stdout=StringIO())
+    return run
+
+
+@benchmark.register('manager.ingest_rest_upload')
+def bench_ingest_rest_upload():
+    root = sample_tree(INGEST_FILES)
+    directory = os.path.join(root, 'MINERvA', 'CC0pi', 'v1.0')
+    paths = sorted(os.path.join(directory, name) for name in os.listdir(directory))
+    url = reverse('manager:resultfile-list')
+    # Measured without throttling, which would reject most of the uploads
+    rest_framework = dict(
+        getattr(settings, 'REST_FRAMEWORK', {}),
+        DEFAULT_THROTTLE_RATES=dict.fromkeys(api_settings.DEFAULT_THROTTLE_RATES)
+    )
+
+    def run():
+        with rolled_back(), override_settings(REST_FRAMEWORK=rest_framework, ALLOWED_HOSTS=['testserver']):
+            client = APIClient()
+            client.force_authenticate(get_user_model().objects.create_user('benchmark@example.com', 'benchmark'))
+            payload = {
+                'experiment': Experiment.objects.create(name='MINERvA').pk,
+                'measurement': Measurement.objects.create(name='CC0pi').pk,
+                'nuwroversion': Nuwroversion.objects.create(name='v1.0').pk,
+            }
+            for path in paths:
+                with open(path, 'rb') as result:
+                    res = client.post(url, dict(payload, filename=os.path.basename(path), result_file=result))
+                assert res.status_code == 201, res.content
+    return run
@@ -0,0 +1,132 @@
+import hashlib
+
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import models, transaction
+from django.dispatch import receiver
+
+from core.models import Artifact, ChangeEvent, changes_recorded
+
+
+TIMEOUT = 24 * 60 * 60
+# Hit and miss counter keys of the detail and the computed-result caches
+STATS_KEYS = {
+    'detail': ('detail:hits', 'detail:misses'),
+    'computed': ('computed:hits', 'computed:misses'),
+}
+
+
+def version_key(kind, pk):
+    return f'detail:version:{kind}:{pk}'
+
+
+def get_version(kind, pk):
+    """
+    Return the current version of an object's cached representations.
+
+    Versions are random rather than counters, so a version key evicted by
+    the cache can never bring back entries stored under an old version.
+    """
+    key = version_key(kind, pk)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def bump_versions(kind, pks):
+    cache.set_many({version_key(kind, pk): uuid4().hex for pk in pks}, None)
+
+
+def invalidate(kind, pks):
+    """
+    Drop the cached representations of the objects of `kind` with `pks`.
+
+    The versions are bumped right away, and again once the transaction
+    commits, so a response computed from the rows before the commit is
+    never reused.
+    """
+    pks = list(pks)
+    if not pks:
+        return
+    bump_versions(kind, pks)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: bump_versions(kind, pks))
+
+
+def count(name, hit):
+    key = STATS_KEYS[name][0 if hit else 1]
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, None)
+
+
+def get_stats(name='detail'):
+    """Return the hit and miss counters of the detail or the computed-result cache"""
+    hits_key, misses_key = STATS_KEYS[name]
+    counts = cache.get_many([hits_key, misses_key])
+    return {'hits': counts.get(hits_key, 0), 'misses': counts.get(misses_key, 0)}
+
+
+def reset_stats():
+    cache.delete_many([key for keys in STATS_KEYS.values() for key in keys])
+
+
+def get_detail(kind, pk, params, compute, operation='detail'):
+    """
+    Return the cached representation of an object, or compute and cache it.
+
+    `params` are the query parameters shaping the representation, and
+    `operation` names what is computed from the object.
+    `compute` returns the representation and the (kind, pk) of the other
+    objects it embeds, the entry is reused only while none of them changed.
+    Returns the representation and whether it came from the cache.
+    """
+    query = hashlib.md5(params.urlencode().encode()).hexdigest()
+    key = f'detail:{kind}:{pk}:{get_version(kind, pk)}:{operation}:{query}'
+    entry = cache.get(key)
+    if entry is not None:
+        data, dependencies = entry
+        if not dependencies or cache.get_many(list(dependencies)) == dependencies:
+            count('detail', True)
+            return data, True
+
+    count('detail', False)
+    data, embedded = compute()
+    dependencies = {version_key(*obj): get_version(*obj) for obj in embedded}
+    cache.set(key, (data, dependencies), TIMEOUT)
+    return data, False
+
+
+def get_computed(name, fingerprint, compute):
+    """
+    Return the cached result of `compute`, keyed by a fingerprint of all
+    its inputs. The entries need no invalidation, any change of the
+    inputs changes the key. Returns the result and whether it was cached.
+    """
+    key = f'computed:{name}:{hashlib.md5(repr(fingerprint).encode()).hexdigest()}'
+    data = cache.get(key)
+    if data is not None:
+        count('computed', True)
+        return data, True
+
+    count('computed', False)
+    data = compute()
+    cache.set(key, data, TIMEOUT)
+    return data, False
+
+
+@receiver(changes_recorded)
+def invalidate_changes(sender, kind, object_ids, action, **kwargs):
+    invalidate(kind, object_ids)
+
+
+@receiver(models.signals.post_save, sender=Artifact)
+@receiver(models.signals.post_delete, sender=Artifact)
+def invalidate_artifact_resultfile(sender, instance, raw=False, **kwargs):
+    """Invalidate the resultfile counting the artifact"""
+    if not raw and instance.resultfile_id:
+        invalidate(ChangeEvent.RESULTFILE, [instance.resultfile_id])
@@ -0,0 +1,191 @@
+import json
+import queue
+import select
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.dispatch import receiver
+
+from core.models import ChangeEvent, changes_recorded
+
+
+# Notified on every insert into the change feed by the trigger of the
+# `core.0026_changeevent_notify` migration
+CHANNEL = 'core_changeevent'
+# Batches of entries a stream may fall behind before it is dropped
+QUEUE_SIZE = 100
+BATCH_SIZE = 1000
+# Wait between checks of the feed while listening, in case a notification is lost
+LISTEN_TIMEOUT = 30
+RETRY_MILLISECONDS = 3000
+
+
+class Subscription:
+    """The queue of the change feed entries not yet sent by one stream"""
+
+    def __init__(self):
+        self.queue = queue.Queue(QUEUE_SIZE)
+        self.overflowed = False
+
+
+class EventBroker:
+    """
+    Fan the change feed out to the event streams open in this process.
+
+    A single thread waits for new entries and hands them to every
+    subscription, so the database is queried once per change and not once
+    per client. On PostgreSQL the thread LISTENs to the notification a
+    trigger sends on every insert into the feed, elsewhere it polls the
+    feed, woken early by the changes committed in this process. A stream
+    too slow to keep up is dropped, its client reconnects from its last
+    event.
+
+    Entries are read below the horizon of `ChangeEvent.visible`. The
+    cursor is set by the first subscription, before its stream replays
+    the feed, so every entry after the replay is published.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscriptions = set()
+        self.cursor = None
+        self.thread = None
+        self.wake = threading.Event()
+
+    def start(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.run, name='event-broker', daemon=True)
+                self.thread.start()
+
+    def subscribe(self):
+        subscription = Subscription()
+        with self.lock:
+            if self.cursor is None:
+                self.cursor = ChangeEvent.visible_cursor()
+            self.subscriptions.add(subscription)
+        self.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscriptions.discard(subscription)
+
+    def publish(self, events):
+        with self.lock:
+            subscriptions = list(self.subscriptions)
+        for subscription in subscriptions:
+            try:
+                subscription.queue.put_nowait(events)
+            except queue.Full:
+                subscription.overflowed = True
+                self.unsubscribe(subscription)
+
+    def fetch(self):
+        """
+        Publish the entries that became visible since the last fetch,
+        return whether newer ones are still held back by the horizon
+        """
+        while True:
+            events = list(ChangeEvent.visible().filter(id__gt=self.cursor).order_by('id')[:BATCH_SIZE])
+            if not events:
+                return ChangeEvent.objects.filter(id__gt=self.cursor).exists()
+            self.cursor = events[-1].id
+            self.publish(events)
+
+    def listen(self):
+        connection.ensure_connection()
+        with connection.cursor() as cursor:
+            cursor.execute(f'LISTEN {CHANNEL}')
+        pg_connection = connection.connection
+        while True:
+            timeout = settings.EVENTS_POLL_INTERVAL if self.fetch() else LISTEN_TIMEOUT
+            if select.select([pg_connection], [], [], timeout) != ([], [], []):
+                pg_connection.poll()
+                del pg_connection.notifies[:]
+
+    def poll(self):
+        while True:
+            self.fetch()
+            self.wake.wait(settings.EVENTS_POLL_INTERVAL)
+            self.wake.clear()
+
+    def run(self):
+        while True:
+            try:
+                if connection.vendor == 'postgresql':
+                    self.listen()
+                else:
+                    self.poll()
+            except DatabaseError:
+                # Entries are fetched from the cursor again once reconnected
+                connection.close()
+                time.sleep(settings.EVENTS_POLL_INTERVAL)
+
+
+broker = EventBroker()
+
+
+@receiver(changes_recorded)
+def wake_broker(sender, **kwargs):
+    """Let a polling broker fetch the changes of this process right after their commit"""
+    transaction.on_commit(broker.wake.set)
+
+
+def format_events(events):
+    """Return change feed entries as server-sent events"""
+    return ''.join(
+        f'id: {event.id}\nevent: {event.kind}\ndata: ' + json.dumps({
+            'id': event.id,
+            'kind': event.kind,
+            'object_id': event.object_id,
+            'action': event.action,
+            'timestamp': event.timestamp.isoformat(),
+        }) + '\n\n'
+        for event in events
+    )
+
+
+def event_stream(cursor=None):
+    """
+    Yield the change feed entries after `cursor` as server-sent events,
+    then the new ones as they are recorded, for `EVENTS_STREAM_TIMEOUT`
+    seconds. Without a cursor only new entries are sent.
+    """
+    subscription = broker.subscribe()
+    try:
+        if cursor is None:
+            cursor = ChangeEvent.visible_cursor()
+        yield f'retry: {RETRY_MILLISECONDS}\n\n'
+
+        # Entries recorded before the subscription are replayed from the
+        # feed, the ones published since are skipped by id below
+        while True:
+            events = list(ChangeEvent.visible().filter(id__gt=cursor).order_by('id')[:BATCH_SIZE])
+            if not events:
+                break
+            cursor = events[-1].id
+            yield format_events(events)
+
+        # An idle stream needs no database connection
+        if not connection.in_atomic_block:
+            connection.close()
+
+        deadline = time.monotonic() + settings.EVENTS_STREAM_TIMEOUT
+        while not subscription.overflowed:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                events = subscription.queue.get(timeout=min(remaining, settings.EVENTS_HEARTBEAT))
+            except queue.Empty:
+                yield ': keep-alive\n\n'
+                continue
+            events = [event for event in events if event.id > cursor]
+            if events:
+                cursor = events[-1].id
+                yield format_events(events)
+    finally:
+        broker.unsubscribe(subscription)
@@ -0,0 +1,88 @@
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from core.models import Artifact, ChangeEvent, Resultfile
+
+
+# Output key -> lookup of the exported columns, related names are joined
+RESULTFILE_COLUMNS = (
+    ('id', 'id'),
+    ('experiment_id', 'experiment_id'),
+    ('experiment', 'experiment__name'),
+    ('measurement_id', 'measurement_id'),
+    ('measurement', 'measurement__name'),
+    ('nuwroversion_id', 'nuwroversion_id'),
+    ('nuwroversion', 'nuwroversion__name'),
+    ('is_3d', 'is_3d'),
+    ('description', 'description'),
+    ('filename', 'filename'),
+    ('result_file', 'result_file'),
+    ('link', 'link'),
+    ('creation_date', 'creation_date'),
+    ('checksum', 'checksum'),
+    ('size', 'size'),
+    ('bins', 'bins'),
+    ('x_min', 'x_min'),
+    ('x_max', 'x_max'),
+    ('integral', 'integral'),
+    ('maximum', 'maximum'),
+    ('mean', 'mean'),
+)
+ARTIFACT_COLUMNS = (
+    ('id', 'id'),
+    ('resultfile_id', 'resultfile_id'),
+    ('resultfile', 'resultfile__filename'),
+    ('filename', 'filename'),
+    ('artifact', 'artifact'),
+    ('link', 'link'),
+    ('addition_date', 'addition_date'),
+    ('checksum', 'checksum'),
+    ('size', 'size'),
+)
+
+
+def to_line(record):
+    return json.dumps(record, cls=DjangoJSONEncoder) + '\n'
+
+
+def export_rows(queryset, kind, columns, chunk_size):
+    """Yield a line per row, fetching the rows through a server-side cursor"""
+    keys = [key for key, _ in columns]
+    rows = queryset.order_by('pk').values_list(*[lookup for _, lookup in columns])
+    for row in rows.iterator(chunk_size=chunk_size):
+        record = dict(zip(keys, row))
+        record['type'] = kind
+        yield to_line(record)
+
+
+def export_catalog(since=None, chunk_size=2000):
+    """
+    Yield the metadata of all resultfiles and artifacts as NDJSON lines.
+
+    With `since`, a change feed cursor, only rows changed after it and
+    tombstones of rows deleted after it are exported. The last line holds
+    the cursor to pass as `since` for the next incremental export.
+    """
+    cursor = ChangeEvent.visible_cursor()
+    resultfiles = Resultfile.objects.all()
+    artifacts = Artifact.objects.all()
+
+    if since is not None:
+        changes = ChangeEvent.objects.filter(id__gt=since, id__lte=cursor)
+        resultfiles = resultfiles.filter(
+            pk__in=changes.filter(kind=ChangeEvent.RESULTFILE).values('object_id')
+        )
+        artifacts = artifacts.filter(
+            pk__in=changes.filter(kind=ChangeEvent.ARTIFACT).values('object_id')
+        )
+
+    yield from export_rows(resultfiles, ChangeEvent.RESULTFILE, RESULTFILE_COLUMNS, chunk_size)
+    yield from export_rows(artifacts, ChangeEvent.ARTIFACT, ARTIFACT_COLUMNS, chunk_size)
+
+    if since is not None:
+        deletions = changes.filter(action=ChangeEvent.DELETED).order_by('id')
+        for kind, object_id in deletions.values_list('kind', 'object_id').iterator(chunk_size=chunk_size):
+            yield to_line({'type': 'deleted', 'kind': kind, 'id': object_id})
+
+    yield to_line({'type': 'cursor', 'cursor': cursor})
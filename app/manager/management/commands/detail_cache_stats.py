@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from manager import cache
+
+
+class Command(BaseCommand):
+    """Django command to report the hit rates of the detail response and computed-result caches"""
+    help = 'Show the hit and miss counters of the detail response and computed-result caches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reset the counters afterwards')
+
+    def handle(self, *args, **options):
+        for name in cache.STATS_KEYS:
+            stats = cache.get_stats(name)
+            total = stats['hits'] + stats['misses']
+            ratio = stats['hits'] / total if total else 0
+            self.stdout.write(f'{name}: {stats["hits"]} hits, {stats["misses"]} misses ({ratio:.1%} hit rate)')
+        if options['reset']:
+            cache.reset_stats()
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from manager.export import export_catalog
+
+
+class Command(BaseCommand):
+    """Django command to export the catalog metadata as NDJSON"""
+    help = 'Export resultfile and artifact metadata as newline delimited JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', type=int, help='Only export changes after this change feed cursor')
+        parser.add_argument('--output', help='Write to this file instead of stdout')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        lines = export_catalog(since=options['since'], chunk_size=options['chunk_size'])
+        if not options['output']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+
+        with open(options['output'], 'w') as output:
+            output.writelines(lines)
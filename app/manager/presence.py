@@ -0,0 +1,107 @@
+import threading
+
+import numpy as np
+
+from core.models import Artifact, ChangeEvent, Resultfile
+
+
+# Bit positions per checksum, each taken from 8 hex digits of the digest
+HASHES = 4
+BITS_PER_ENTRY = 16
+MIN_BITS = 1 << 20
+
+
+def positions(checksums, bits):
+    """Return the filter bit positions of every SHA-256 hex digest, a row per digest"""
+    words = [[int(checksum[i * 8:(i + 1) * 8], 16) for i in range(HASHES)] for checksum in checksums]
+    return np.array(words, dtype=np.uint64).reshape(-1, HASHES) & np.uint64(bits - 1)
+
+
+class ChecksumFilter:
+    """
+    Bloom filter of the checksums of all stored resultfiles and artifacts.
+
+    A digest is already uniformly random, so the bit positions are read
+    straight from its digits instead of hashing it again. Absent checksums
+    are answered from memory, the few matches are confirmed against the
+    database, which also covers the checksums of deleted rows the filter
+    cannot forget. Loaded on first use and kept current from the change
+    feed, rebuilt at twice the size once it holds too many checksums.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.cursor = None
+        self.bits = MIN_BITS
+        self.count = 0
+        self.array = np.zeros(self.bits // 8, dtype=np.uint8)
+
+    def add(self, checksums):
+        checksums = [checksum for checksum in checksums if checksum]
+        if not checksums:
+            return
+        bit = positions(checksums, self.bits).ravel()
+        np.bitwise_or.at(self.array, bit >> np.uint64(3), (np.uint64(1) << (bit & np.uint64(7))).astype(np.uint8))
+        self.count += len(checksums)
+
+    def checksums(self, resultfiles, artifacts):
+        """Yield the checksums of the given resultfile and artifact querysets"""
+        for queryset in (resultfiles, artifacts):
+            yield from queryset.exclude(checksum='').values_list('checksum', flat=True).iterator(chunk_size=5000)
+
+    def load(self):
+        # Changes made while loading are applied again by the next refresh
+        self.cursor = ChangeEvent.visible_cursor()
+        total = Resultfile.objects.count() + Artifact.objects.count()
+        self.bits = max(MIN_BITS, 1 << int(total * BITS_PER_ENTRY * 2).bit_length())
+        self.count = 0
+        self.array = np.zeros(self.bits // 8, dtype=np.uint8)
+        batch = []
+        for checksum in self.checksums(Resultfile.objects.all(), Artifact.objects.all()):
+            batch.append(checksum)
+            if len(batch) == 5000:
+                self.add(batch)
+                batch = []
+        self.add(batch)
+
+    def refresh(self):
+        """Add the checksums of the rows created or updated since the last refresh"""
+        if self.cursor is None or self.count * BITS_PER_ENTRY > self.bits:
+            self.load()
+            return
+
+        events = ChangeEvent.visible().filter(id__gt=self.cursor).exclude(action=ChangeEvent.DELETED)
+        changes = list(events.order_by('id').values_list('id', 'kind', 'object_id'))
+        if not changes:
+            return
+        self.cursor = changes[-1][0]
+        changed = {ChangeEvent.RESULTFILE: set(), ChangeEvent.ARTIFACT: set()}
+        for _, kind, object_id in changes:
+            changed[kind].add(object_id)
+        self.add(self.checksums(
+            Resultfile.objects.filter(pk__in=changed[ChangeEvent.RESULTFILE]),
+            Artifact.objects.filter(pk__in=changed[ChangeEvent.ARTIFACT])
+        ))
+
+    def maybe_stored(self, checksums):
+        """Return for every checksum whether it may be stored, False ones are certainly not"""
+        with self.lock:
+            self.refresh()
+            if not checksums:
+                return []
+            bit = positions(checksums, self.bits)
+            found = (self.array[bit >> np.uint64(3)] >> (bit & np.uint64(7)).astype(np.uint8)) & 1
+            return found.all(axis=1).tolist()
+
+    def stored(self, checksums):
+        """Return the set of the given checksums whose bytes are stored"""
+        candidates = sorted({checksum for checksum, maybe in zip(checksums, self.maybe_stored(checksums)) if maybe})
+        stored = set()
+        for start in range(0, len(candidates), 500):
+            batch = candidates[start:start + 500]
+            stored.update(Resultfile.objects.filter(checksum__in=batch).values_list('checksum', flat=True))
+            stored.update(Artifact.objects.filter(checksum__in=batch).values_list('checksum', flat=True))
+        return stored
+
+
+index = ChecksumFilter()
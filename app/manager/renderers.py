@@ -0,0 +1,37 @@
+import json
+
+from rest_framework.renderers import BaseRenderer
+
+
+class DataRenderer(BaseRenderer):
+    """
+    Renderer only selecting the format of a data download, the view
+    builds the response itself. Errors are rendered as JSON.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        response = (renderer_context or {}).get('response')
+        if response is not None:
+            response['Content-Type'] = 'application/json'
+        return json.dumps(data).encode()
+
+
+class NpyRenderer(DataRenderer):
+    media_type = 'application/x-npy'
+    format = 'npy'
+
+
+class RawTableRenderer(DataRenderer):
+    """A uint32 header length, a JSON header and the raw little-endian float64 values"""
+    media_type = 'application/octet-stream'
+    format = 'raw'
+
+
+class CSVRenderer(DataRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+
+class EventStreamRenderer(DataRenderer):
+    media_type = 'text/event-stream'
+    format = 'events'
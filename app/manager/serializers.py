@@ -1,15 +1,110 @@
+import warnings
+
+from django.core import signing
+
 from rest_framework import serializers
 
+from core.checksums import file_checksum
 from core.models import (
     Experiment,
     Measurement,
     Nuwroversion,
     Artifact,
+    ChangeEvent,
     Resultfile
 )
+from core.parsers import ParseError, TableValidator
+from core.storage import resolve_upload_token
+
+
+CHECKSUM_PATTERN = r'^[0-9a-f]{64}$'
+
+
+def resolve_direct_upload(token, model, field_name):
+    """
+    Return the storage name, filename, checksum and size of a finished
+    direct upload identified by `token`. The bytes never passed through
+    the API, they are hashed from the storage.
+    """
+    try:
+        name, filename = resolve_upload_token(token)
+    except signing.BadSignature:
+        raise serializers.ValidationError({'upload_token': 'Invalid or expired upload token.'})
+
+    storage = model._meta.get_field(field_name).storage
+    if not storage.exists(name):
+        raise serializers.ValidationError({'upload_token': 'The file has not been uploaded.'})
+    if model.objects.filter(**{field_name: name}).exists():
+        raise serializers.ValidationError({'upload_token': 'The upload is already registered.'})
+
+    with storage.open(name, 'rb') as stored_file:
+        checksum, size = file_checksum(stored_file)
+    return name, filename, checksum, size
+
+
+def resolve_stored_checksum(checksum):
+    """
+    Return the storage name, filename and size of stored bytes with the
+    SHA-256 `checksum`, taken from any resultfile or artifact
+    """
+    for model, field_name in ((Resultfile, 'result_file'), (Artifact, 'artifact')):
+        stored = model.objects.filter(checksum=checksum).exclude(**{field_name: ''})
+        row = stored.values_list(field_name, 'filename', 'size').first()
+        if row:
+            return row
+    raise serializers.ValidationError({'existing_checksum': 'No stored file has this checksum.'})
+
+
+def validate_table_columns(uploaded_file, is_3d, field_name='result_file'):
+    """
+    Check the columns of an uploaded result table match `is_3d`, reading
+    it only up to its first row of data
+    """
+    validator = TableValidator(is_3d)
+    try:
+        for chunk in uploaded_file.chunks():
+            validator.feed(chunk)
+            if validator.width is not None:
+                break
+        else:
+            validator.close()
+    except ParseError as error:
+        raise serializers.ValidationError({field_name: str(error)})
+    finally:
+        uploaded_file.seek(0)
+
+
+def validate_stored_table_columns(name, is_3d, field_name):
+    """Check the columns of a stored result table match `is_3d`, see `validate_table_columns`"""
+    storage = Resultfile._meta.get_field('result_file').storage
+    with storage.open(name, 'rb') as stored_file:
+        validate_table_columns(stored_file, is_3d, field_name)
+
+
+class DynamicFieldsMixin:
+    """
+    Serializer mixin trimming the output to the `fields` keyword argument
+    and embedding the relations named in `expand`
+    """
+    # Maps a field name to the (serializer class, kwargs) embedded on expand
+    expandable_fields = {}
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        expand = kwargs.pop('expand', ())
+        super().__init__(*args, **kwargs)
+
+        for name in expand:
+            if name in self.expandable_fields:
+                serializer_class, options = self.expandable_fields[name]
+                self.fields[name] = serializer_class(**options)
 
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
 
-class ExperimentSerializer(serializers.ModelSerializer):
+
+class ExperimentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Experiment objects"""
 
     class Meta:
@@ -18,7 +113,7 @@ class ExperimentSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
 
-class MeasurementSerializer(serializers.ModelSerializer):
+class MeasurementSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Measurement objects"""
 
     class Meta:
@@ -27,7 +122,7 @@ class MeasurementSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
 
-class NuwroversionSerializer(serializers.ModelSerializer):
+class NuwroversionSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Nuwroversion objects"""
 
     class Meta:
@@ -36,7 +131,39 @@ class NuwroversionSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
 
-class ResultfileListSerializer(serializers.ModelSerializer):
+class ResultfileArtifactSerializer(serializers.ModelSerializer):
+    """Serializer for Artifacts embedded in a Resultfile"""
+
+    class Meta:
+        model = Artifact
+        fields = ('id', 'filename', 'link', 'addition_date')
+        read_only_fields = fields
+
+
+class ArtifactCountMixin(serializers.Serializer):
+    """
+    Serializer mixin adding the number of artifacts of a Resultfile, read
+    from the `artifact_count` annotation of the queryset.
+
+    Unannotated resultfiles are counted with a query each and a warning,
+    the querysets of the views are expected to annotate.
+    """
+    artifact_count = serializers.SerializerMethodField()
+    expandable_fields = {
+        'artifacts': (ResultfileArtifactSerializer, {'many': True, 'read_only': True})
+    }
+
+    def get_artifact_count(self, resultfile):
+        if hasattr(resultfile, 'artifact_count'):
+            return resultfile.artifact_count
+        warnings.warn(
+            f'{type(self).__name__} counts the artifacts of unannotated resultfiles with a query per row',
+            RuntimeWarning
+        )
+        return resultfile.artifacts.count()
+
+
+class ResultfileListSerializer(ArtifactCountMixin, DynamicFieldsMixin, serializers.ModelSerializer):
     experiment = ExperimentSerializer(read_only=True)
     measurement = MeasurementSerializer(read_only=True)
     nuwroversion = NuwroversionSerializer(read_only=True)
@@ -44,10 +171,12 @@ class ResultfileListSerializer(serializers.ModelSerializer):
     class Meta:
         model = Resultfile
         fields = ('id', 'experiment', 'measurement', 'nuwroversion', 'is_3d',
-                  'description', 'filename', 'link', 'creation_date')
+                  'description', 'filename', 'link', 'creation_date',
+                  'checksum', 'size', 'bins', 'x_min', 'x_max', 'integral',
+                  'maximum', 'mean', 'artifact_count')
 
 
-class ResultfileSerializer(serializers.ModelSerializer):
+class ResultfileSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Resultfile objects"""
     experiment = serializers.PrimaryKeyRelatedField(
         queryset=Experiment.objects.all()
@@ -58,52 +187,223 @@ class ResultfileSerializer(serializers.ModelSerializer):
     nuwroversion = serializers.PrimaryKeyRelatedField(
         queryset=Nuwroversion.objects.all()
     )
+    upload_token = serializers.CharField(write_only=True, required=False)
+    existing_checksum = serializers.RegexField(CHECKSUM_PATTERN, write_only=True, required=False)
 
-    def create(self, validated_data):
-        instance = Resultfile.objects.create(**validated_data)
-        instance.link = instance.result_file.url
-        instance.save()
+    def validate(self, attrs):
+        """
+        Take the file from the request, from a direct upload or from stored
+        bytes with the same checksum, and name a new resultfile after it
+        """
+        token = attrs.pop('upload_token', None)
+        checksum = attrs.pop('existing_checksum', None)
+        is_3d = attrs.get('is_3d', self.instance.is_3d if self.instance else False)
+        if token:
+            attrs['result_file'], attrs['filename'], attrs['checksum'], attrs['size'] = resolve_direct_upload(
+                token, Resultfile, 'result_file'
+            )
+            validate_stored_table_columns(attrs['result_file'], is_3d, 'upload_token')
+        elif checksum:
+            attrs['result_file'], attrs['filename'], attrs['size'] = resolve_stored_checksum(checksum)
+            attrs['checksum'] = checksum
+            validate_stored_table_columns(attrs['result_file'], is_3d, 'existing_checksum')
+        elif 'result_file' in attrs:
+            attrs['filename'] = attrs['result_file'].name
+            validate_table_columns(attrs['result_file'], is_3d)
+        elif self.instance is None:
+            raise serializers.ValidationError({
+                'result_file': 'Upload a file, pass the upload_token of a direct upload '
+                               'or the existing_checksum of stored bytes.'
+            })
 
-        return instance
+        if self.instance is not None:
+            attrs.pop('filename', None)
+        return attrs
 
     class Meta:
         model = Resultfile
         fields = (
             'id', 'experiment', 'measurement', 'nuwroversion', 'is_3d',
-            'description', 'filename', 'result_file', 'link', 'creation_date'
+            'description', 'filename', 'result_file', 'upload_token', 'existing_checksum', 'link',
+            'creation_date', 'checksum', 'size', 'bins', 'x_min', 'x_max',
+            'integral', 'maximum', 'mean'
         )
-        read_only_fields = ('id', 'filename', 'link')
+        read_only_fields = ('id', 'filename', 'link', 'checksum', 'size', 'bins',
+                            'x_min', 'x_max', 'integral', 'maximum', 'mean')
         extra_kwargs = {
-            'result_file': {'write_only': True}
+            # Stored names are generated by `resultfile_file_path`, checking
+            # the uploaded name for uniqueness would only cost a query
+            'result_file': {'write_only': True, 'required': False, 'validators': []}
         }
 
 
-class ResultfileDetailSerializer(ResultfileSerializer):
+class ResultfileDetailSerializer(ArtifactCountMixin, ResultfileSerializer):
     """Serializer for a Resultfile detail"""
     experiment = ExperimentSerializer(read_only=True)
     measurement = MeasurementSerializer(read_only=True)
     nuwroversion = NuwroversionSerializer(read_only=True)
 
+    class Meta(ResultfileSerializer.Meta):
+        fields = ResultfileSerializer.Meta.fields + ('artifact_count',)
 
-class ArtifactSerializer(serializers.ModelSerializer):
+
+class ArtifactSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     resultfile = serializers.PrimaryKeyRelatedField(
         queryset=Resultfile.objects.all()
     )
+    # The artifact count of an embedded resultfile would cost a query per row
+    expandable_fields = {
+        'resultfile': (ResultfileListSerializer, {
+            'read_only': True,
+            'fields': [f for f in ResultfileListSerializer.Meta.fields if f != 'artifact_count']
+        })
+    }
+
+    upload_token = serializers.CharField(write_only=True, required=False)
+    existing_checksum = serializers.RegexField(CHECKSUM_PATTERN, write_only=True, required=False)
 
-    def create(self, validated_data):
-        instance = Artifact.objects.create(**validated_data)
-        instance.link = instance.artifact.url
-        instance.save()
-        return instance
+    def validate(self, attrs):
+        """Take the file from the request, from a direct upload or from stored bytes"""
+        token = attrs.pop('upload_token', None)
+        checksum = attrs.pop('existing_checksum', None)
+        if token:
+            attrs['artifact'], _, attrs['checksum'], attrs['size'] = resolve_direct_upload(
+                token, Artifact, 'artifact'
+            )
+        elif checksum:
+            attrs['artifact'], _, attrs['size'] = resolve_stored_checksum(checksum)
+            attrs['checksum'] = checksum
+        elif 'artifact' not in attrs and self.instance is None:
+            raise serializers.ValidationError({
+                'artifact': 'Upload a file, pass the upload_token of a direct upload '
+                            'or the existing_checksum of stored bytes.'
+            })
+        return attrs
 
     class Meta:
         model = Artifact
-        fields = ('id', 'resultfile', 'filename', 'artifact', 'link', 'addition_date')
-        read_only_fields = ('id', 'filename', 'link', 'addition_date')
+        fields = ('id', 'resultfile', 'filename', 'artifact', 'upload_token', 'existing_checksum', 'link',
+                  'addition_date', 'checksum', 'size')
+        read_only_fields = ('id', 'filename', 'link', 'addition_date', 'checksum', 'size')
         extra_kwargs = {
-            'artifact': {'write_only': True}
+            'artifact': {'write_only': True, 'required': False}
         }
 
 
 class ArtifactDetailSerializer(ArtifactSerializer):
-    resultfile = ResultfileDetailSerializer
+    resultfile = ResultfileDetailSerializer(read_only=True)
+
+    def to_representation(self, artifact):
+        # Counted by the `resultfile_artifact_count` annotation of the artifact queryset
+        if hasattr(artifact, 'resultfile_artifact_count'):
+            artifact.resultfile.artifact_count = artifact.resultfile_artifact_count
+        return super().to_representation(artifact)
+
+
+class ResultfileUploadUrlSerializer(serializers.ModelSerializer):
+    """Serializer for reserving a direct upload of a Resultfile"""
+
+    class Meta:
+        model = Resultfile
+        fields = ('experiment', 'measurement', 'nuwroversion', 'filename')
+        extra_kwargs = {
+            'filename': {'required': True}
+        }
+
+
+class ArtifactUploadUrlSerializer(serializers.ModelSerializer):
+    """Serializer for reserving a direct upload of an Artifact"""
+
+    class Meta:
+        model = Artifact
+        fields = ('resultfile', 'filename')
+
+
+class OverlaySerializer(serializers.Serializer):
+    """Serializer for the query of an overlay of resultfiles on a common grid"""
+    max_curves = 100
+
+    ids = serializers.CharField()
+    points = serializers.IntegerField(min_value=2, max_value=10000, default=200)
+    x_min = serializers.FloatField(required=False)
+    x_max = serializers.FloatField(required=False)
+
+    def validate_ids(self, value):
+        try:
+            ids = [int(pk) for pk in value.split(',') if pk.strip()]
+        except ValueError:
+            raise serializers.ValidationError('A comma separated list of ids is required.')
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            raise serializers.ValidationError('At least one id is required.')
+        if len(ids) > self.max_curves:
+            raise serializers.ValidationError(f'At most {self.max_curves} resultfiles can be overlaid.')
+        return ids
+
+    def validate(self, attrs):
+        if 'x_min' in attrs and 'x_max' in attrs and attrs['x_min'] >= attrs['x_max']:
+            raise serializers.ValidationError({'x_max': 'Must be greater than x_min.'})
+        return attrs
+
+
+class ProjectionSerializer(serializers.Serializer):
+    """Serializer for the query of a projection of a 3D resultfile onto an axis"""
+    axis = serializers.ChoiceField(choices=('x', 'y'))
+    min = serializers.FloatField(required=False)
+    max = serializers.FloatField(required=False)
+
+
+class SliceSerializer(serializers.Serializer):
+    """Serializer for the query of a slice of a 3D resultfile at a bin of an axis"""
+    axis = serializers.ChoiceField(choices=('x', 'y'))
+    bin = serializers.IntegerField(min_value=0)
+
+
+class IntegralSerializer(serializers.Serializer):
+    """Serializer for the query of the integral of a 3D resultfile over a range"""
+    x_min = serializers.FloatField(required=False)
+    x_max = serializers.FloatField(required=False)
+    y_min = serializers.FloatField(required=False)
+    y_max = serializers.FloatField(required=False)
+
+
+class ComparisonSerializer(serializers.Serializer):
+    """Serializer for the query of a comparison of two nuwroversions"""
+    base = serializers.PrimaryKeyRelatedField(queryset=Nuwroversion.objects.all())
+    bins = serializers.BooleanField(default=False)
+
+
+class EnvelopeSerializer(serializers.Serializer):
+    """Serializer for the query of the band of a measurement across nuwroversions"""
+    experiment = serializers.PrimaryKeyRelatedField(queryset=Experiment.objects.all())
+    measurement = serializers.PrimaryKeyRelatedField(queryset=Measurement.objects.all())
+    points = serializers.IntegerField(min_value=2, max_value=10000, default=200)
+
+
+class SimilarSerializer(serializers.Serializer):
+    """Serializer for the query of the resultfiles most similar to one"""
+    k = serializers.IntegerField(min_value=1, max_value=100, default=10)
+
+
+class ChecksumLookupSerializer(serializers.Serializer):
+    """Serializer for a batch of checksums looked up in the storage"""
+    checksums = serializers.ListField(
+        child=serializers.RegexField(CHECKSUM_PATTERN),
+        max_length=10000
+    )
+
+
+class ChangeEventSerializer(serializers.ModelSerializer):
+    """
+    Serializer for change feed entries, embedding the current state of
+    the changed object passed in the `objects` context
+    """
+    object = serializers.SerializerMethodField()
+
+    def get_object(self, event):
+        return self.context['objects'].get((event.kind, event.object_id))
+
+    class Meta:
+        model = ChangeEvent
+        fields = ('id', 'kind', 'object_id', 'action', 'timestamp', 'object')
+        read_only_fields = fields
@@ -0,0 +1,76 @@
+import threading
+
+import numpy as np
+
+from core.analysis import SIGNATURE_SIZE
+from core.models import ChangeEvent, Resultfile
+
+
+class SignatureIndex:
+    """
+    The similarity signatures of all resultfiles, kept in memory as one
+    contiguous float32 matrix with a row per resultfile.
+
+    The matrix is loaded on first use and then kept current incrementally:
+    before every query the resultfile changes recorded in the change feed
+    since the last refresh replace, add or drop their rows.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.cursor = None
+        self.ids = np.empty(0, dtype=np.int64)
+        self.matrix = np.empty((0, SIGNATURE_SIZE), dtype=np.float32)
+
+    def load(self, queryset):
+        """Return the ids and the signature matrix of the rows with a signature"""
+        rows = queryset.exclude(signature=None).values_list('id', 'signature')
+        ids, signatures = [], []
+        for pk, data in rows.iterator(chunk_size=2000):
+            ids.append(pk)
+            signatures.append(np.frombuffer(data, dtype=np.float32))
+        if not ids:
+            return np.empty(0, dtype=np.int64), np.empty((0, SIGNATURE_SIZE), dtype=np.float32)
+        return np.array(ids, dtype=np.int64), np.stack(signatures)
+
+    def refresh(self):
+        """
+        Apply the resultfile changes recorded since the last refresh and
+        return the current ids and matrix
+        """
+        with self.lock:
+            if self.cursor is None:
+                # Changes made while loading are applied again by the next refresh
+                self.cursor = ChangeEvent.visible_cursor()
+                self.ids, self.matrix = self.load(Resultfile.objects.all())
+                return self.ids, self.matrix
+
+            events = ChangeEvent.visible().filter(id__gt=self.cursor, kind=ChangeEvent.RESULTFILE)
+            changes = list(events.order_by('id').values_list('id', 'object_id'))
+            if not changes:
+                return self.ids, self.matrix
+            self.cursor = changes[-1][0]
+            changed = {object_id for _, object_id in changes}
+
+            keep = ~np.isin(self.ids, list(changed))
+            ids, matrix = self.load(Resultfile.objects.filter(pk__in=changed))
+            self.ids = np.concatenate((self.ids[keep], ids))
+            self.matrix = np.concatenate((self.matrix[keep], matrix))
+            return self.ids, self.matrix
+
+    def nearest(self, signature, k, exclude=None):
+        """Return the ids and cosine similarities of the `k` rows most similar to `signature`"""
+        ids, matrix = self.refresh()
+        similarities = matrix @ signature
+        excluded = ids == exclude
+        similarities[excluded] = -np.inf
+
+        k = min(k, len(ids) - int(excluded.sum()))
+        if k <= 0:
+            return [], []
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[np.argsort(-similarities[top])]
+        return ids[top].tolist(), similarities[top].tolist()
+
+
+index = SignatureIndex()
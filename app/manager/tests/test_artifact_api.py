@@ -1,5 +1,7 @@
 
+import hashlib
 import os
+import warnings
 
 from django.contrib.auth import get_user_model
 from django.test import TestCase
@@ -17,6 +19,7 @@ from manager.serializers import ArtifactSerializer, ArtifactDetailSerializer
 
 
 ARTIFACTS_URL = reverse('manager:artifact-list')
+UPLOAD_URL = reverse('manager:artifact-upload-url')
 
 
 def generate_file_link(experiment_name,
@@ -36,6 +39,11 @@ def detail_url(artifact_id):
     return reverse('manager:artifact-detail', args=[artifact_id])
 
 
+def download_url(artifact_id):
+    """Return artifact download url"""
+    return reverse('manager:artifact-download', args=[artifact_id])
+
+
 class PublicArtifactApiTests(TestCase):
     """Test unauthenticated access to Artifact API"""
 
@@ -119,6 +127,43 @@ class PrivateArtifactApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
         self.assertEqual(tmp_resfile.id, res.data['resultfile'])
 
+    def test_create_artifact_fixed_queries(self):
+        """Test creating an Artifact validates and writes the row once"""
+        tmp_resfile = sample_resultfile()
+        file_mock = MagicMock(spec=File)
+        file_mock.name = 'test_art1.txt'
+
+        payload = {
+            'resultfile': tmp_resfile.id,
+            'filename': file_mock.name,
+            'artifact': file_mock
+        }
+
+        # the resultfile lookup, the insert and its change feed entry
+        with self.assertNumQueries(3):
+            res = self.client.post(ARTIFACTS_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        artifact = Artifact.objects.get(pk=res.data['id'])
+        self.assertEqual(artifact.link, artifact.artifact.url)
+
+    def test_create_artifact_from_direct_upload(self):
+        """Test creating an Artifact from a file uploaded to the storage"""
+        tmp_resfile = sample_resultfile()
+        payload = {'resultfile': tmp_resfile.id, 'filename': 'plot.png'}
+
+        res = self.client.post(UPLOAD_URL, payload)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.client.put(res.data['url'], b'png', content_type='application/octet-stream')
+
+        res = self.client.post(ARTIFACTS_URL, dict(payload, upload_token=res.data['upload_token']))
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        artifact = Artifact.objects.get(pk=res.data['id'])
+        self.assertEqual(artifact.artifact.read(), b'png')
+        self.assertEqual(artifact.checksum, hashlib.sha256(b'png').hexdigest())
+        self.assertEqual(artifact.size, 3)
+
     def test_file_exists_in_its_location(self):
         """Test the newly created file exists in location provided by link field"""
         tmp_resultfile = sample_resultfile()
@@ -133,3 +178,37 @@ class PrivateArtifactApiTests(TestCase):
         serializer = ArtifactDetailSerializer(artifact)
 
         self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['resultfile']['id'], artifact.resultfile.id)
+        self.assertEqual(res.data['resultfile']['experiment']['name'], 'MINERvA')
+
+    def test_artifact_detail_counts_resultfile_artifacts(self):
+        """Test the embedded resultfile counts its artifacts with the artifact query"""
+        resultfile = sample_resultfile()
+        artifact = sample_artifact(resultfile)
+        sample_artifact(resultfile, filename='art2.txt')
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            res = self.client.get(detail_url(artifact_id=artifact.id))
+
+        self.assertEqual(res.data['resultfile']['artifact_count'], 2)
+
+    def test_download_artifact(self):
+        """Test downloading an Artifact file"""
+        artifact = sample_artifact(sample_resultfile())
+        res = self.client.get(download_url(artifact.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn(artifact.filename, res['Content-Disposition'])
+
+    def test_retrieve_artifacts_expand_resultfile(self):
+        """Test listing artifacts with the resultfile embedded"""
+        resfile = sample_resultfile()
+        sample_artifact(resultfile=resfile, filename='art1.txt')
+
+        with self.assertNumQueries(1):
+            res = self.client.get(ARTIFACTS_URL, {'expand': 'resultfile', 'fields': 'id,resultfile'})
+
+        self.assertEqual(set(res.data[0]), {'id', 'resultfile'})
+        self.assertEqual(res.data[0]['resultfile']['id'], resfile.id)
+        self.assertEqual(res.data[0]['resultfile']['measurement']['name'], 'CC0pi')
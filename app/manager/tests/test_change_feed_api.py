@@ -0,0 +1,140 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import ChangeEvent
+from core.tests.test_models import sample_resultfile, sample_artifact
+
+
+CHANGES_URL = reverse('manager:changes')
+
+
+class PublicChangeFeedApiTests(TestCase):
+    """Test unauthenticated change feed API access"""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        """Test that authentication is required"""
+        res = self.client.get(CHANGES_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateChangeFeedApiTests(TestCase):
+    """Test authenticated change feed API access"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@example.com',
+            'testpass'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_changes_since_cursor(self):
+        """Test only the changes after the cursor are returned"""
+        sample_resultfile()
+        cursor = self.client.get(CHANGES_URL).data['cursor']
+        resultfile = sample_resultfile(experiment='T2K', filename='new.txt')
+
+        res = self.client.get(CHANGES_URL, {'since': cursor})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['changes']), 1)
+        change = res.data['changes'][0]
+        self.assertEqual(change['kind'], ChangeEvent.RESULTFILE)
+        self.assertEqual(change['object_id'], resultfile.id)
+        self.assertEqual(change['action'], ChangeEvent.CREATED)
+        self.assertEqual(change['object']['experiment']['name'], 'T2K')
+        self.assertGreater(res.data['cursor'], cursor)
+
+    def test_deletions_are_tombstones(self):
+        """Test a deleted artifact is reported without its data"""
+        artifact = sample_artifact(sample_resultfile())
+        artifact_id = artifact.id
+        cursor = self.client.get(CHANGES_URL).data['cursor']
+        artifact.delete()
+
+        res = self.client.get(CHANGES_URL, {'since': cursor})
+
+        self.assertEqual(len(res.data['changes']), 1)
+        change = res.data['changes'][0]
+        self.assertEqual(change['object_id'], artifact_id)
+        self.assertEqual(change['action'], ChangeEvent.DELETED)
+        self.assertIsNone(change['object'])
+
+    def test_changes_collapsed_per_object(self):
+        """Test several changes of one object are reported once"""
+        resultfile = sample_resultfile()
+        resultfile.description = 'Changed'
+        resultfile.save()
+
+        res = self.client.get(CHANGES_URL)
+
+        changes = [c for c in res.data['changes'] if c['kind'] == ChangeEvent.RESULTFILE]
+        self.assertEqual(len(changes), 1)
+        self.assertEqual(changes[0]['action'], ChangeEvent.UPDATED)
+        self.assertEqual(changes[0]['object']['description'], 'Changed')
+
+    def test_rename_records_resultfile_updates(self):
+        """Test renaming an experiment reports its resultfiles as updated"""
+        resultfile = sample_resultfile()
+        cursor = self.client.get(CHANGES_URL).data['cursor']
+        resultfile.experiment.name = 'MINERvA2'
+        resultfile.experiment.save()
+
+        res = self.client.get(CHANGES_URL, {'since': cursor})
+
+        self.assertEqual(len(res.data['changes']), 1)
+        self.assertEqual(res.data['changes'][0]['object']['experiment']['name'], 'MINERvA2')
+
+    def test_fixed_queries(self):
+        """Test the artifact counts of changed resultfiles cost no query per row"""
+        for i in range(5):
+            sample_artifact(sample_resultfile(experiment=f'exp{i}', filename=f'res{i}.txt'))
+
+        # the page, the resultfiles with their counts and the artifacts
+        with self.assertNumQueries(3):
+            res = self.client.get(CHANGES_URL)
+
+        counts = [c['object']['artifact_count'] for c in res.data['changes'] if c['kind'] == ChangeEvent.RESULTFILE]
+        self.assertEqual(counts, [1] * 5)
+
+    def test_changes_paginated_by_limit(self):
+        """Test the limit parameter splits the feed into pages"""
+        for i in range(3):
+            sample_resultfile(filename=f'res{i}.txt')
+
+        res = self.client.get(CHANGES_URL, {'limit': 2})
+        self.assertEqual(len(res.data['changes']), 2)
+        self.assertTrue(res.data['has_more'])
+
+        res = self.client.get(CHANGES_URL, {'since': res.data['cursor'], 'limit': 2})
+        self.assertEqual(len(res.data['changes']), 1)
+        self.assertFalse(res.data['has_more'])
+
+    def test_invalid_cursor(self):
+        """Test a non numeric cursor is rejected"""
+        res = self.client.get(CHANGES_URL, {'since': 'abc'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_limit_out_of_range(self):
+        """Test a limit outside 1 to the maximum is rejected"""
+        for limit in (-5, 0, 5001):
+            res = self.client.get(CHANGES_URL, {'limit': limit})
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(CHANGE_FEED_DELAY=60)
+    def test_recent_changes_held_back(self):
+        """Test changes are only served once older than the delay"""
+        sample_resultfile()
+
+        res = self.client.get(CHANGES_URL)
+
+        self.assertEqual(res.data['changes'], [])
+        self.assertEqual(res.data['cursor'], 0)
+        self.assertFalse(res.data['has_more'])
@@ -0,0 +1,149 @@
+import hashlib
+import os
+
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Artifact, Resultfile
+from core.tests.test_models import sample_resultfile
+from manager.presence import ChecksumFilter
+
+
+CHECKSUMS_URL = reverse('manager:checksums')
+RESULTFILES_URL = reverse('manager:resultfile-list')
+ARTIFACTS_URL = reverse('manager:artifact-list')
+
+CONTENT = '0 1\n1 2\n'
+CHECKSUM = hashlib.sha256(CONTENT.encode()).hexdigest()
+ABSENT = hashlib.sha256(b'absent').hexdigest()
+
+
+class ChecksumApiTests(TestCase):
+    """Test looking up and referencing stored bytes by checksum"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@example.com',
+            'testpass'
+        )
+        self.client.force_authenticate(self.user)
+        self.index = ChecksumFilter()
+        patcher = patch('manager.presence.index', self.index)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.resultfile = sample_resultfile(content=CONTENT)
+
+    def test_lookup(self):
+        """Test stored and missing checksums are told apart in request order"""
+        res = self.client.post(CHECKSUMS_URL, {'checksums': [ABSENT, CHECKSUM]}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {'stored': [CHECKSUM], 'missing': [ABSENT]})
+
+    def test_lookup_follows_changes(self):
+        """Test rows created or deleted after the filter is loaded are taken into account"""
+        self.client.post(CHECKSUMS_URL, {'checksums': [CHECKSUM]}, format='json')
+        other = sample_resultfile(nuwroversion='v2.0', content='0 5\n')
+        self.resultfile.delete()
+
+        res = self.client.post(CHECKSUMS_URL, {'checksums': [CHECKSUM, other.checksum]}, format='json')
+
+        self.assertEqual(res.data, {'stored': [other.checksum], 'missing': [CHECKSUM]})
+
+    def test_absent_answered_from_memory(self):
+        """Test absent checksums are not looked up in the database"""
+        self.assertEqual(self.index.maybe_stored([CHECKSUM]), [True])
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.index.stored([ABSENT]), set())
+
+    def test_invalid_checksum(self):
+        res = self.client.post(CHECKSUMS_URL, {'checksums': ['abc']}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_create_resultfile_from_checksum(self):
+        """Test a resultfile is created from stored bytes without an upload"""
+        payload = {
+            'experiment': self.resultfile.experiment_id,
+            'measurement': self.resultfile.measurement_id,
+            'nuwroversion': self.resultfile.nuwroversion_id,
+            'existing_checksum': CHECKSUM,
+        }
+
+        res = self.client.post(RESULTFILES_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        resultfile = Resultfile.objects.get(pk=res.data['id'])
+        self.assertEqual(resultfile.result_file.name, self.resultfile.result_file.name)
+        self.assertEqual(resultfile.filename, self.resultfile.filename)
+        self.assertEqual((resultfile.checksum, resultfile.size), (CHECKSUM, len(CONTENT)))
+        self.assertEqual(resultfile.bins, 2)
+
+    def test_create_resultfile_from_checksum_validates_columns(self):
+        """Test stored bytes are only referenced as a resultfile of the right dimension"""
+        payload = {
+            'experiment': self.resultfile.experiment_id,
+            'measurement': self.resultfile.measurement_id,
+            'nuwroversion': self.resultfile.nuwroversion_id,
+            'existing_checksum': CHECKSUM,
+            'is_3d': True,
+        }
+
+        res = self.client.post(RESULTFILES_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('existing_checksum', res.data)
+
+    def test_create_artifact_from_checksum(self):
+        """Test an artifact is created from stored bytes without an upload"""
+        payload = {
+            'resultfile': self.resultfile.id,
+            'filename': 'copy.txt',
+            'existing_checksum': CHECKSUM,
+        }
+
+        res = self.client.post(ARTIFACTS_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        artifact = Artifact.objects.get(pk=res.data['id'])
+        self.assertEqual(artifact.artifact.name, self.resultfile.result_file.name)
+        self.assertEqual(artifact.checksum, CHECKSUM)
+
+    def test_unknown_checksum(self):
+        """Test referencing bytes that are not stored fails"""
+        payload = {
+            'experiment': self.resultfile.experiment_id,
+            'measurement': self.resultfile.measurement_id,
+            'nuwroversion': self.resultfile.nuwroversion_id,
+            'existing_checksum': ABSENT,
+        }
+
+        res = self.client.post(RESULTFILES_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('existing_checksum', res.data)
+
+    def test_shared_file_deleted_with_last_row(self):
+        """Test a shared file is kept until no row references it"""
+        copy = Resultfile.objects.create(
+            experiment=self.resultfile.experiment,
+            measurement=self.resultfile.measurement,
+            nuwroversion=self.resultfile.nuwroversion,
+            filename='copy.txt',
+            result_file=self.resultfile.result_file.name
+        )
+        path = self.resultfile.result_file.path
+
+        self.resultfile.delete()
+        self.assertTrue(os.path.exists(path))
+
+        copy.delete()
+        self.assertFalse(os.path.exists(path))
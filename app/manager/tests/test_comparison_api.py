@@ -0,0 +1,94 @@
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Experiment, Measurement, Nuwroversion, Resultfile
+
+
+def compare_url(nuwroversion_id):
+    return reverse('manager:nuwroversion-compare', args=[nuwroversion_id])
+
+
+class ComparisonApiTests(TestCase):
+    """Test comparing the resultfiles of two nuwroversions"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@example.com',
+            'testpass'
+        )
+        self.client.force_authenticate(self.user)
+        self.old = Nuwroversion.objects.create(name='v1.0')
+        self.new = Nuwroversion.objects.create(name='v2.0')
+        self.minerva = Experiment.objects.create(name='MINERvA')
+        self.cc0pi = Measurement.objects.create(name='CC0pi')
+        self.ccqe = Measurement.objects.create(name='CCQE')
+
+    def create(self, nuwroversion, measurement, content, experiment=None):
+        return Resultfile.objects.create(
+            experiment=experiment or self.minerva,
+            measurement=measurement,
+            nuwroversion=nuwroversion,
+            filename='result.txt',
+            result_file=SimpleUploadedFile('result.txt', content.encode())
+        )
+
+    def test_compare(self):
+        """Test pairs are compared bin by bin and ranked by deviation"""
+        old_cc0pi = self.create(self.old, self.cc0pi, '0 1\n1 2\n2 4\n')
+        new_cc0pi = self.create(self.new, self.cc0pi, '0 1.1\n2 4.4\n')
+        self.create(self.old, self.ccqe, '0 1\n1 1\n')
+        new_ccqe = self.create(self.new, self.ccqe, '0 2\n1 2\n')
+        unpaired = self.create(self.new, self.cc0pi, '0 1\n', experiment=Experiment.objects.create(name='T2K'))
+
+        res = self.client.get(compare_url(self.new.id), {'base': self.old.id, 'bins': 'true'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['base']['name'], 'v1.0')
+        first, second = res.data['pairs']
+        self.assertEqual(first['resultfile'], new_ccqe.id)
+        self.assertEqual(first['max_deviation'], 1.0)
+        self.assertEqual(second['resultfile'], new_cc0pi.id)
+        self.assertEqual(second['base_resultfile'], old_cc0pi.id)
+        self.assertAlmostEqual(second['max_deviation'], 0.375)
+        self.assertAlmostEqual(second['max_difference'], 0.75)
+        self.assertEqual(second['x'], [0.0, 1.0, 2.0])
+        self.assertEqual(len(second['ratio']), 3)
+        self.assertEqual(res.data['unpaired'], [unpaired.id])
+
+    def test_compare_cached_until_files_change(self):
+        """Test the comparison is cached until a file of either version changes"""
+        self.create(self.old, self.cc0pi, '0 1\n1 2\n')
+        self.create(self.new, self.cc0pi, '0 1\n1 3\n')
+        url = compare_url(self.new.id)
+
+        self.client.get(url, {'base': self.old.id})
+        res = self.client.get(url, {'base': self.old.id})
+        self.assertEqual(res['X-Cache'], 'HIT')
+
+        latest = self.create(self.new, self.cc0pi, '0 1\n1 4\n')
+        res = self.client.get(url, {'base': self.old.id})
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(res.data['pairs'][0]['resultfile'], latest.id)
+        self.assertEqual(res.data['pairs'][0]['max_deviation'], 1.0)
+
+    def test_compare_reports_invalid_files(self):
+        """Test files that are no result table are left out"""
+        invalid = self.create(self.new, self.cc0pi, 'garbage\n')
+
+        res = self.client.get(compare_url(self.new.id), {'base': self.old.id})
+
+        self.assertEqual(res.data['pairs'], [])
+        self.assertEqual(res.data['invalid'], [invalid.id])
+
+    def test_compare_requires_other_base(self):
+        """Test a version cannot be compared with itself"""
+        res = self.client.get(compare_url(self.new.id), {'base': self.new.id})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,97 @@
+import io
+import json
+import struct
+
+import numpy as np
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.tests.test_models import sample_resultfile
+
+
+CONTENT = '''# x value error
+0 1.5 0.1
+1 2.5 0.2
+2 3.5 0.3
+'''
+
+TABLE = [[0, 1.5, 0.1], [1, 2.5, 0.2], [2, 3.5, 0.3]]
+
+
+def data_url(resultfile_id):
+    return reverse('manager:resultfile-data', args=[resultfile_id])
+
+
+class DataApiTests(TestCase):
+    """Test downloading the parsed data of resultfiles"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@example.com',
+            'testpass'
+        )
+        self.client.force_authenticate(self.user)
+        self.resultfile = sample_resultfile(content=CONTENT)
+
+    def test_json_by_default(self):
+        """Test the table is returned as JSON without an Accept header"""
+        res = self.client.get(data_url(self.resultfile.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['columns'], ['x', 'value', 'error'])
+        self.assertEqual(res.data['data'], TABLE)
+
+    def test_npy(self):
+        """Test the stored table is sent as a .npy file"""
+        res = self.client.get(data_url(self.resultfile.id), HTTP_ACCEPT='application/x-npy')
+        content = b''.join(res.streaming_content)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/x-npy')
+        self.assertEqual(int(res['Content-Length']), len(content))
+        np.testing.assert_array_equal(np.load(io.BytesIO(content)), TABLE)
+
+    def test_raw(self):
+        """Test the raw buffer is preceded by its JSON header"""
+        res = self.client.get(data_url(self.resultfile.id), {'format': 'raw'})
+        content = b''.join(res.streaming_content)
+
+        length, = struct.unpack('<I', content[:4])
+        header = json.loads(content[4:4 + length].decode())
+        values = np.frombuffer(content[4 + length:], dtype=header['dtype']).reshape(header['shape'])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(int(res['Content-Length']), len(content))
+        self.assertEqual(header['columns'], ['x', 'value', 'error'])
+        np.testing.assert_array_equal(values, TABLE)
+
+    def test_csv(self):
+        """Test the table is sent as CSV with a header row"""
+        res = self.client.get(data_url(self.resultfile.id), HTTP_ACCEPT='text/csv')
+        lines = res.content.decode().splitlines()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(lines[0], 'x,value,error')
+        self.assertEqual([[float(v) for v in line.split(',')] for line in lines[1:]], TABLE)
+
+    def test_invalid_file(self):
+        """Test an unparsable file returns an error as JSON"""
+        resultfile = sample_resultfile(content='0 abc\n')
+
+        res = self.client.get(data_url(resultfile.id), HTTP_ACCEPT='application/x-npy')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res['Content-Type'], 'application/json')
+        self.assertIn('detail', json.loads(res.content.decode()))
+
+    def test_unsupported_format(self):
+        """Test an unsupported Accept header is refused"""
+        res = self.client.get(data_url(self.resultfile.id), HTTP_ACCEPT='image/png')
+
+        self.assertEqual(res.status_code, status.HTTP_406_NOT_ACCEPTABLE)
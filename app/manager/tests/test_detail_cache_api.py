@@ -0,0 +1,144 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import ChangeEvent, Resultfile
+from core.tests.test_models import sample_resultfile, sample_artifact
+from manager import cache
+
+
+def resultfile_url(resultfile_id):
+    return reverse('manager:resultfile-detail', args=[resultfile_id])
+
+
+def artifact_url(artifact_id):
+    return reverse('manager:artifact-detail', args=[artifact_id])
+
+
+class DetailCacheApiTests(TestCase):
+    """Test the cache of resultfile and artifact detail responses"""
+
+    def setUp(self):
+        cache.reset_stats()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@example.com',
+            'testpass'
+        )
+        self.client.force_authenticate(self.user)
+        self.resultfile = sample_resultfile()
+
+    def test_repeated_retrieve_is_cached(self):
+        """Test the second retrieve is served from the cache without queries"""
+        res = self.client.get(resultfile_url(self.resultfile.id))
+        self.assertEqual(res['X-Cache'], 'MISS')
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(resultfile_url(self.resultfile.id))
+
+        self.assertEqual(cached.status_code, status.HTTP_200_OK)
+        self.assertEqual(cached['X-Cache'], 'HIT')
+        self.assertEqual(cached.data, res.data)
+        self.assertEqual(cache.get_stats(), {'hits': 1, 'misses': 1})
+
+    def test_query_parameters_are_cached_separately(self):
+        """Test sparse representations do not share an entry"""
+        self.client.get(resultfile_url(self.resultfile.id))
+
+        res = self.client.get(resultfile_url(self.resultfile.id), {'fields': 'id'})
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(set(res.data), {'id'})
+
+    def test_update_invalidates(self):
+        """Test updating the resultfile drops its cached representation"""
+        self.client.get(resultfile_url(self.resultfile.id))
+
+        self.client.patch(resultfile_url(self.resultfile.id), {'description': 'Changed'})
+        res = self.client.get(resultfile_url(self.resultfile.id))
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(res.data['description'], 'Changed')
+
+    def test_lookup_rename_invalidates(self):
+        """Test renaming an experiment drops the resultfiles showing it"""
+        self.client.get(resultfile_url(self.resultfile.id))
+
+        experiment = self.resultfile.experiment
+        experiment.name = 'T2K'
+        experiment.save()
+        res = self.client.get(resultfile_url(self.resultfile.id))
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+
+    def test_bulk_update_invalidates(self):
+        """Test updates recorded in the change feed without saving invalidate"""
+        self.client.get(resultfile_url(self.resultfile.id))
+
+        Resultfile.objects.filter(pk=self.resultfile.pk).update(description='Changed')
+        ChangeEvent.record(ChangeEvent.RESULTFILE, self.resultfile.pk, ChangeEvent.UPDATED)
+        res = self.client.get(resultfile_url(self.resultfile.id))
+
+        self.assertEqual(res.data['description'], 'Changed')
+
+    def test_artifact_changes_invalidate_resultfile(self):
+        """Test adding or deleting an artifact updates the artifact count"""
+        self.client.get(resultfile_url(self.resultfile.id))
+
+        artifact = sample_artifact(self.resultfile)
+        res = self.client.get(resultfile_url(self.resultfile.id))
+        self.assertEqual(res.data['artifact_count'], 1)
+
+        artifact.delete()
+        res = self.client.get(resultfile_url(self.resultfile.id))
+        self.assertEqual(res.data['artifact_count'], 0)
+
+    def test_resultfile_change_invalidates_artifact(self):
+        """Test artifacts embedding a changed resultfile are recomputed"""
+        artifact = sample_artifact(self.resultfile)
+        self.client.get(artifact_url(artifact.id))
+        res = self.client.get(artifact_url(artifact.id))
+        self.assertEqual(res['X-Cache'], 'HIT')
+
+        sample_artifact(self.resultfile, filename='art2.txt')
+        res = self.client.get(artifact_url(artifact.id))
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(res.data['resultfile']['artifact_count'], 2)
+
+    def test_missing_object_is_not_cached(self):
+        """Test a missing object is reported every time"""
+        res = self.client.get(resultfile_url(self.resultfile.id + 1))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_stats_command(self):
+        """Test the command reports the counters"""
+        self.client.get(resultfile_url(self.resultfile.id))
+        self.client.get(resultfile_url(self.resultfile.id))
+        out = StringIO()
+
+        call_command('detail_cache_stats', '--reset', stdout=out)
+
+        self.assertIn('detail: 1 hits, 1 misses (50.0% hit rate)', out.getvalue())
+        self.assertEqual(cache.get_stats(), {'hits': 0, 'misses': 0})
+
+    def test_computed_results_counted_separately(self):
+        """Test the computed-result cache does not change the detail counters"""
+        self.client.get(resultfile_url(self.resultfile.id))
+        for _ in range(3):
+            cache.get_computed('test', ('stats',), lambda: {'value': 1})
+        out = StringIO()
+
+        call_command('detail_cache_stats', stdout=out)
+
+        self.assertEqual(cache.get_stats(), {'hits': 0, 'misses': 1})
+        self.assertEqual(cache.get_stats('computed'), {'hits': 2, 'misses': 1})
+        self.assertIn('detail: 0 hits, 1 misses (0.0% hit rate)', out.getvalue())
+        self.assertIn('computed: 2 hits, 1 misses (66.7% hit rate)', out.getvalue())
@@ -0,0 +1,83 @@
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Experiment, Measurement, Nuwroversion, Resultfile
+
+
+ENVELOPE_URL = reverse('manager:resultfile-envelope')
+
+
+class EnvelopeApiTests(TestCase):
+    """Test the band of a measurement across nuwroversions"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@example.com',
+            'testpass'
+        )
+        self.client.force_authenticate(self.user)
+        self.experiment = Experiment.objects.create(name='MINERvA')
+        self.measurement = Measurement.objects.create(name='CC0pi')
+        self.query = {'experiment': self.experiment.id, 'measurement': self.measurement.id}
+
+    def create(self, version, content):
+        return Resultfile.objects.create(
+            experiment=self.experiment,
+            measurement=self.measurement,
+            nuwroversion=Nuwroversion.objects.create(name=version),
+            filename='result.txt',
+            result_file=SimpleUploadedFile('result.txt', content.encode())
+        )
+
+    def test_envelope_same_bins(self):
+        """Test curves sharing their bins are reduced without resampling"""
+        self.create('v1.0', '0 1\n1 2\n')
+        self.create('v2.0', '0 3\n1 2\n')
+
+        res = self.client.get(ENVELOPE_URL, self.query)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['x'], [0.0, 1.0])
+        self.assertEqual(res.data['min'], [1.0, 2.0])
+        self.assertEqual(res.data['max'], [3.0, 2.0])
+        self.assertEqual(res.data['mean'], [2.0, 2.0])
+        self.assertEqual(res.data['std'], [1.0, 0.0])
+        self.assertEqual([r['nuwroversion'] for r in res.data['resultfiles']], ['v1.0', 'v2.0'])
+
+    def test_envelope_different_bins(self):
+        """Test curves with different bins are resampled onto one grid"""
+        self.create('v1.0', '0 0\n2 2\n')
+        self.create('v2.0', '1 3\n2 3\n')
+
+        res = self.client.get(ENVELOPE_URL, dict(self.query, points=3))
+
+        self.assertEqual(res.data['x'], [0.0, 1.0, 2.0])
+        self.assertEqual(res.data['min'], [0.0, 1.0, 2.0])
+        self.assertEqual(res.data['max'], [0.0, 3.0, 3.0])
+        self.assertEqual(res.data['count'], [1, 2, 2])
+
+    def test_envelope_cached_until_upload(self):
+        """Test a new upload invalidates the cached band"""
+        self.create('v1.0', '0 1\n1 2\n')
+        self.client.get(ENVELOPE_URL, self.query)
+        res = self.client.get(ENVELOPE_URL, self.query)
+        self.assertEqual(res['X-Cache'], 'HIT')
+
+        self.create('v2.0', '0 5\n1 5\n')
+        res = self.client.get(ENVELOPE_URL, self.query)
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(res.data['max'], [5.0, 5.0])
+
+    def test_envelope_without_files(self):
+        """Test a measurement without results has an empty band"""
+        res = self.client.get(ENVELOPE_URL, self.query)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['x'], [])
@@ -0,0 +1,128 @@
+import json
+
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import ChangeEvent
+from core.tests.test_models import sample_resultfile
+from manager.events import QUEUE_SIZE, EventBroker
+
+
+EVENTS_URL = reverse('manager:events')
+
+
+def parse_events(text):
+    """Return the id, type and data of the server-sent events in `text`"""
+    events = []
+    for block in text.split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines() if not line.startswith(':'))
+        if 'data' in fields:
+            events.append((int(fields['id']), fields['event'], json.loads(fields['data'])))
+    return events
+
+
+class PublicEventsApiTests(TestCase):
+    """Test unauthenticated event stream access"""
+
+    def test_auth_required(self):
+        res = APIClient().get(EVENTS_URL, HTTP_ACCEPT='text/event-stream')
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateEventsApiTests(TestCase):
+    """Test the server-sent events of the change feed"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@example.com',
+            'testpass'
+        )
+        self.client.force_authenticate(self.user)
+        self.broker = EventBroker()
+        self.broker.start = lambda: None
+        patcher = patch('manager.events.broker', self.broker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @override_settings(EVENTS_STREAM_TIMEOUT=0)
+    def test_resume_after_last_event_id(self):
+        """Test the changes after the Last-Event-ID are replayed"""
+        resultfile = sample_resultfile()
+        resultfile_id = resultfile.id
+        cursor = ChangeEvent.objects.latest('id').id
+        resultfile.delete()
+
+        res = self.client.get(EVENTS_URL, HTTP_ACCEPT='text/event-stream', HTTP_LAST_EVENT_ID=str(cursor))
+        events = parse_events(b''.join(res.streaming_content).decode())
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'text/event-stream')
+        self.assertEqual(res['X-Accel-Buffering'], 'no')
+        self.assertEqual(events, [(
+            cursor + 1,
+            'resultfile',
+            {
+                'id': cursor + 1,
+                'kind': 'resultfile',
+                'object_id': resultfile_id,
+                'action': 'deleted',
+                'timestamp': ChangeEvent.objects.get(pk=cursor + 1).timestamp.isoformat(),
+            }
+        )])
+        self.assertFalse(self.broker.subscriptions)
+
+    @override_settings(EVENTS_STREAM_TIMEOUT=0)
+    def test_ticket_in_query(self):
+        """Test clients unable to set headers authenticate with a ticket"""
+        ticket = self.client.post(reverse('manager:events-ticket')).data['ticket']
+
+        res = APIClient().get(EVENTS_URL, {'ticket': ticket}, HTTP_ACCEPT='text/event-stream')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    @override_settings(EVENTS_TICKET_EXPIRY=-1)
+    def test_expired_ticket(self):
+        """Test an expired ticket is refused"""
+        ticket = self.client.post(reverse('manager:events-ticket')).data['ticket']
+
+        res = APIClient().get(EVENTS_URL, {'ticket': ticket}, HTTP_ACCEPT='text/event-stream')
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_invalid_cursor(self):
+        res = self.client.get(EVENTS_URL, {'since': 'x'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_new_changes_pushed(self):
+        """Test changes recorded after the replay are pushed, even before the broker first fetched"""
+        res = self.client.get(EVENTS_URL, HTTP_ACCEPT='text/event-stream')
+        stream = iter(res.streaming_content)
+        self.assertTrue(next(stream).startswith(b'retry:'))
+
+        resultfile = sample_resultfile()
+        self.broker.fetch()
+        events = parse_events(next(stream).decode())
+
+        self.assertEqual([(kind, data['object_id'], data['action']) for _, kind, data in events],
+                         [('resultfile', resultfile.id, 'created')])
+        res.close()
+        self.assertFalse(self.broker.subscriptions)
+
+    def test_slow_subscription_dropped(self):
+        """Test a subscription that falls too far behind is dropped"""
+        subscription = self.broker.subscribe()
+
+        for _ in range(QUEUE_SIZE + 1):
+            self.broker.publish([])
+
+        self.assertTrue(subscription.overflowed)
+        self.assertFalse(self.broker.subscriptions)
@@ -0,0 +1,100 @@
+import json
+
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.tests.test_models import sample_resultfile, sample_artifact
+
+
+EXPORT_URL = reverse('manager:export')
+
+
+def read_lines(response):
+    """Return the records of a streamed NDJSON response"""
+    content = b''.join(response.streaming_content).decode()
+    return [json.loads(line) for line in content.splitlines()]
+
+
+class PublicExportApiTests(TestCase):
+    """Test unauthenticated export API access"""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        """Test that authentication is required"""
+        res = self.client.get(EXPORT_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateExportApiTests(TestCase):
+    """Test authenticated export API access"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@example.com',
+            'testpass'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_full_export(self):
+        """Test every row is exported with its related names"""
+        resultfile = sample_resultfile()
+        artifact = sample_artifact(resultfile)
+
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        records = read_lines(res)
+        self.assertEqual([r['type'] for r in records], ['resultfile', 'artifact', 'cursor'])
+        self.assertEqual(records[0]['id'], resultfile.id)
+        self.assertEqual(records[0]['experiment'], 'MINERvA')
+        self.assertEqual(records[0]['nuwroversion'], 'v1.0')
+        self.assertEqual(records[1]['id'], artifact.id)
+        self.assertEqual(records[1]['resultfile'], resultfile.filename)
+
+    def test_export_statistics(self):
+        """Test the summary statistics of resultfiles are exported"""
+        sample_resultfile(content='0 1\n1 3\n')
+
+        records = read_lines(self.client.get(EXPORT_URL))
+
+        self.assertEqual(records[0]['bins'], 2)
+        self.assertEqual((records[0]['x_min'], records[0]['x_max']), (0, 1))
+        self.assertEqual(records[0]['maximum'], 3)
+
+    def test_incremental_export(self):
+        """Test only changes and deletions after the cursor are exported"""
+        kept = sample_resultfile()
+        deleted = sample_resultfile(experiment='T2K', filename='old.txt')
+        deleted_id = deleted.id
+        cursor = read_lines(self.client.get(EXPORT_URL))[-1]['cursor']
+
+        deleted.delete()
+        added = sample_resultfile(experiment='MicroBooNE', filename='new.txt')
+
+        records = read_lines(self.client.get(EXPORT_URL, {'since': cursor}))
+
+        self.assertEqual(records[0]['id'], added.id)
+        self.assertNotIn(kept.id, [r.get('id') for r in records if r['type'] == 'resultfile'])
+        self.assertIn({'type': 'deleted', 'kind': 'resultfile', 'id': deleted_id}, records)
+        self.assertGreater(records[-1]['cursor'], cursor)
+
+    def test_export_command(self):
+        """Test the export command writes the same lines"""
+        sample_resultfile()
+        out = StringIO()
+
+        call_command('export_catalog', stdout=out)
+
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([r['type'] for r in records], ['resultfile', 'cursor'])
@@ -0,0 +1,84 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.tests.test_models import sample_resultfile
+
+
+GRID_CONTENT = '''# x y value error
+0 0 1 0.1
+0 1 2 0.1
+1 0 3 0.1
+1 1 4 0.1
+'''
+
+
+def action_url(name, resultfile_id):
+    return reverse(f'manager:resultfile-{name}', args=[resultfile_id])
+
+
+class GridApiTests(TestCase):
+    """Test projections, slices and integrals of 3D resultfiles"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@example.com',
+            'testpass'
+        )
+        self.client.force_authenticate(self.user)
+        self.resultfile = sample_resultfile(content=GRID_CONTENT, is_3d=True)
+
+    def test_projection(self):
+        """Test projecting onto an axis"""
+        res = self.client.get(action_url('projection', self.resultfile.id), {'axis': 'y'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['axis'], 'y')
+        self.assertEqual(res.data['y'], [0.0, 1.0])
+        self.assertEqual(res.data['values'], [4.0, 6.0])
+
+    def test_projection_cached(self):
+        """Test the result is cached per operation and query"""
+        url = action_url('projection', self.resultfile.id)
+        self.client.get(url, {'axis': 'x'})
+
+        with self.assertNumQueries(0):
+            res = self.client.get(url, {'axis': 'x'})
+        other = self.client.get(url, {'axis': 'y'})
+
+        self.assertEqual(res['X-Cache'], 'HIT')
+        self.assertEqual(other['X-Cache'], 'MISS')
+
+    def test_slice(self):
+        """Test slicing at a bin"""
+        res = self.client.get(action_url('slice', self.resultfile.id), {'axis': 'x', 'bin': 1})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['at'], 1.0)
+        self.assertEqual(res.data['y'], [0.0, 1.0])
+        self.assertEqual(res.data['values'], [3.0, 4.0])
+
+    def test_slice_bin_out_of_range(self):
+        """Test slicing past the last bin is rejected"""
+        res = self.client.get(action_url('slice', self.resultfile.id), {'axis': 'x', 'bin': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_integral(self):
+        """Test integrating a sub-range"""
+        res = self.client.get(action_url('integral', self.resultfile.id), {'x_min': 1})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['value'], 7.0)
+
+    def test_1d_rejected(self):
+        """Test 1D resultfiles have no projections"""
+        resultfile = sample_resultfile(content='0 1\n')
+
+        res = self.client.get(action_url('projection', resultfile.id), {'axis': 'x'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,74 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.tests.test_models import sample_resultfile
+
+
+OVERLAY_URL = reverse('manager:resultfile-overlay')
+
+
+class OverlayApiTests(TestCase):
+    """Test overlaying resultfiles on a common grid"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@example.com',
+            'testpass'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_overlay(self):
+        """Test curves with different binning are resampled to one grid"""
+        coarse = sample_resultfile(content='0 0\n2 20\n4 40\n')
+        fine = sample_resultfile(nuwroversion='v2.0', content='1 10 1\n2 20 2\n3 30 3\n')
+
+        res = self.client.get(OVERLAY_URL, {'ids': f'{coarse.id},{fine.id}', 'points': 5})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['x'], [0.0, 1.0, 2.0, 3.0, 4.0])
+        first, second = res.data['curves']
+        self.assertEqual(first['id'], coarse.id)
+        self.assertEqual(first['values'], [0.0, 10.0, 20.0, 30.0, 40.0])
+        self.assertIsNone(first['errors'])
+        self.assertEqual(second['nuwroversion'], 'v2.0')
+        self.assertEqual(second['values'], [None, 10.0, 20.0, 30.0, None])
+        self.assertEqual(second['errors'], [None, 1.0, 2.0, 3.0, None])
+
+    def test_overlay_range(self):
+        """Test the grid can be limited to a range"""
+        resultfile = sample_resultfile(content='0 0\n4 40\n')
+
+        res = self.client.get(OVERLAY_URL, {'ids': resultfile.id, 'points': 3, 'x_min': 1, 'x_max': 3})
+
+        self.assertEqual(res.data['x'], [1.0, 2.0, 3.0])
+        self.assertEqual(res.data['curves'][0]['values'], [10.0, 20.0, 30.0])
+
+    def test_overlay_unknown_id(self):
+        """Test unknown resultfiles are reported"""
+        resultfile = sample_resultfile(content='0 0\n4 40\n')
+
+        res = self.client.get(OVERLAY_URL, {'ids': f'{resultfile.id},{resultfile.id + 1}'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_overlay_malformed_file(self):
+        """Test a file that is not a result table is reported"""
+        resultfile = sample_resultfile(content='not a table\n')
+
+        res = self.client.get(OVERLAY_URL, {'ids': resultfile.id})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(f'Resultfile {resultfile.id}', res.data['detail'])
+
+    def test_overlay_rejects_3d(self):
+        """Test 3D resultfiles cannot be overlaid"""
+        resultfile = sample_resultfile(content='0 0 1\n', is_3d=True)
+
+        res = self.client.get(OVERLAY_URL, {'ids': resultfile.id})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
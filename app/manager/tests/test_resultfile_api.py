@@ -1,9 +1,12 @@
+import hashlib
 import os
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.db.models import Count
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.core.files import File
+from django.core.files.uploadedfile import SimpleUploadedFile
 
 from rest_framework import status
 from rest_framework.test import APIClient
@@ -15,6 +18,7 @@ from manager.serializers import (
     ResultfileDetailSerializer
 )
 from core.models import (
+    Artifact,
     Experiment,
     Measurement,
     Nuwroversion,
@@ -42,6 +46,14 @@ def detail_url(resultfile_id):
     return reverse('manager:resultfile-detail', args=[resultfile_id])
 
 
+UPLOAD_URL = reverse('manager:resultfile-upload-url')
+
+
+def download_url(resultfile_id):
+    """Return a resultfile download url"""
+    return reverse('manager:resultfile-download', args=[resultfile_id])
+
+
 def sample_experiment(name='MINERvA'):
     """Create and return the sample experiment"""
     return Experiment.objects.create(name=name)
@@ -102,7 +114,7 @@ class PrivateResultfileApiTests(TestCase):
         sample_resultfile()
 
         res = self.client.get(RESULTFILES_URL)
-        resultfiles = Resultfile.objects.all()
+        resultfiles = Resultfile.objects.annotate(artifact_count=Count('artifacts'))
         serializer = ResultfileListSerializer(resultfiles, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
@@ -113,8 +125,7 @@ class PrivateResultfileApiTests(TestCase):
         experiment = sample_experiment()
         measurement = sample_measurement()
         nuwroversion = sample_nuwroversion()
-        file_mock = MagicMock(spec=File)
-        file_mock.name = 'test_result.txt'
+        result_file = SimpleUploadedFile('test_result.txt', b'0 0 1\n0 1 2\n')
 
         payload = {
             'experiment': experiment.id,
@@ -122,8 +133,8 @@ class PrivateResultfileApiTests(TestCase):
             'nuwroversion': nuwroversion.id,
             'is_3d': True,
             'description': 'Test description',
-            'filename': file_mock.name,
-            'result_file': file_mock,
+            'filename': result_file.name,
+            'result_file': result_file,
         }
 
         res = self.client.post(RESULTFILES_URL, payload)
@@ -139,6 +150,281 @@ class PrivateResultfileApiTests(TestCase):
         resultfile = sample_resultfile()
         url = detail_url(resultfile.id)
         res = self.client.get(url)
-        serializer = ResultfileDetailSerializer(resultfile)
+        serializer = ResultfileDetailSerializer(
+            Resultfile.objects.annotate(artifact_count=Count('artifacts')).get(pk=resultfile.pk)
+        )
 
         self.assertEqual(res.data, serializer.data)
+
+    def test_download_resultfile_streams_file(self):
+        """Test downloading a resultfile streams it from Django"""
+        resultfile = sample_resultfile()
+        res = self.client.get(download_url(resultfile.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertIn('attachment', res['Content-Disposition'])
+
+    @override_settings(MEDIA_ACCEL_REDIRECT_URL='/protected-media/')
+    def test_download_resultfile_hands_over_to_nginx(self):
+        """Test downloading a resultfile behind nginx uses X-Accel-Redirect"""
+        resultfile = sample_resultfile()
+        res = self.client.get(download_url(resultfile.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res['X-Accel-Redirect'],
+            '/protected-media/' + resultfile.result_file.name
+        )
+        self.assertEqual(res.content, b'')
+
+    def test_retrieve_resultfiles_single_query(self):
+        """Test listing resultfiles joins the nested objects in one query"""
+        sample_resultfile()
+        sample_resultfile(filename='test2.txt')
+
+        with self.assertNumQueries(1):
+            res = self.client.get(RESULTFILES_URL)
+
+        self.assertEqual(len(res.data), 2)
+        self.assertEqual(res.data[0]['experiment']['name'], 'MINERvA')
+
+    def test_retrieve_resultfiles_sparse_fields(self):
+        """Test listing resultfiles with only the requested fields"""
+        sample_resultfile()
+
+        res = self.client.get(RESULTFILES_URL, {'fields': 'id,filename'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(res.data[0]), {'id', 'filename'})
+
+    def test_view_resultfile_detail_sparse_fields(self):
+        """Test viewing a resultfile detail with only the requested fields"""
+        resultfile = sample_resultfile()
+
+        res = self.client.get(detail_url(resultfile.id), {'fields': 'id,experiment'})
+
+        self.assertEqual(set(res.data), {'id', 'experiment'})
+        self.assertEqual(res.data['experiment']['name'], 'MINERvA')
+
+    def test_create_resultfile_fixed_queries(self):
+        """Test creating a resultfile validates and writes the row once"""
+        experiment = sample_experiment()
+        measurement = sample_measurement()
+        nuwroversion = sample_nuwroversion()
+        payload = {
+            'experiment': experiment.id,
+            'measurement': measurement.id,
+            'nuwroversion': nuwroversion.id,
+            'result_file': SimpleUploadedFile('test_result.txt', b'0 1\n1 2\n'),
+        }
+
+        # three lookups, the resultfile insert and its change feed entry
+        with self.assertNumQueries(5):
+            res = self.client.post(RESULTFILES_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        resultfile = Resultfile.objects.get(pk=res.data['id'])
+        self.assertEqual(resultfile.link, resultfile.result_file.url)
+        self.assertEqual(res.data['link'], resultfile.link)
+
+    def test_retrieve_resultfiles_expand_artifacts(self):
+        """Test listing resultfiles with artifacts embedded and counted"""
+        resultfile = sample_resultfile()
+        sample_resultfile(filename='test2.txt')
+        for filename in ('b.png', 'a.png'):
+            Artifact.objects.create(resultfile=resultfile, filename=filename, artifact=resultfile.result_file)
+
+        # the resultfiles with their artifact count and the prefetched artifacts
+        with self.assertNumQueries(2):
+            res = self.client.get(RESULTFILES_URL, {'expand': 'artifacts'})
+
+        data = {item['id']: item for item in res.data}
+        self.assertEqual(data[resultfile.id]['artifact_count'], 2)
+        self.assertEqual(
+            sorted(a['filename'] for a in data[resultfile.id]['artifacts']),
+            ['a.png', 'b.png']
+        )
+        self.assertEqual([item['artifact_count'] for item in res.data], [0, 2])
+
+    def test_unannotated_artifact_count(self):
+        """Test resultfiles without the annotation are still counted, with a warning"""
+        resultfile = sample_resultfile()
+        Artifact.objects.create(resultfile=resultfile, filename='a.png', artifact=resultfile.result_file)
+
+        with self.assertWarns(RuntimeWarning):
+            data = ResultfileListSerializer(Resultfile.objects.get(pk=resultfile.pk)).data
+
+        self.assertEqual(data['artifact_count'], 1)
+
+    def test_view_resultfile_detail_expand_artifacts(self):
+        """Test viewing a resultfile detail with its artifacts embedded"""
+        resultfile = sample_resultfile()
+        Artifact.objects.create(resultfile=resultfile, filename='a.png', artifact=resultfile.result_file)
+
+        res = self.client.get(detail_url(resultfile.id), {'expand': 'artifacts'})
+
+        self.assertEqual(res.data['artifact_count'], 1)
+        self.assertEqual(res.data['artifacts'][0]['filename'], 'a.png')
+
+    def test_create_resultfile_from_direct_upload(self):
+        """Test creating a resultfile from a file uploaded to the storage"""
+        payload = {
+            'experiment': sample_experiment().id,
+            'measurement': sample_measurement().id,
+            'nuwroversion': sample_nuwroversion().id,
+        }
+        res = self.client.post(UPLOAD_URL, dict(payload, filename='direct.txt'))
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        upload = self.client.put(res.data['url'], b'1 2\n', content_type='application/octet-stream')
+        self.assertEqual(upload.status_code, status.HTTP_200_OK)
+
+        res = self.client.post(RESULTFILES_URL, dict(payload, upload_token=res.data['upload_token']))
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        resultfile = Resultfile.objects.get(pk=res.data['id'])
+        self.assertEqual(resultfile.filename, 'direct.txt')
+        self.assertEqual(resultfile.checksum, hashlib.sha256(b'1 2\n').hexdigest())
+        self.assertEqual(resultfile.size, 4)
+        self.assertEqual(resultfile.result_file.read(), b'1 2\n')
+
+    def test_create_resultfile_from_invalid_direct_upload(self):
+        """Test a direct upload that is no result table is rejected"""
+        payload = {
+            'experiment': sample_experiment().id,
+            'measurement': sample_measurement().id,
+            'nuwroversion': sample_nuwroversion().id,
+        }
+        res = self.client.post(UPLOAD_URL, dict(payload, filename='direct.txt'))
+        self.client.put(res.data['url'], b'1 2 3 4 5\n', content_type='application/octet-stream')
+
+        res = self.client.post(RESULTFILES_URL, dict(payload, upload_token=res.data['upload_token']))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('upload_token', res.data)
+        self.assertFalse(Resultfile.objects.exists())
+
+    def test_direct_upload_registered_once(self):
+        """Test an upload token cannot register a second resultfile"""
+        payload = {
+            'experiment': sample_experiment().id,
+            'measurement': sample_measurement().id,
+            'nuwroversion': sample_nuwroversion().id,
+        }
+        res = self.client.post(UPLOAD_URL, dict(payload, filename='direct.txt'))
+        self.client.put(res.data['url'], b'1 2\n', content_type='application/octet-stream')
+        payload['upload_token'] = res.data['upload_token']
+        self.client.post(RESULTFILES_URL, payload)
+
+        res = self.client.post(RESULTFILES_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('upload_token', res.data)
+        self.assertEqual(Resultfile.objects.count(), 1)
+
+    def test_create_resultfile_before_direct_upload_finished(self):
+        """Test a direct upload cannot be registered before the file exists"""
+        payload = {
+            'experiment': sample_experiment().id,
+            'measurement': sample_measurement().id,
+            'nuwroversion': sample_nuwroversion().id,
+        }
+        res = self.client.post(UPLOAD_URL, dict(payload, filename='direct.txt'))
+
+        res = self.client.post(RESULTFILES_URL, dict(payload, upload_token=res.data['upload_token']))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('upload_token', res.data)
+
+    def test_create_resultfile_without_file(self):
+        """Test creating a resultfile requires a file or an upload token"""
+        payload = {
+            'experiment': sample_experiment().id,
+            'measurement': sample_measurement().id,
+            'nuwroversion': sample_nuwroversion().id,
+            'upload_token': 'forged',
+        }
+        res = self.client.post(RESULTFILES_URL, payload)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        del payload['upload_token']
+        res = self.client.post(RESULTFILES_URL, payload)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_create_resultfile_records_checksum(self):
+        """Test the checksum and size of an uploaded file are stored"""
+        payload = {
+            'experiment': sample_experiment().id,
+            'measurement': sample_measurement().id,
+            'nuwroversion': sample_nuwroversion().id,
+            'result_file': SimpleUploadedFile('result.txt', b'1 2\n3 4\n'),
+        }
+
+        res = self.client.post(RESULTFILES_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['checksum'], hashlib.sha256(b'1 2\n3 4\n').hexdigest())
+        self.assertEqual(res.data['size'], 8)
+
+    def test_create_resultfile_invalid_table(self):
+        """Test an upload that is not a result table is rejected"""
+        payload = {
+            'experiment': sample_experiment().id,
+            'measurement': sample_measurement().id,
+            'nuwroversion': sample_nuwroversion().id,
+            'result_file': SimpleUploadedFile('result.txt', b'# x value\n1 2\n3 abc\n'),
+        }
+
+        res = self.client.post(RESULTFILES_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Line 3', res.data['detail'])
+        self.assertFalse(Resultfile.objects.exists())
+
+    def test_create_resultfile_columns_match_is_3d(self):
+        """Test a 1D table uploaded as a 3D resultfile is rejected"""
+        payload = {
+            'experiment': sample_experiment().id,
+            'measurement': sample_measurement().id,
+            'nuwroversion': sample_nuwroversion().id,
+            'is_3d': True,
+            'result_file': SimpleUploadedFile('result.txt', b'1 2\n3 4\n'),
+        }
+
+        res = self.client.post(RESULTFILES_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('result_file', res.data)
+
+    def test_filter_and_order_by_statistics(self):
+        """Test the list is filtered and ordered by the summary columns"""
+        small = Resultfile.objects.create(
+            experiment=sample_experiment(),
+            measurement=sample_measurement(),
+            nuwroversion=sample_nuwroversion(),
+            result_file=SimpleUploadedFile('small.txt', b'0 1\n1 2\n'),
+        )
+        large = Resultfile.objects.create(
+            experiment=sample_experiment(),
+            measurement=sample_measurement(),
+            nuwroversion=sample_nuwroversion(),
+            result_file=SimpleUploadedFile('large.txt', b'0 10\n1 20\n'),
+        )
+        sample_resultfile()
+
+        res = self.client.get(RESULTFILES_URL, {'integral__gt': 5})
+        self.assertEqual([r['id'] for r in res.data], [large.id])
+        self.assertEqual(res.data[0]['maximum'], 20)
+
+        res = self.client.get(RESULTFILES_URL, {'ordering': 'integral', 'fields': 'id,integral'})
+        self.assertEqual([r['id'] for r in res.data][:2], [small.id, large.id])
+        self.assertIsNone(res.data[2]['integral'])
+
+    def test_invalid_statistics_query(self):
+        """Test bad filters and orderings are rejected"""
+        res = self.client.get(RESULTFILES_URL, {'maximum__gte': 'many'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.get(RESULTFILES_URL, {'ordering': 'description'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,67 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.tests.test_models import sample_resultfile
+from manager.similarity import SignatureIndex
+
+
+def similar_url(resultfile_id):
+    return reverse('manager:resultfile-similar', args=[resultfile_id])
+
+
+class SimilarityApiTests(TestCase):
+    """Test finding the resultfiles most similar to one"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@example.com',
+            'testpass'
+        )
+        self.client.force_authenticate(self.user)
+        self.index = SignatureIndex()
+        patcher = patch('manager.similarity.index', self.index)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_similar(self):
+        """Test neighbours are ranked by shape, independent of scale and binning"""
+        rising = sample_resultfile(content='0 0\n1 1\n2 2\n')
+        scaled = sample_resultfile(nuwroversion='v2.0', content='0 0\n0.5 5\n1 10\n1.5 15\n2 20\n')
+        falling = sample_resultfile(nuwroversion='v3.0', content='0 2\n1 1\n2 0\n')
+
+        res = self.client.get(similar_url(rising.id), {'k': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['id'] for r in res.data], [scaled.id, falling.id])
+        self.assertAlmostEqual(res.data[0]['similarity'], 1.0, places=5)
+        self.assertEqual(res.data[0]['nuwroversion'], 'v2.0')
+
+    def test_index_updated_incrementally(self):
+        """Test added and deleted resultfiles are applied to the loaded matrix"""
+        query = sample_resultfile(content='0 0\n1 1\n')
+        removed = sample_resultfile(content='0 0\n1 2\n')
+        self.client.get(similar_url(query.id))
+
+        added = sample_resultfile(content='0 0\n1 3\n')
+        removed.delete()
+        with patch.object(self.index, 'load', wraps=self.index.load) as load:
+            res = self.client.get(similar_url(query.id))
+
+        self.assertEqual([r['id'] for r in res.data], [added.id])
+        self.assertEqual(len(self.index.ids), 2)
+        load.assert_called_once()
+
+    def test_not_a_table(self):
+        """Test files without a signature are rejected"""
+        resultfile = sample_resultfile(content='garbage\n')
+
+        res = self.client.get(similar_url(resultfile.id))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -14,5 +14,10 @@ router.register('resultfiles', views.ResultfileViewSet)
 app_name = 'manager'
 
 urlpatterns = [
+    path('checksums/', views.ChecksumLookupView.as_view(), name='checksums'),
+    path('changes/', views.ChangeFeedView.as_view(), name='changes'),
+    path('events/', views.EventStreamView.as_view(), name='events'),
+    path('events/ticket/', views.EventTicketView.as_view(), name='events-ticket'),
+    path('export/', views.ExportView.as_view(), name='export'),
     path('', include(router.urls))
 ]
@@ -1,21 +1,213 @@
+import io
+import json
 import os
+import struct
 
-from rest_framework import status, viewsets, mixins
+import numpy as np
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Count, F
+from django.http import FileResponse, HttpResponse, HttpResponseRedirect, StreamingHttpResponse
+
+from rest_framework import status, viewsets, mixins, serializers as drf_serializers
 from rest_framework.authentication import TokenAuthentication
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from core.analysis import STATISTICS, Grid, integrate_range, make_grid, project, resample, slice_grid, to_json
+from core.authentication import TicketAuthentication, issue_ticket
 from core.models import (
     Experiment,
     Measurement,
     Nuwroversion,
     Artifact,
+    ChangeEvent,
     Resultfile
 )
-from manager import serializers
+from core.datastore import load_table, table_file
+from core.parsers import ParseError, column_names
+from core.storage import DirectUploadsNotSupported, presign_upload
+from manager import cache as detail_cache, events, presence, renderers, serializers, similarity
+from manager.analysis import compare_versions, version_envelope
+from manager.export import export_catalog
+
+
+def file_response(field_file, filename):
+    """
+    Return a response sending the stored file as an attachment.
+
+    Storages serving files themselves get a redirect to a presigned url.
+    Behind nginx the transfer is handed over with `X-Accel-Redirect`, so a
+    slow client never keeps an application worker busy. Without it the
+    file is streamed in chunks by Django.
+    """
+    storage = field_file.storage
+    if getattr(storage, 'redirect_downloads', False):
+        return HttpResponseRedirect(storage.presigned_download_url(field_file.name, filename))
+
+    if settings.MEDIA_ACCEL_REDIRECT_URL:
+        response = HttpResponse(content_type='application/octet-stream')
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_REDIRECT_URL + field_file.name
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    return FileResponse(field_file.open('rb'), as_attachment=True, filename=filename)
+
+
+def load_tables(resultfiles):
+    """Return the parsed table of every resultfile by id, each file is read once"""
+    tables = {}
+    for resultfile in resultfiles:
+        try:
+            tables[resultfile.id] = load_table(resultfile.result_file, resultfile.is_3d)
+        except ParseError as error:
+            raise ValidationError({'detail': f'Resultfile {resultfile.id}: {error}'})
+    return tables
+
+
+def stream_file(path, offset=0, prefix=b'', chunk_size=64 * 1024):
+    """Yield `prefix`, then the content of the file at `path` from `offset` in chunks"""
+    if prefix:
+        yield prefix
+    with open(path, 'rb') as data_file:
+        data_file.seek(offset)
+        while True:
+            chunk = data_file.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+def direct_upload_response(request, instance, field_name, filename):
+    """Return the presigned url and token of a direct upload to the storage"""
+    try:
+        upload = presign_upload(instance, field_name, filename)
+    except DirectUploadsNotSupported:
+        return Response(
+            {'detail': 'The file storage does not support direct uploads.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    upload['url'] = request.build_absolute_uri(upload['url'])
+    return Response(upload, status=status.HTTP_201_CREATED)
+
+
+def collect_model_fields(model, serializer, prefix=''):
+    """
+    Return the columns, forward relations and reverse relations
+    `serializer` reads from `model`.
+
+    Columns are returned as lookup paths usable with `QuerySet.only()`,
+    nested serializers of forward relations are followed recursively.
+    """
+    columns, related, prefetch = [], [], []
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            continue
+
+        path = prefix + field.source
+        if isinstance(field, drf_serializers.ListSerializer):
+            if model_field.one_to_many:
+                prefetch.append(path)
+        elif isinstance(field, drf_serializers.BaseSerializer):
+            if not (model_field.many_to_one or model_field.one_to_one):
+                continue
+            nested_columns, nested_related, nested_prefetch = collect_model_fields(
+                model_field.related_model, field, path + '__'
+            )
+            columns += [path] + nested_columns
+            related += [path] + nested_related
+            prefetch += nested_prefetch
+        elif model_field.concrete:
+            columns.append(path)
+
+    return columns, related, prefetch
+
+
+class SparseFieldsMixin:
+    """
+    Viewset mixin supporting `?fields=` and `?expand=` on read requests.
+
+    Both take a comma separated list of field names. List and detail
+    querysets only select the columns and joins needed by the serializer.
+    """
+    # Maps a serializer field name to the annotation computing it
+    annotations = {}
+
+    def get_query_list(self, param):
+        """Return the comma separated values of a query parameter"""
+        value = self.request.query_params.get(param, '')
+        return [name.strip() for name in value.split(',') if name.strip()]
+
+    def get_serializer(self, *args, **kwargs):
+        if self.request is not None and self.request.method == 'GET':
+            kwargs.setdefault('fields', self.get_query_list('fields'))
+            kwargs.setdefault('expand', self.get_query_list('expand'))
+        return super().get_serializer(*args, **kwargs)
+
+    def restrict_queryset(self, queryset):
+        """Limit the queryset to what the serializer of this request reads"""
+        if self.action not in ('list', 'retrieve'):
+            return queryset
+
+        serializer = self.get_serializer()
+        columns, related, prefetch = collect_model_fields(queryset.model, serializer)
+        if related:
+            queryset = queryset.select_related(*related)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        if columns:
+            queryset = queryset.only(*columns)
+
+        annotations = {
+            name: annotation for name, annotation in self.annotations.items()
+            if name in serializer.fields
+        }
+        if annotations:
+            queryset = queryset.annotate(**annotations)
+        return queryset
+
 
+class CachedDetailMixin:
+    """
+    Viewset mixin serving retrieve responses from the detail cache.
 
-class BaseFileAttrViewSet(viewsets.GenericViewSet,
+    `cache_kind` is the change feed kind of the objects, whose changes
+    invalidate the cached representations.
+    """
+    cache_kind = None
+
+    def get_embedded(self, instance):
+        """Return the (kind, pk) of the other cached objects the representation embeds"""
+        return []
+
+    def retrieve(self, request, *args, **kwargs):
+        def compute():
+            instance = self.get_object()
+            return self.get_serializer(instance).data, self.get_embedded(instance)
+
+        data, hit = detail_cache.get_detail(
+            self.cache_kind,
+            kwargs[self.lookup_url_kwarg or self.lookup_field],
+            request.query_params,
+            compute
+        )
+        response = Response(data)
+        response['X-Cache'] = 'HIT' if hit else 'MISS'
+        return response
+
+
+class BaseFileAttrViewSet(SparseFieldsMixin,
+                          viewsets.GenericViewSet,
                           mixins.ListModelMixin,
                           mixins.CreateModelMixin,
                           mixins.RetrieveModelMixin,
@@ -26,7 +218,7 @@ class BaseFileAttrViewSet(viewsets.GenericViewSet,
 
     def get_queryset(self):
         """Return the list of all objects ordered by name"""
-        return self.queryset.order_by('name')
+        return self.restrict_queryset(self.queryset.order_by('name'))
 
 
 class ExperimentViewSet(BaseFileAttrViewSet):
@@ -46,13 +238,47 @@ class NuwroversionViewSet(BaseFileAttrViewSet):
     queryset = Nuwroversion.objects.all()
     serializer_class = serializers.NuwroversionSerializer
 
+    @action(detail=True, methods=['get'])
+    def compare(self, request, pk=None):
+        """
+        Compare the 1D resultfiles of this version bin by bin with the ones
+        of the same experiment and measurement in the `base` version
+        """
+        nuwroversion = self.get_object()
+        query = serializers.ComparisonSerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        base, include_bins = query.validated_data['base'], query.validated_data['bins']
+        if base == nuwroversion:
+            raise ValidationError({'base': 'Must be another nuwroversion.'})
 
-class ResultfileViewSet(viewsets.ModelViewSet):
+        resultfiles = list(
+            Resultfile.objects.filter(nuwroversion__in=[nuwroversion, base], is_3d=False)
+            .select_related('experiment', 'measurement')
+            .order_by('creation_date', 'pk')
+        )
+        # Any new, replaced or deleted file of either version changes the key
+        fingerprint = (nuwroversion.pk, nuwroversion.name, base.pk, base.name, include_bins, [
+            (r.id, r.nuwroversion_id, r.experiment.name, r.measurement.name, r.result_file.name)
+            for r in resultfiles
+        ])
+        data, hit = detail_cache.get_computed(
+            'comparison',
+            fingerprint,
+            lambda: compare_versions(resultfiles, nuwroversion, base, include_bins)
+        )
+        response = Response(data)
+        response['X-Cache'] = 'HIT' if hit else 'MISS'
+        return response
+
+
+class ResultfileViewSet(CachedDetailMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """Manage resultfile in the database"""
+    cache_kind = ChangeEvent.RESULTFILE
     serializer_class = serializers.ResultfileSerializer
     queryset = Resultfile.objects.all()
     authentication_classes = (TokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    annotations = {'artifact_count': Count('artifacts')}
 
     def get_queryset(self):
         """Retrieve the Resultfiles"""
@@ -67,12 +293,37 @@ class ResultfileViewSet(viewsets.ModelViewSet):
                 pk=int(measurement_str)
             )
 
-            return Resultfile.objects.filter(
+            return self.restrict_queryset(self.filter_statistics(Resultfile.objects.filter(
                 experiment__name=experiment_instance.name,
                 measurement__name=measurement_instance.name
-            ).order_by('-creation_date')
+            )))
+
+        return self.restrict_queryset(self.filter_statistics(Resultfile.objects.all()))
+
+    def filter_statistics(self, queryset):
+        """
+        Filter the list by `<statistic>__<gt|gte|lt|lte>=<value>` and order
+        it by `ordering=[-]<statistic>`, using the indexed summary columns
+        """
+        if self.action != 'list':
+            return queryset.order_by('-creation_date')
 
-        return Resultfile.objects.all().order_by('-creation_date')
+        filters = {}
+        for param, value in self.request.query_params.items():
+            name, _, lookup = param.partition('__')
+            if name in STATISTICS and lookup in ('gt', 'gte', 'lt', 'lte'):
+                try:
+                    filters[param] = float(value)
+                except ValueError:
+                    raise ValidationError({param: 'A valid number is required.'})
+
+        ordering = self.request.query_params.get('ordering', '-creation_date')
+        field = ordering.lstrip('-')
+        if field not in STATISTICS + ('creation_date',):
+            raise ValidationError({'ordering': f'Cannot order by {ordering}.'})
+        # Files without statistics come last either way
+        order = F(field).desc(nulls_last=True) if ordering.startswith('-') else F(field).asc(nulls_last=True)
+        return queryset.filter(**filters).order_by(order, '-pk')
 
     def get_serializer_class(self):
         """Return apropriate serializer class"""
@@ -80,25 +331,256 @@ class ResultfileViewSet(viewsets.ModelViewSet):
             return serializers.ResultfileListSerializer
         if self.action == 'retrieve':
             return serializers.ResultfileDetailSerializer
+        if self.action == 'upload_url':
+            return serializers.ResultfileUploadUrlSerializer
         return serializers.ResultfileSerializer
 
-    def perform_create(self, serializer):
-        """Create a new object"""
-        filename = self.request.data['result_file'].name
-        experiment_instance = Experiment.objects.get(
-            pk=int(self.request.data['experiment']))
-        measurement_instance = Measurement.objects.get(
-            pk=int(self.request.data['measurement']))
-        nuwroversion_instance = Nuwroversion.objects.get(
-            pk=int(self.request.data['nuwroversion']))
+    @action(detail=False, methods=['post'], url_path='upload-url')
+    def upload_url(self, request):
+        """Reserve a direct upload of a result file to the storage"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
 
-        serializer.save(
-            filename=filename
+        return direct_upload_response(
+            request,
+            Resultfile(**serializer.validated_data),
+            'result_file',
+            serializer.validated_data['filename']
+        )
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """Download the stored result file"""
+        resultfile = self.get_object()
+        return file_response(resultfile.result_file, resultfile.filename)
+
+    @action(detail=True, methods=['get'], renderer_classes=[
+        JSONRenderer,
+        renderers.NpyRenderer,
+        renderers.RawTableRenderer,
+        renderers.CSVRenderer,
+    ])
+    def data(self, request, pk=None):
+        """
+        Return the parsed table of a resultfile in the format negotiated
+        from the `Accept` header or the `format` parameter.
+
+        `npy` and `raw` are served from the stored table without decoding
+        it: `raw` is a little-endian uint32 header length, a JSON header
+        with dtype, shape and columns, then the float64 values row by row.
+        """
+        resultfile = self.get_object()
+        try:
+            path, offset, shape = table_file(resultfile.result_file, resultfile.is_3d)
+        except ParseError as error:
+            raise ValidationError({'detail': f'Resultfile {resultfile.id}: {error}'})
+        columns = column_names(resultfile.is_3d, shape[1])
+        data_format = request.accepted_renderer.format
+        stem = resultfile.filename.rsplit('.', 1)[0] or 'data'
+
+        if data_format == 'npy':
+            response = StreamingHttpResponse(stream_file(path), content_type=renderers.NpyRenderer.media_type)
+            response['Content-Length'] = os.path.getsize(path)
+        elif data_format == 'raw':
+            header = json.dumps({'dtype': '<f8', 'shape': list(shape), 'columns': columns}).encode()
+            prefix = struct.pack('<I', len(header)) + header
+            response = StreamingHttpResponse(
+                stream_file(path, offset, prefix),
+                content_type=renderers.RawTableRenderer.media_type
+            )
+            response['Content-Length'] = len(prefix) + os.path.getsize(path) - offset
+        elif data_format == 'csv':
+            text = io.StringIO()
+            np.savetxt(text, load_table(resultfile.result_file, resultfile.is_3d),
+                       fmt='%.17g', delimiter=',', header=','.join(columns), comments='')
+            response = HttpResponse(text.getvalue(), content_type='text/csv')
+        else:
+            table = load_table(resultfile.result_file, resultfile.is_3d)
+            return Response({'columns': columns, 'data': table.tolist()})
+
+        response['Content-Disposition'] = f'attachment; filename="{stem}.{data_format}"'
+        return response
+
+    def grid_response(self, request, query_class, compute):
+        """
+        Return the result of `compute(grid, query)` on the grid of a 3D
+        resultfile, cached per resultfile, operation and query
+        """
+        query = query_class(data=request.query_params)
+        query.is_valid(raise_exception=True)
+
+        def run():
+            resultfile = self.get_object()
+            if not resultfile.is_3d:
+                raise ValidationError({'detail': 'Only 3D resultfiles have projections, slices and integrals.'})
+            grid = Grid(load_tables([resultfile])[resultfile.id])
+            return compute(grid, query.validated_data), []
+
+        data, hit = detail_cache.get_detail(
+            ChangeEvent.RESULTFILE,
+            self.kwargs['pk'],
+            request.query_params,
+            run,
+            operation=self.action
+        )
+        response = Response(data)
+        response['X-Cache'] = 'HIT' if hit else 'MISS'
+        return response
+
+    @action(detail=True, methods=['get'])
+    def projection(self, request, pk=None):
+        """Project a 3D resultfile onto an axis, integrating over the other one"""
+        def compute(grid, query):
+            values, errors = project(grid, query['axis'], query.get('min'), query.get('max'))
+            return {
+                'axis': query['axis'],
+                query['axis']: grid.axis(query['axis']).tolist(),
+                'values': values.tolist(),
+                'errors': None if errors is None else errors.tolist(),
+            }
+        return self.grid_response(request, serializers.ProjectionSerializer, compute)
+
+    @action(detail=True, methods=['get'])
+    def slice(self, request, pk=None):
+        """Return the values of a 3D resultfile at a bin of an axis"""
+        def compute(grid, query):
+            axis, index = query['axis'], query['bin']
+            if index >= len(grid.axis(axis)):
+                raise ValidationError({'bin': f'The {axis} axis has {len(grid.axis(axis))} bins.'})
+            other = 'y' if axis == 'x' else 'x'
+            values, errors = slice_grid(grid, axis, index)
+            return {
+                'axis': axis,
+                'bin': index,
+                'at': float(grid.axis(axis)[index]),
+                other: grid.axis(other).tolist(),
+                'values': to_json(values),
+                'errors': None if errors is None else to_json(errors),
+            }
+        return self.grid_response(request, serializers.SliceSerializer, compute)
+
+    @action(detail=True, methods=['get'])
+    def integral(self, request, pk=None):
+        """Integrate a 3D resultfile over a range of both axes"""
+        def compute(grid, query):
+            value, error = integrate_range(grid, **query)
+            return {'value': value, 'error': error}
+        return self.grid_response(request, serializers.IntegralSerializer, compute)
+
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk=None):
+        """Return the resultfiles whose curves are most similar in shape"""
+        resultfile = self.get_object()
+        query = serializers.SimilarSerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        if resultfile.signature is None:
+            raise ValidationError({'detail': 'The file of this resultfile is not a result table.'})
+
+        ids, similarities = similarity.index.nearest(
+            np.frombuffer(resultfile.signature, dtype=np.float32),
+            query.validated_data['k'],
+            exclude=resultfile.id
+        )
+        neighbours = Resultfile.objects.filter(pk__in=ids).select_related(
+            'experiment', 'measurement', 'nuwroversion'
+        ).in_bulk()
+        return Response([
+            {
+                'id': pk,
+                'similarity': score,
+                'filename': neighbours[pk].filename,
+                'experiment': neighbours[pk].experiment.name,
+                'measurement': neighbours[pk].measurement.name,
+                'nuwroversion': neighbours[pk].nuwroversion.name,
+            }
+            for pk, score in zip(ids, similarities) if pk in neighbours
+        ])
+
+    @action(detail=False, methods=['get'])
+    def envelope(self, request):
+        """
+        Return the minimum, maximum, mean and standard deviation across
+        the nuwroversions of an experiment and measurement
+        """
+        query = serializers.EnvelopeSerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        experiment, measurement = query.validated_data['experiment'], query.validated_data['measurement']
+
+        resultfiles = list(
+            Resultfile.objects.filter(
+                experiment__name=experiment.name,
+                measurement__name=measurement.name,
+                is_3d=False
+            ).select_related('nuwroversion').order_by('creation_date', 'pk')
         )
+        # Any new, replaced or deleted file changes the key
+        fingerprint = (experiment.name, measurement.name, query.validated_data['points'], [
+            (r.id, r.nuwroversion_id, r.nuwroversion.name, r.result_file.name) for r in resultfiles
+        ])
+        data, hit = detail_cache.get_computed(
+            'envelope',
+            fingerprint,
+            lambda: version_envelope(resultfiles, query.validated_data['points'])
+        )
+        data = dict(data, experiment=experiment.name, measurement=measurement.name)
+        response = Response(data)
+        response['X-Cache'] = 'HIT' if hit else 'MISS'
+        return response
+
+    @action(detail=False, methods=['get'])
+    def overlay(self, request):
+        """Return the values of many 1D resultfiles resampled onto a common grid"""
+        query = serializers.OverlaySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        ids = query.validated_data['ids']
 
+        resultfiles = Resultfile.objects.filter(pk__in=ids).select_related(
+            'experiment', 'measurement', 'nuwroversion'
+        ).in_bulk()
+        missing = [pk for pk in ids if pk not in resultfiles]
+        if missing:
+            raise ValidationError({'ids': f'Unknown resultfiles: {", ".join(map(str, missing))}.'})
+        resultfiles = [resultfiles[pk] for pk in ids]
+        if any(resultfile.is_3d for resultfile in resultfiles):
+            raise ValidationError({'ids': 'Only 1D resultfiles can be overlaid.'})
+
+        tables = load_tables(resultfiles)
+        xs = [tables[pk][:, 0] for pk in ids]
+        grid = make_grid(
+            xs,
+            query.validated_data['points'],
+            query.validated_data.get('x_min'),
+            query.validated_data.get('x_max')
+        )
+        values = resample(xs, [tables[pk][:, 1] for pk in ids], grid)
 
-class ArtifactViewSet(viewsets.ModelViewSet):
+        # Errors are resampled in the same way, for the curves that have them
+        with_errors = [pk for pk in ids if tables[pk].shape[1] > 2]
+        errors = {}
+        if with_errors:
+            resampled = resample([tables[pk][:, 0] for pk in with_errors], [tables[pk][:, 2] for pk in with_errors], grid)
+            errors = dict(zip(with_errors, to_json(resampled)))
+
+        return Response({
+            'x': grid.tolist(),
+            'curves': [
+                {
+                    'id': resultfile.id,
+                    'filename': resultfile.filename,
+                    'experiment': resultfile.experiment.name,
+                    'measurement': resultfile.measurement.name,
+                    'nuwroversion': resultfile.nuwroversion.name,
+                    'values': curve,
+                    'errors': errors.get(resultfile.id),
+                }
+                for resultfile, curve in zip(resultfiles, to_json(values))
+            ]
+        })
+
+
+class ArtifactViewSet(CachedDetailMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """Manage artifacts in database"""
+    cache_kind = ChangeEvent.ARTIFACT
     serializer_class = serializers.ArtifactSerializer
     queryset = Artifact.objects.all()
     authentication_classes = (TokenAuthentication,)
@@ -106,20 +588,209 @@ class ArtifactViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Retrieve the artifacts for the authenticated user"""
+        queryset = Artifact.objects.all()
         if self.request.query_params.get('resultfile'):
-            return Artifact.objects.filter(resultfile__pk=int(self.request.query_params.get('resultfile'))).order_by('filename')
-        return Artifact.objects.all().order_by('filename')
+            queryset = queryset.filter(resultfile__pk=int(self.request.query_params.get('resultfile')))
+        if self.action == 'retrieve':
+            queryset = queryset.annotate(resultfile_artifact_count=Count('resultfile__artifacts'))
+        return self.restrict_queryset(queryset.order_by('filename'))
+
+    def get_embedded(self, instance):
+        return [(ChangeEvent.RESULTFILE, instance.resultfile_id)]
 
     def get_serializer_class(self):
         """Return the apropriate serializer class"""
         if self.action == 'retrieve':
             return serializers.ArtifactDetailSerializer
+        if self.action == 'upload_url':
+            return serializers.ArtifactUploadUrlSerializer
         return serializers.ArtifactSerializer
 
+    @action(detail=False, methods=['post'], url_path='upload-url')
+    def upload_url(self, request):
+        """Reserve a direct upload of an artifact file to the storage"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        return direct_upload_response(
+            request,
+            Artifact(**serializer.validated_data),
+            'artifact',
+            serializer.validated_data['filename']
+        )
+
     def perform_create(self, serializer):
         """Create new object and save file in FS"""
-        resultfile = Resultfile.objects.get(pk=int(self.request.data['resultfile']))
         serializer.save(
-            resultfile=resultfile,
             filename=self.request.data['filename']
         )
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """Download the stored artifact file"""
+        artifact = self.get_object()
+        return file_response(artifact.artifact, artifact.filename)
+
+
+class ChangeFeedView(APIView):
+    """
+    List the changes of resultfiles and artifacts after a cursor.
+
+    `since` is the `cursor` returned by the previous call (0 for a full
+    sync). Only the latest change of every object within a page is
+    returned, together with the current representation of the object.
+
+    Changes are served `CHANGE_FEED_DELAY` seconds after they are recorded,
+    see `ChangeEvent.visible`: following the cursor skips no change whose
+    transaction committed within that delay.
+    """
+    authentication_classes = (TokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+    default_limit = 500
+    max_limit = 5000
+
+    def get_int_param(self, name, default):
+        try:
+            return int(self.request.query_params.get(name, default))
+        except ValueError:
+            raise ValidationError({name: 'A valid integer is required.'})
+
+    def get(self, request):
+        since = self.get_int_param('since', 0)
+        limit = self.get_int_param('limit', self.default_limit)
+        if not 1 <= limit <= self.max_limit:
+            raise ValidationError({'limit': f'Ensure this value is between 1 and {self.max_limit}.'})
+
+        events = list(
+            ChangeEvent.visible().filter(id__gt=since).order_by('id')[:limit + 1]
+        )
+        has_more = len(events) > limit
+        events = events[:limit]
+        cursor = events[-1].id if events else since
+
+        latest = {}
+        for event in events:
+            latest.pop((event.kind, event.object_id), None)
+            latest[(event.kind, event.object_id)] = event
+
+        ids = {ChangeEvent.RESULTFILE: set(), ChangeEvent.ARTIFACT: set()}
+        for kind, object_id in latest:
+            if latest[(kind, object_id)].action != ChangeEvent.DELETED:
+                ids[kind].add(object_id)
+
+        resultfiles = Resultfile.objects.select_related(
+            'experiment', 'measurement', 'nuwroversion'
+        ).annotate(artifact_count=Count('artifacts')).in_bulk(ids[ChangeEvent.RESULTFILE])
+        artifacts = Artifact.objects.in_bulk(ids[ChangeEvent.ARTIFACT])
+
+        objects = {}
+        for pk, data in zip(resultfiles, serializers.ResultfileListSerializer(resultfiles.values(), many=True).data):
+            objects[(ChangeEvent.RESULTFILE, pk)] = data
+        for pk, data in zip(artifacts, serializers.ArtifactSerializer(artifacts.values(), many=True).data):
+            objects[(ChangeEvent.ARTIFACT, pk)] = data
+
+        serializer = serializers.ChangeEventSerializer(
+            latest.values(), many=True, context={'objects': objects}
+        )
+        return Response({
+            'cursor': cursor,
+            'has_more': has_more,
+            'changes': serializer.data,
+        })
+
+
+class ChecksumLookupView(APIView):
+    """
+    Tell which of a batch of SHA-256 checksums are already stored.
+
+    Stored bytes are referenced with `existing_checksum` when creating a
+    resultfile or an artifact, instead of uploading them again.
+    """
+    authentication_classes = (TokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+    throttle_scope = 'read'
+
+    def post(self, request):
+        query = serializers.ChecksumLookupSerializer(data=request.data)
+        query.is_valid(raise_exception=True)
+        checksums = query.validated_data['checksums']
+
+        stored = presence.index.stored(checksums)
+        return Response({
+            'stored': [checksum for checksum in checksums if checksum in stored],
+            'missing': [checksum for checksum in checksums if checksum not in stored],
+        })
+
+
+class EventStreamView(APIView):
+    """
+    Push the changes of resultfiles and artifacts as server-sent events.
+
+    Every event carries the change feed id as its `id`, so a reconnecting
+    `EventSource` resumes after the `Last-Event-ID` it received. `since`
+    starts from a change feed cursor, without either only new changes are
+    sent. Streams end after `EVENTS_STREAM_TIMEOUT` seconds and clients
+    reconnect, so under threaded workers an open stream never holds a
+    thread indefinitely; the `events` service serves them from gevent
+    workers instead, where idle streams cost no thread at all.
+
+    Browsers authenticate with a `ticket` from `EventTicketView`. Once it
+    has expired the automatic reconnection fails, the client then opens a
+    new stream with a fresh ticket and `since` set to the last event id.
+    """
+    authentication_classes = (TokenAuthentication, TicketAuthentication)
+    permission_classes = (IsAuthenticated,)
+    renderer_classes = (renderers.EventStreamRenderer, JSONRenderer)
+
+    def get(self, request):
+        cursor = request.META.get('HTTP_LAST_EVENT_ID') or request.query_params.get('since')
+        if cursor is not None:
+            try:
+                cursor = int(cursor)
+            except ValueError:
+                raise ValidationError({'since': 'A valid integer is required.'})
+
+        response = StreamingHttpResponse(events.event_stream(cursor), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Passed on by nginx as soon as they are written
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
+class EventTicketView(APIView):
+    """Issue a short-lived ticket authenticating an event stream by its url"""
+    authentication_classes = (TokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+    throttle_scope = 'read'
+
+    def post(self, request):
+        return Response({
+            'ticket': issue_ticket(request.user),
+            'expires_in': settings.EVENTS_TICKET_EXPIRY,
+        })
+
+
+class ExportView(APIView):
+    """
+    Stream the metadata of all resultfiles and artifacts as NDJSON.
+
+    `since` takes a change feed cursor to only export the changes after
+    it, the last line holds the cursor of the next incremental export.
+    """
+    authentication_classes = (TokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request):
+        since = request.query_params.get('since')
+        if since is not None:
+            try:
+                since = int(since)
+            except ValueError:
+                raise ValidationError({'since': 'A valid integer is required.'})
+
+        response = StreamingHttpResponse(
+            export_catalog(since=since),
+            content_type='application/x-ndjson'
+        )
+        response['Content-Disposition'] = 'attachment; filename="catalog.ndjson"'
+        return response
@@ -0,0 +1,13 @@
+from django.contrib.auth import get_user_model
+
+from core import benchmark
+from user.serializers import UserSerializer
+
+
+@benchmark.register('user.user_serializer')
+def bench_user_serializer():
+    users = [
+        get_user_model()(email=f'user{i}@example.com', name=f'User {i}')
+        for i in range(1000)
+    ]
+    return lambda: UserSerializer(users, many=True).data